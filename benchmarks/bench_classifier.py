@@ -0,0 +1,324 @@
+# benchmarks/bench_classifier.py
+"""
+分类基准与准确率测试
+
+在带标注的剪贴板语料（benchmarks/corpus，中英文覆盖所有默认分类）上运行分类器，
+统计延迟分位数、吞吐、提示词token、准确率、混淆矩阵和 NEW_CATEGORY 新建分类比例，
+结果以JSON输出，可用 --compare 与之前的结果对比。
+
+每次运行使用全新的临时数据库，分类缓存和本地模型不会在运行之间共享。
+批量模式下每条内容的延迟记为所在批次的耗时。
+
+用法:
+    python benchmarks/bench_classifier.py --backend mock --output result.json
+    python benchmarks/bench_classifier.py --backend ollama --model qwen3:0.6b --compare result.json
+    python benchmarks/bench_classifier.py --backend mock-http --mode batch --batch-size 16
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.database import DatabaseManager
+from core.ai_classifier import AIClassifier
+from core.content_digest import estimate_tokens
+from core.mock_backend import MockBackend, MockOllamaServer, ScriptedResponder
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'corpus', 'classification_v1.jsonl')
+
+# 对比时展示的指标，值越大越好为True
+COMPARE_METRICS = {
+    'accuracy': True,
+    'items_per_sec': True,
+    'latency_ms.p50': False,
+    'latency_ms.p95': False,
+    'latency_ms.p99': False,
+    'prompt_tokens_per_item': False,
+    'model_calls': False,
+    'new_category_rate': False,
+}
+
+
+def load_corpus(path):
+    """读取语料，首行为版本信息"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    lines = raw.decode('utf-8').splitlines()
+    header = json.loads(lines[0])
+    items = [json.loads(line) for line in lines[1:] if line.strip()]
+    return {
+        'path': os.path.relpath(path, os.path.dirname(__file__)),
+        'version': header.get('version'),
+        'sha256': hashlib.sha256(raw).hexdigest(),
+        'items': items,
+    }
+
+
+class MeteredBackend:
+    """包装任意分类后端，记录每次调用的延迟和提示词token"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.call_latencies = []
+
+    def health(self):
+        return self.backend.health()
+
+    def generate(self, prompt, max_tokens=100, timeout=30, stop_when=None):
+        started = time.perf_counter()
+        response = self.backend.generate(prompt, max_tokens, timeout, stop_when)
+        self._record([prompt], [response], time.perf_counter() - started)
+        return response
+
+    def generate_batch(self, prompts, max_tokens=100, timeout=30, stop_when=None):
+        started = time.perf_counter()
+        responses = self.backend.generate_batch(prompts, max_tokens, timeout, stop_when)
+        self._record(prompts, responses, time.perf_counter() - started)
+        return responses
+
+    def _record(self, prompts, responses, elapsed):
+        with self.lock:
+            self.calls += len(prompts)
+            self.failures += sum(1 for r in responses if r is None)
+            self.prompt_tokens += sum(estimate_tokens(p) for p in prompts)
+            self.call_latencies.append(elapsed)
+
+
+def build_mock_responder(items, accuracy, new_rate, seed):
+    """按语料标注生成脚本化回答，按比例注入错误分类和新分类建议"""
+    rng = random.Random(seed)
+    labels = sorted({item['label'] for item in items})
+    answers = {}
+    for item in items:
+        roll = rng.random()
+        if roll < new_rate:
+            answers[item['content']] = f"NEW_CATEGORY:其他{rng.randint(1, 5)}|0.6"
+        elif roll < new_rate + (1 - accuracy):
+            wrong = rng.choice([label for label in labels if label != item['label']])
+            answers[item['content']] = f"{wrong}|0.7"
+        else:
+            answers[item['content']] = f"{item['label']}|0.9"
+    return ScriptedResponder(answers=answers)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_summary(seconds):
+    return {
+        'p50': round(percentile(seconds, 50) * 1000, 3),
+        'p95': round(percentile(seconds, 95) * 1000, 3),
+        'p99': round(percentile(seconds, 99) * 1000, 3),
+        'mean': round(sum(seconds) / len(seconds) * 1000, 3) if seconds else 0.0,
+    }
+
+
+def run(items, backend, mode, batch_size):
+    """在临时数据库上分类全部语料，返回逐条预测和延迟"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'))
+        metered = MeteredBackend(backend)
+        classifier = AIClassifier(metered, db)
+        initial_categories = {cat['name'] for cat in db.get_all_categories()}
+
+        predictions = {}
+        item_latencies = []
+        started = time.perf_counter()
+        if mode == 'single':
+            for item in items:
+                t0 = time.perf_counter()
+                predictions[item['id']] = classifier.classify_content(item['content'])
+                item_latencies.append(time.perf_counter() - t0)
+        else:
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                t0 = time.perf_counter()
+                results = classifier.classify_batch({i: item['content'] for i, item in enumerate(chunk)})
+                elapsed = time.perf_counter() - t0
+                for i, item in enumerate(chunk):
+                    # 批量结果缺失的条目按默认分类计
+                    predictions[item['id']] = results.get(i, ("文本内容", 0.0))
+                    item_latencies.append(elapsed)
+        wall = time.perf_counter() - started
+
+        created = {cat['name'] for cat in db.get_all_categories()} - initial_categories
+        db.close()
+    return predictions, item_latencies, wall, metered, created
+
+
+def summarize(items, predictions, item_latencies, wall, metered, created):
+    labels = sorted({item['label'] for item in items})
+    confusion = {label: Counter() for label in labels}
+    by_lang = defaultdict(lambda: [0, 0])
+    correct = 0
+    new_category = 0
+    for item in items:
+        predicted, _ = predictions[item['id']]
+        confusion[item['label']][predicted] += 1
+        hit = predicted == item['label']
+        correct += hit
+        by_lang[item['lang']][0] += hit
+        by_lang[item['lang']][1] += 1
+        if predicted in created:
+            new_category += 1
+
+    total = len(items)
+    per_label = {
+        label: round(confusion[label][label] / sum(confusion[label].values()), 3)
+        for label in labels
+    }
+    return {
+        'items': total,
+        'wall_seconds': round(wall, 3),
+        'items_per_sec': round(total / wall, 2) if wall else 0.0,
+        'latency_ms': latency_summary(item_latencies),
+        'model_call_latency_ms': latency_summary(metered.call_latencies),
+        'model_calls': metered.calls,
+        'model_failures': metered.failures,
+        'prompt_tokens': metered.prompt_tokens,
+        'prompt_tokens_per_item': round(metered.prompt_tokens / total, 1) if total else 0.0,
+        'accuracy': round(correct / total, 4) if total else 0.0,
+        'accuracy_by_lang': {lang: round(hit / n, 4) for lang, (hit, n) in sorted(by_lang.items())},
+        'accuracy_by_label': per_label,
+        'confusion_matrix': {label: dict(confusion[label]) for label in labels},
+        'new_category_rate': round(new_category / total, 4) if total else 0.0,
+        'new_categories_created': sorted(created),
+    }
+
+
+def lookup(data, dotted):
+    for key in dotted.split('.'):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(current, baseline_path):
+    """打印与之前结果的指标对比"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('corpus', {}).get('sha256') != current['corpus']['sha256']:
+        print("警告: 两次运行使用的语料不同", file=sys.stderr)
+
+    print(f"{'metric':<26}{'baseline':>12}{'current':>12}{'change':>12}", file=sys.stderr)
+    for metric, higher_is_better in COMPARE_METRICS.items():
+        old = lookup(baseline.get('results', {}), metric)
+        new = lookup(current['results'], metric)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        better = (new > old) if higher_is_better else (new < old)
+        mark = " " if new == old else ("+" if better else "-")
+        print(f"{metric:<26}{old:>12}{new:>12}{change:>12} {mark}", file=sys.stderr)
+
+
+def make_backend(args, items):
+    """返回 (后端, 需要在结束时停止的替身服务)"""
+    if args.backend == 'ollama':
+        from core.ollama_manager import OllamaManager
+        backend = OllamaManager(args.ollama_url, args.model)
+        if not backend.health():
+            sys.exit(f"Ollama服务不可用: {args.ollama_url}")
+        return backend, None
+
+    responder = build_mock_responder(items, args.mock_accuracy, args.mock_new_rate, args.seed)
+    options = dict(responder=responder, latency=args.mock_latency,
+                   token_latency=args.mock_token_latency, failure_rate=args.mock_failure_rate,
+                   seed=args.seed)
+    if args.backend == 'mock':
+        return MockBackend(**options), None
+
+    from core.ollama_manager import OllamaManager
+    server = MockOllamaServer(**options)
+    return OllamaManager(server.start(), args.model), server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XenonClip 分类基准与准确率测试")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="标注语料（JSONL，首行为版本信息）")
+    parser.add_argument('--backend', choices=('mock', 'mock-http', 'ollama'), default='mock',
+                        help="mock: 进程内替身；mock-http: 本地HTTP替身 + OllamaManager；ollama: 真实服务")
+    parser.add_argument('--ollama-url', default="http://localhost:11434")
+    parser.add_argument('--model', default="qwen3:0.6b")
+    parser.add_argument('--mode', choices=('single', 'batch'), default='single')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--lang', choices=('zh', 'en'), help="只测试某种语言")
+    parser.add_argument('--mock-accuracy', type=float, default=0.9, help="替身回答正确的比例")
+    parser.add_argument('--mock-new-rate', type=float, default=0.02, help="替身建议新分类的比例")
+    parser.add_argument('--mock-latency', type=float, default=0.0)
+    parser.add_argument('--mock-token-latency', type=float, default=0.0)
+    parser.add_argument('--mock-failure-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="结果JSON文件，默认输出到标准输出")
+    parser.add_argument('--compare', help="与之前的结果JSON对比")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    items = [item for item in corpus['items'] if not args.lang or item['lang'] == args.lang]
+    backend, server = make_backend(args, items)
+    try:
+        predictions, item_latencies, wall, metered, created = run(
+            items, backend, args.mode, args.batch_size)
+    finally:
+        if server:
+            server.stop()
+
+    result = {
+        'benchmark': 'classification',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'corpus': {key: corpus[key] for key in ('path', 'version', 'sha256')},
+        'config': {
+            'backend': args.backend,
+            'model': args.model if args.backend != 'mock' else None,
+            'mode': args.mode,
+            'batch_size': args.batch_size if args.mode == 'batch' else 1,
+            'lang': args.lang,
+            'seed': args.seed,
+            'mock': {
+                'accuracy': args.mock_accuracy,
+                'new_rate': args.mock_new_rate,
+                'latency': args.mock_latency,
+                'token_latency': args.mock_token_latency,
+                'failure_rate': args.mock_failure_rate,
+            } if args.backend != 'ollama' else None,
+            'python': platform.python_version(),
+        },
+        'results': summarize(items, predictions, item_latencies, wall, metered, created),
+    }
+    # HTTP后端的流式结束方式，提前结束的次数即丢弃的keep-alive连接数
+    if hasattr(backend, 'get_stats'):
+        result['results']['backend'] = backend.get_stats()
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == '__main__':
+    main()
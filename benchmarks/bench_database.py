@@ -0,0 +1,166 @@
+# benchmarks/bench_database.py
+"""
+数据库并发吞吐基准测试
+
+对比旧实现（每次调用新建连接 + 全局锁）与连接池实现（WAL + 单写多读）
+在读写混合负载下的吞吐量。
+
+用法: python benchmarks/bench_database.py [--seconds 5] [--readers 4] [--rows 5000]
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.database import DatabaseManager
+
+
+class LegacyDatabaseManager:
+    """旧版访问模式：每次调用打开并关闭连接，所有操作共用一把锁"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        # 复用新版建表逻辑，再切回默认的回滚日志模式
+        DatabaseManager(db_path, reader_count=0).close()
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.close()
+
+    def add_clipboard_item(self, item):
+        with self.lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                cursor = conn.execute('''
+                    INSERT INTO clipboard_items
+                    (content, content_hash, category, confidence, is_sensitive, source_app)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (item['content'], item['content_hash'], item['category'],
+                      item['confidence'], item['is_sensitive'], item['source_app']))
+                conn.commit()
+                return cursor.lastrowid
+            finally:
+                conn.close()
+
+    def get_clipboard_items(self, limit=100, category=None, search=None):
+        with self.lock:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            try:
+                cursor = conn.execute('''
+                    SELECT id, content, category, confidence, is_sensitive,
+                           is_favorite, source_app, created_at, access_count, last_accessed
+                    FROM clipboard_items ORDER BY last_accessed DESC LIMIT ?
+                ''', (limit,))
+                return [dict(row) for row in cursor.fetchall()]
+            finally:
+                conn.close()
+
+    def content_exists(self, content_hash):
+        with self.lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return conn.execute('SELECT 1 FROM clipboard_items WHERE content_hash = ?',
+                                    (content_hash,)).fetchone() is not None
+            finally:
+                conn.close()
+
+    def close(self):
+        pass
+
+
+def make_item(n: int) -> dict:
+    content = f"benchmark clipboard content #{n} " * 4
+    return {
+        'content': content,
+        'content_hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+        'category': '文本内容',
+        'confidence': 0.9,
+        'is_sensitive': False,
+        'source_app': 'bench',
+    }
+
+
+def seed(db, rows: int):
+    for n in range(rows):
+        db.add_clipboard_item(make_item(n))
+
+
+def run_mixed(db, seconds: float, readers: int, start_at: int) -> dict:
+    """一个写线程持续插入，多个读线程持续查询，统计各自完成的操作数"""
+    stop = threading.Event()
+    counts = {'writes': 0, 'reads': 0}
+    counts_lock = threading.Lock()
+
+    def writer():
+        n = start_at
+        local = 0
+        while not stop.is_set():
+            item = make_item(n)
+            if not db.content_exists(item['content_hash']):
+                db.add_clipboard_item(item)
+            n += 1
+            local += 1
+        with counts_lock:
+            counts['writes'] += local
+
+    def reader():
+        local = 0
+        while not stop.is_set():
+            db.get_clipboard_items(limit=50)
+            local += 1
+        with counts_lock:
+            counts['reads'] += local
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        'writes_per_sec': counts['writes'] / seconds,
+        'reads_per_sec': counts['reads'] / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XenonClip 数据库并发基准")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (
+            ('legacy', lambda p: LegacyDatabaseManager(p)),
+            # 多留一个读连接给写线程做存在性检查
+            ('pooled', lambda p: DatabaseManager(p, reader_count=args.readers + 1)),
+        ):
+            db_path = os.path.join(tmp, f'{name}.db')
+            db = factory(db_path)
+            seed(db, args.rows)
+            results[name] = run_mixed(db, args.seconds, args.readers, args.rows)
+            db.close()
+
+    for name, r in results.items():
+        print(f"{name:>8}: {r['writes_per_sec']:10.1f} writes/s  {r['reads_per_sec']:10.1f} reads/s")
+
+    legacy, pooled = results['legacy'], results['pooled']
+    for key in ('writes_per_sec', 'reads_per_sec'):
+        if legacy[key]:
+            print(f"{key}: x{pooled[key] / legacy[key]:.2f}")
+
+
+if __name__ == '__main__':
+    main()
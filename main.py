@@ -1,4 +1,5 @@
 # main.py (根目录)
+import argparse
 import asyncio
 import logging
 import sys
@@ -18,8 +19,15 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from core.database import DatabaseManager
 from core.ollama_manager import OllamaManager
+from core.mock_backend import MockOllamaServer
 from core.ai_classifier import AIClassifier
 from core.clipboard_monitor import ClipboardMonitor
+from core.clipboard_source import SOURCE_KINDS, create_clipboard_source
+from core.classification_queue import ClassificationQueue
+from core.thumbnails import ThumbnailService
+from core.settings import SettingsStore
+from core.retention import RetentionManager
+from core.transfer import NDJSONImporter, iter_export_chunks
 from api.routes import create_app
 
 # 配置日志
@@ -30,10 +38,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class XenonClipApp:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.ollama_manager = OllamaManager()
+    def __init__(self, db_path: str = "xenon_clip.db", ollama_url: str = "http://localhost:11434",
+                 mock_ollama: bool = False, clipboard_backend: str = "auto"):
+        self.db_manager = DatabaseManager(db_path)
+        self.settings = SettingsStore(self.db_manager)
+        self.retention = RetentionManager(self.db_manager, self.settings)
+        # 离线运行时使用本地替身服务代替真实的Ollama
+        self.mock_server = MockOllamaServer() if mock_ollama else None
+        if self.mock_server:
+            ollama_url = self.mock_server.start()
+        self.ollama_manager = OllamaManager(ollama_url)
+        self.clipboard_backend = clipboard_backend
         self.ai_classifier = None
+        self.classification_queue = None
+        self.thumbnails = None
         self.clipboard_monitor = None
         self.app = None
         self.server = None
@@ -53,11 +71,23 @@ class XenonClipApp:
             # 初始化AI分类器
             self.ai_classifier = AIClassifier(self.ollama_manager, self.db_manager)
             
+            # 初始化后台分类队列
+            self.classification_queue = ClassificationQueue(self.db_manager, self.ai_classifier,
+                                                            self.settings)
+            
+            # 图片缩略图线程池，监听器入库时生成，界面按需读取
+            self.thumbnails = ThumbnailService(self.db_manager)
+            
             # 初始化剪贴板监听器
-            self.clipboard_monitor = ClipboardMonitor(self.db_manager, self.ai_classifier)
+            self.clipboard_monitor = ClipboardMonitor(self.db_manager, self.ai_classifier, self.settings,
+                                                      self.classification_queue,
+                                                      create_clipboard_source(self.clipboard_backend),
+                                                      self.thumbnails)
             
             # 创建FastAPI应用
-            self.app = create_app(self.db_manager, self.ai_classifier, self.clipboard_monitor)
+            self.app = create_app(self.db_manager, self.ai_classifier, self.clipboard_monitor,
+                                  self.settings, self.retention, self.classification_queue,
+                                  self.thumbnails)
             
             logger.info("XenonClip初始化完成")
             return True
@@ -145,6 +175,15 @@ class XenonClipApp:
             if self.clipboard_monitor:
                 self.clipboard_monitor.stop()
             
+            # 停止数据保留任务
+            self.retention.stop()
+            
+            if self.mock_server:
+                self.mock_server.stop()
+            
+            # 关闭数据库连接
+            self.db_manager.close()
+            
             # 停止托盘图标
             if self.tray_icon:
                 self.tray_icon.stop()
@@ -165,6 +204,7 @@ class XenonClipApp:
             # 启动各个组件
             self.start_server()
             self.start_clipboard_monitor()
+            self.retention.start()
             self.setup_hotkeys()
             self.create_tray_icon()
             
@@ -185,6 +225,87 @@ class XenonClipApp:
             logger.error(f"运行应用失败: {e}")
             sys.exit(1)
 
+def run_maintenance(args) -> int:
+    """执行命令行维护任务"""
+    db_manager = DatabaseManager(args.db)
+    try:
+        if args.command == 'check-stats':
+            mismatches = db_manager.check_category_stats()
+            if not mismatches:
+                print("分类统计一致")
+                return 0
+            for m in mismatches:
+                print(f"{m['category']}: 实际 {m['expected_count']} 条, 统计表 {m['stored_count']} 条")
+            print("分类统计不一致，可运行 rebuild-stats 修复")
+            return 1
+        
+        if args.command == 'rebuild-stats':
+            db_manager.rebuild_category_stats()
+            print("分类统计已重建")
+            return 0
+        
+        if args.command == 'vacuum':
+            if not db_manager.enable_incremental_vacuum():
+                print("切换增量回收模式失败")
+                return 1
+            reclaimed = db_manager.incremental_vacuum()
+            print(f"数据库已处于增量回收模式，回收 {reclaimed} 字节")
+            return 0
+        
+        if args.command == 'export':
+            started = time.perf_counter()
+            out = sys.stdout.buffer if args.file == '-' else open(args.file, 'wb')
+            try:
+                for chunk in iter_export_chunks(db_manager):
+                    out.write(chunk)
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+            print(f"导出完成，用时 {time.perf_counter() - started:.1f} 秒", file=sys.stderr)
+            return 0
+        
+        if args.command == 'import':
+            started = time.perf_counter()
+            importer = NDJSONImporter(db_manager)
+            source = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+            try:
+                for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                    if importer.feed(chunk):
+                        importer.flush()
+                result = importer.finish()
+            finally:
+                if source is not sys.stdin.buffer:
+                    source.close()
+            print(f"导入 {result['imported']} 条，跳过重复 {result['skipped']} 条，"
+                  f"错误 {result['errors']} 行，用时 {time.perf_counter() - started:.1f} 秒",
+                  file=sys.stderr)
+            return 0
+        
+        return 0
+    finally:
+        db_manager.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="XenonClip - AI剪贴板管理器")
+    parser.add_argument('--db', default="xenon_clip.db", help="数据库文件路径")
+    parser.add_argument('--ollama-url', default="http://localhost:11434", help="Ollama服务地址")
+    parser.add_argument('--mock-ollama', action='store_true', help="使用本地Ollama替身服务（离线测试）")
+    parser.add_argument('--clipboard-backend', choices=SOURCE_KINDS, default="auto",
+                        help="剪贴板变化检测方式，auto 按平台选择，不可用时退回轮询")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('check-stats', help="检查分类统计汇总表是否与数据一致")
+    subparsers.add_parser('rebuild-stats', help="从剪贴板数据全量重建分类统计")
+    subparsers.add_parser('vacuum', help="把旧数据库切换为增量回收模式并回收空闲页")
+    export_parser = subparsers.add_parser('export', help="导出剪贴板历史为NDJSON")
+    export_parser.add_argument('file', help="输出文件，- 表示标准输出")
+    import_parser = subparsers.add_parser('import', help="从NDJSON导入剪贴板历史")
+    import_parser.add_argument('file', help="输入文件，- 表示标准输入")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    app = XenonClipApp()
+    args = parse_args()
+    if args.command:
+        sys.exit(run_maintenance(args))
+    
+    app = XenonClipApp(args.db, args.ollama_url, args.mock_ollama, args.clipboard_backend)
     app.run()
\ No newline at end of file
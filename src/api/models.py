@@ -1,7 +1,9 @@
 # src/api/models.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
+from core.classification_jobs import MAX_JOB_BATCH_SIZE, MAX_JOB_LIMIT
+
 class UpdateCategoryRequest(BaseModel):
     category: str
 
@@ -13,4 +15,9 @@ class UpdateSettingsRequest(BaseModel):
     classify_schedule: Optional[str] = None
     classify_time: Optional[str] = None
     retention_days: Optional[int] = None
-    enable_sensitive_detection: Optional[bool] = None
\ No newline at end of file
+    enable_sensitive_detection: Optional[bool] = None
+
+class ClassifyJobRequest(BaseModel):
+    # 越界值直接返回422，而不是在任务里被悄悄收紧
+    limit: Optional[int] = Field(None, ge=1, le=MAX_JOB_LIMIT)
+    batch_size: Optional[int] = Field(None, ge=1, le=MAX_JOB_BATCH_SIZE)
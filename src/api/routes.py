@@ -1,22 +1,39 @@
 # src/api/routes.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response
 from typing import List, Optional
 import logging
 import os
+import re
 
-from core.database import DatabaseManager
+from core.database import MAX_PAGE_SIZE, DatabaseManager
 from core.ai_classifier import AIClassifier
 from core.clipboard_monitor import ClipboardMonitor
+from core.classification_queue import ClassificationQueue
+from core.classification_jobs import ClassificationJobManager
+from core.clipboard_formats import copy_image
+from core.thumbnails import ThumbnailService
+from core.settings import SettingsStore
+from core.retention import RetentionManager
+from core.transfer import NDJSONImporter, iter_export_chunks
 from api.models import *
 
 logger = logging.getLogger(__name__)
 
+BLOB_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+# blob以内容哈希寻址，同一地址的内容永远不变
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier, 
-               clipboard_monitor: ClipboardMonitor) -> FastAPI:
+               clipboard_monitor: ClipboardMonitor, settings: SettingsStore,
+               retention: RetentionManager,
+               classification_queue: ClassificationQueue,
+               thumbnails: ThumbnailService) -> FastAPI:
     
     app = FastAPI(title="XenonClip API", version="1.0.0")
+    classification_jobs = ClassificationJobManager(db_manager, ai_classifier)
     
     # 获取静态文件路径
     static_path = os.path.join(os.path.dirname(__file__), '..', 'static')
@@ -29,8 +46,17 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
             if not category:
                 raise HTTPException(status_code=400, detail="分类不能为空")
 
+            item = db_manager.get_item(item_id)
+            if not item:
+                raise HTTPException(status_code=404, detail="条目不存在")
+
             db_manager.update_item_category(item_id, category)
+            # 用户修正作为本地模型的训练样本
+            if category != item['category']:
+                await run_in_threadpool(ai_classifier.learn_correction, item['content'], category)
             return {"success": True, "message": "分类已更新"}
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"更新分类失败: {e}")
             raise HTTPException(status_code=500, detail="更新分类失败")
@@ -40,28 +66,49 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
         return FileResponse(index_path)
     
     @app.get("/api/items")
-    async def get_items(limit: int = 100, category: Optional[str] = None, 
-                       search: Optional[str] = None):
-        """获取剪贴板条目"""
+    async def get_items(limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                       category: Optional[str] = None,
+                       search: Optional[str] = None, cursor: Optional[str] = None):
+        """获取剪贴板条目（游标分页）"""
         try:
-            items = db_manager.get_clipboard_items(limit, category, search)
-            return {"success": True, "data": items}
+            page = db_manager.get_clipboard_items_page(limit, category, search, cursor)
+            return {"success": True, "data": page['items'], "next_cursor": page['next_cursor']}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.error(f"获取条目失败: {e}")
             raise HTTPException(status_code=500, detail="获取条目失败")
     
+    @app.get("/api/items/{item_id}")
+    async def get_item_detail(item_id: int):
+        """获取条目详情（含完整内容）"""
+        try:
+            item = db_manager.get_item(item_id)
+            if not item:
+                raise HTTPException(status_code=404, detail="条目不存在")
+            return {"success": True, "data": item}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"获取条目详情失败: {e}")
+            raise HTTPException(status_code=500, detail="获取条目详情失败")
+    
     @app.post("/api/items/{item_id}/copy")
     async def copy_item(item_id: int):
         """复制条目到剪贴板"""
         try:
-            items = db_manager.get_clipboard_items(limit=1000)
-            item = next((item for item in items if item['id'] == item_id), None)
+            item = db_manager.get_item(item_id)
             
             if not item:
                 raise HTTPException(status_code=404, detail="条目不存在")
             
-            import pyperclip
-            pyperclip.copy(item['content'])
+            if item.get('content_type') == 'image' and item.get('blob_hash'):
+                blob = await run_in_threadpool(db_manager.get_blob, item['blob_hash'])
+                if not blob or not await run_in_threadpool(copy_image, blob[0]):
+                    raise HTTPException(status_code=500, detail="复制图片失败")
+            else:
+                import pyperclip
+                pyperclip.copy(item['content'])
             
             # 更新访问信息
             content_hash = item.get('content_hash')
@@ -69,10 +116,40 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
                 db_manager.update_content_access(content_hash)
             
             return {"success": True, "message": "已复制到剪贴板"}
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"复制失败: {e}")
             raise HTTPException(status_code=500, detail="复制失败")
     
+    def cached_response(request: Request, etag: str, load) -> Response:
+        """
+        内容寻址数据的响应：带长期缓存头和ETag，If-None-Match命中时直接返回304，不读取数据
+        load 返回 (data, mime) 或 None
+        """
+        headers = {"Cache-Control": BLOB_CACHE_CONTROL, "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        blob = load()
+        if not blob:
+            raise HTTPException(status_code=404, detail="内容不存在")
+        data, mime = blob
+        return Response(content=data, media_type=mime, headers=headers)
+    
+    @app.get("/api/blobs/{blob_hash}")
+    def get_blob(blob_hash: str, request: Request):
+        """按内容哈希获取图片、HTML等富格式数据"""
+        if not BLOB_HASH_RE.match(blob_hash):
+            raise HTTPException(status_code=404, detail="内容不存在")
+        return cached_response(request, f'"{blob_hash}"', lambda: db_manager.get_blob(blob_hash))
+    
+    @app.get("/api/blobs/{blob_hash}/thumbnail")
+    def get_thumbnail(blob_hash: str, request: Request):
+        """获取图片缩略图，尚未生成时在缩略图线程池中生成并等待"""
+        if not BLOB_HASH_RE.match(blob_hash):
+            raise HTTPException(status_code=404, detail="内容不存在")
+        return cached_response(request, f'"{blob_hash}-thumb"', lambda: thumbnails.get(blob_hash))
+    
     @app.put("/api/items/{item_id}/category")
     async def update_category(item_id: int, request: dict):
         """更新条目分类"""
@@ -81,8 +158,17 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
             if not category:
                 raise HTTPException(status_code=400, detail="分类不能为空")
             
+            item = db_manager.get_item(item_id)
+            if not item:
+                raise HTTPException(status_code=404, detail="条目不存在")
+            
             db_manager.update_item_category(item_id, category)
+            # 用户修正作为本地模型的训练样本
+            if category != item['category']:
+                await run_in_threadpool(ai_classifier.learn_correction, item['content'], category)
             return {"success": True, "message": "分类已更新"}
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"更新分类失败: {e}")
             raise HTTPException(status_code=500, detail="更新分类失败")
@@ -91,8 +177,13 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
     async def toggle_favorite(item_id: int):
         """切换收藏状态"""
         try:
+            if not db_manager.get_item(item_id):
+                raise HTTPException(status_code=404, detail="条目不存在")
+            
             new_status = db_manager.toggle_favorite(item_id)
             return {"success": True, "is_favorite": new_status}
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"切换收藏失败: {e}")
             raise HTTPException(status_code=500, detail="切换收藏失败")
@@ -125,34 +216,79 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
             if not name:
                 raise HTTPException(status_code=400, detail="分类名称不能为空")
             
-            db_manager.add_category_if_not_exists(name)
-            return {"success": True, "message": "分类已创建"}
+            ai_classifier.add_category(name)
+            return {"success": True, "message": "分类已创建", "version": ai_classifier.categories.version}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"创建分类失败: {e}")
             raise HTTPException(status_code=500, detail="创建分类失败")
     
+    @app.put("/api/categories/{name}")
+    async def rename_category(name: str, request: dict):
+        """重命名分类，新名称已存在时合并"""
+        try:
+            new_name = request.get('name')
+            if not new_name:
+                raise HTTPException(status_code=400, detail="分类名称不能为空")
+            if name not in ai_classifier.categories:
+                raise HTTPException(status_code=404, detail="分类不存在")
+            
+            if not await run_in_threadpool(ai_classifier.rename_category, name, new_name):
+                raise HTTPException(status_code=500, detail="重命名分类失败")
+            return {"success": True, "message": "分类已重命名", "version": ai_classifier.categories.version}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"重命名分类失败: {e}")
+            raise HTTPException(status_code=500, detail="重命名分类失败")
+    
     @app.get("/api/stats")
     async def get_stats():
         """获取统计信息"""
         try:
             stats = ai_classifier.get_classification_stats()
-            return {"success": True, "data": stats}
+            return {
+                "success": True,
+                "data": stats,
+                "retention": retention.get_report(),
+                "classification_cache": ai_classifier.get_cache_stats(),
+                "local_model": ai_classifier.get_local_model_stats(),
+                "backend": ai_classifier.get_backend_stats(),
+                "classification_queue": classification_queue.get_stats(),
+                "clipboard": clipboard_monitor.get_stats()
+            }
         except Exception as e:
             logger.error(f"获取统计失败: {e}")
             raise HTTPException(status_code=500, detail="获取统计失败")
     
+    @app.post("/api/maintenance/vacuum")
+    async def vacuum_database():
+        """把旧数据库切换为增量回收模式并回收空闲页；切换需要完整VACUUM，期间暂停写入"""
+        logger.warning("收到数据库维护请求，切换增量回收模式期间剪贴板写入将暂停")
+        if not await run_in_threadpool(db_manager.enable_incremental_vacuum):
+            raise HTTPException(status_code=500, detail="切换增量回收模式失败")
+        reclaimed = await run_in_threadpool(db_manager.incremental_vacuum)
+        return {
+            "success": True,
+            "message": "数据库已处于增量回收模式",
+            "reclaimed_bytes": reclaimed,
+        }
+    
+    @app.get("/api/classify/queue")
+    async def get_classification_queue():
+        """获取后台分类队列状态"""
+        return {"success": True, "data": classification_queue.get_stats()}
+    
     @app.get("/api/settings")
     async def get_settings():
         """获取设置"""
         try:
-            settings = {
-                "auto_classify": db_manager.get_setting("auto_classify", True),
-                "classify_schedule": db_manager.get_setting("classify_schedule", "immediate"),
-                "classify_time": db_manager.get_setting("classify_time", "09:00"),
-                "retention_days": db_manager.get_setting("retention_days", 30),
-                "enable_sensitive_detection": db_manager.get_setting("enable_sensitive_detection", True)
-            }
-            return {"success": True, "data": settings}
+            return {"success": True, "data": settings.snapshot()}
         except Exception as e:
             logger.error(f"获取设置失败: {e}")
             raise HTTPException(status_code=500, detail="获取设置失败")
@@ -161,38 +297,72 @@ def create_app(db_manager: DatabaseManager, ai_classifier: AIClassifier,
     async def update_settings(request: dict):
         """更新设置"""
         try:
-            for key, value in request.items():
-                if value is not None:
-                    db_manager.set_setting(key, value)
-            
-            # 更新剪贴板监听器设置
-            if 'auto_classify' in request:
-                clipboard_monitor.set_auto_classify(request['auto_classify'])
-            
+            # 一次事务写入，订阅了设置的组件会收到变更通知
+            settings.update({key: value for key, value in request.items() if value is not None})
             return {"success": True, "message": "设置已更新"}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.error(f"更新设置失败: {e}")
             raise HTTPException(status_code=500, detail="更新设置失败")
     
-    @app.post("/api/classify/manual")
-    async def manual_classify():
-        """手动分类入口点 - 现在仅返回成功，实际分类由前端完成"""
-        return {"success": True, "message": "请选择要应用的分类"}
+    @app.get("/api/export")
+    async def export_items():
+        """以NDJSON流式导出全部剪贴板历史"""
+        return StreamingResponse(
+            iter_export_chunks(db_manager),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=xenon_clip_export.ndjson"}
+        )
     
-    async def run_manual_classification():
-        """运行手动分类任务"""
+    @app.post("/api/import")
+    async def import_items(request: Request):
+        """流式导入NDJSON，按content_hash去重"""
         try:
-            # 获取未分类的条目
-            items = db_manager.get_clipboard_items(limit=1000)
-            unclassified_items = [item for item in items if item['category'] == '未分类']
-            
-            for item in unclassified_items:
-                if not item['is_sensitive']:
-                    category, confidence = ai_classifier.classify_content(item['content'])
-                    db_manager.update_item_category(item['id'], category)
-            
-            logger.info(f"手动分类完成，处理了 {len(unclassified_items)} 个条目")
+            importer = NDJSONImporter(db_manager)
+            async for chunk in request.stream():
+                # 解码和JSON解析在线程池中进行，不阻塞事件循环
+                if await run_in_threadpool(importer.feed, chunk):
+                    await run_in_threadpool(importer.flush)
+            result = await run_in_threadpool(importer.finish)
+            return {"success": True, "data": result}
         except Exception as e:
-            logger.error(f"手动分类任务失败: {e}")
+            logger.error(f"导入失败: {e}")
+            raise HTTPException(status_code=500, detail="导入失败")
+    
+    @app.post("/api/classify/jobs")
+    async def create_classification_job(request: ClassifyJobRequest):
+        """创建批量补分类任务，处理现有的未分类条目"""
+        try:
+            job = await run_in_threadpool(classification_jobs.submit, request.limit, request.batch_size)
+            return {"success": True, "data": job}
+        except Exception as e:
+            logger.error(f"创建补分类任务失败: {e}")
+            raise HTTPException(status_code=500, detail="创建补分类任务失败")
+    
+    @app.get("/api/classify/jobs")
+    async def list_classification_jobs():
+        """获取最近的补分类任务"""
+        return {"success": True, "data": classification_jobs.list_jobs()}
+    
+    @app.get("/api/classify/jobs/{job_id}")
+    async def get_classification_job(job_id: str):
+        """获取补分类任务进度"""
+        job = classification_jobs.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        return {"success": True, "data": job}
+    
+    @app.delete("/api/classify/jobs/{job_id}")
+    async def cancel_classification_job(job_id: str):
+        """取消补分类任务，已完成的批次不回滚"""
+        if not classification_jobs.cancel(job_id):
+            raise HTTPException(status_code=404, detail="任务不存在或已结束")
+        return {"success": True, "message": "任务已取消"}
+    
+    @app.post("/api/classify/manual")
+    async def manual_classify():
+        """手动分类入口点，使用默认参数创建补分类任务"""
+        return await create_classification_job(ClassifyJobRequest())
     
     return app
\ No newline at end of file
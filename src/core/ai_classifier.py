@@ -1,17 +1,35 @@
 # src/core/ai_classifier.py
 import json
 import logging
+import re
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from .ollama_manager import OllamaManager
+from .backend import ClassifierBackend
 from .database import DatabaseManager
+from .rule_classifier import RuleClassifier, RULE_CONFIDENCE_THRESHOLD
+from .classification_cache import ClassificationCache
+from .local_model import LocalClassifier, LOCAL_CONFIDENCE_THRESHOLD
+from .category_registry import CategoryRegistry
+from .content_digest import build_digest
 
 logger = logging.getLogger(__name__)
 
+CLASSIFY_MAX_TOKENS = 48     # 单条分类的生成token上限
+# 一行完整的 "分类|置信度"，之后还有输出（换行等）说明置信度已生成完
+RESULT_LINE_RE = re.compile(r'^\s*(NEW_CATEGORY:)?[^|\n]+\|\s*[01](?:\.\d+)?\s*(?:\n|$)', re.M)
+CLASSIFY_TOKEN_BUDGET = 160  # 单条分类时内容摘要的token预算
+BATCH_ITEM_TOKENS = 60       # 批量分类时每条内容摘要的token预算
+BATCH_TOKENS_PER_ITEM = 24   # 批量分类时每条结果预留的生成token数
+BATCH_LINE_RE = re.compile(r'^\s*["\'\[]?(\d+)["\'\]]?\s*[.:：、)-]?\s*(.+?)\s*$')
+
 class AIClassifier:
-    def __init__(self, ollama_manager: OllamaManager, db_manager: DatabaseManager):
-        self.ollama = ollama_manager
+    def __init__(self, backend: ClassifierBackend, db_manager: DatabaseManager):
+        self.backend = backend
         self.db = db_manager
+        self.rules = RuleClassifier()
+        self.cache = ClassificationCache(db_manager)
+        self.local_model = LocalClassifier(db_manager)
+        self.categories = CategoryRegistry(db_manager)
         
         # 预设分类
         self.default_categories = [
@@ -32,48 +50,214 @@ class AIClassifier:
     def _initialize_categories(self):
         """初始化默认分类"""
         for category in self.default_categories:
-            self.db.add_category_if_not_exists(category)
+            self.categories.add(category)
     
     def classify_content(self, content: str) -> Tuple[str, float]:
         """
         分类剪贴板内容
         返回: (分类名称, 置信度)
         """
-        # 获取当前所有分类
-        categories = self.db.get_all_categories()
-        category_list = [cat['name'] for cat in categories]
+        # 特征明确的内容直接由规则分类，不调用模型
+        rule_result = self.rules.classify(content)
+        if rule_result and rule_result[1] >= RULE_CONFIDENCE_THRESHOLD:
+            return rule_result
+        
+        # 根据用户修正训练的本地模型足够确定时不调用大模型
+        local_result = self.local_model.predict(content, self.categories)
+        if local_result and local_result[1] >= LOCAL_CONFIDENCE_THRESHOLD:
+            return local_result
+        
+        # 相同内容在相同分类集合下直接复用之前的模型结果
+        fingerprint = self.cache.fingerprint(content)
+        version = self.categories.signature
+        cached = self.cache.get(fingerprint, version)
+        if cached:
+            return cached
         
         # 构建分类提示
-        prompt = self._build_classification_prompt(content, category_list)
+        prompt = self._build_classification_prompt(content)
         
         # 调用AI模型
-        response = self.ollama.generate_response(prompt)
+        response = self.backend.generate(
+            prompt,
+            max_tokens=CLASSIFY_MAX_TOKENS,
+            stop_when=self._has_result_line
+        )
         
         if not response:
             return "文本内容", 0.5  # 默认分类
         
         # 解析响应
-        category, confidence = self._parse_classification_response(response, category_list)
+        category, confidence = self._parse_classification_response(response)
         
         # 如果是新分类建议，则创建新分类
-        if category.startswith("NEW_CATEGORY:"):
-            new_category = category.replace("NEW_CATEGORY:", "").strip()
-            if new_category and len(new_category) <= 20:  # 限制分类名长度
-                self.db.add_category_if_not_exists(new_category)
-                logger.info(f"创建新分类: {new_category}")
-                return new_category, confidence
-            else:
-                return "文本内容", 0.5
+        category = self._resolve_category(category)
+        if category is None:
+            return "文本内容", 0.5
         
+        self.cache.put(fingerprint, self.categories.signature, category, confidence)
         return category, confidence
     
-    def _build_classification_prompt(self, content: str, categories: List[str]) -> str:
+    @staticmethod
+    def _has_result_line(text: str) -> bool:
+        """流式输出中已出现以换行结束的 "分类|置信度" 行"""
+        return any(match.group(0).endswith('\n') for match in RESULT_LINE_RE.finditer(text))
+    
+    @staticmethod
+    def _has_complete_json(text: str) -> bool:
+        """流式输出中已出现完整的JSON对象"""
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end < start:
+            return False
+        try:
+            json.loads(text[start:end + 1])
+            return True
+        except json.JSONDecodeError:
+            return False
+    
+    def _resolve_category(self, category: str) -> Optional[str]:
+        """
+        处理模型返回的新分类建议，必要时新建分类
+        返回: 分类名称；新分类名无效时返回None
+        """
+        if not category.startswith("NEW_CATEGORY:"):
+            return category
+        
+        new_category = category.replace("NEW_CATEGORY:", "").strip()
+        try:
+            self.categories.add(new_category)
+        except ValueError:
+            return None
+        return new_category
+    
+    def classify_batch(self, items: Dict[int, str],
+                       stats: Optional[Dict[str, int]] = None) -> Dict[int, Tuple[str, float]]:
+        """
+        一次模型调用分类多条内容
+        items: {条目ID: 内容}
+        stats: 不为空时累加本次实际发生的模型调用次数（model_calls），全部由规则、本地模型或缓存命中时不计
+        返回: {条目ID: (分类名称, 置信度)}，模型未给出有效结果的条目不在返回值中
+        """
+        results: Dict[int, Tuple[str, float]] = {}
+        pending: Dict[int, str] = {}
+        
+        version = self.categories.signature
+        
+        # 规则和缓存能命中的条目不进入提示词
+        for item_id, content in items.items():
+            rule_result = self.rules.classify(content)
+            if rule_result and rule_result[1] >= RULE_CONFIDENCE_THRESHOLD:
+                results[item_id] = rule_result
+                continue
+            local_result = self.local_model.predict(content, self.categories)
+            if local_result and local_result[1] >= LOCAL_CONFIDENCE_THRESHOLD:
+                results[item_id] = local_result
+                continue
+            cached = self.cache.get(self.cache.fingerprint(content), version)
+            if cached:
+                results[item_id] = cached
+                continue
+            pending[item_id] = content
+        
+        if not pending:
+            return results
+        
+        # 提示词中使用从1开始的短序号，减少token
+        numbered = list(pending.items())
+        prompt = self._build_batch_prompt([content for _, content in numbered])
+        if stats is not None:
+            stats['model_calls'] = stats.get('model_calls', 0) + 1
+        response = self.backend.generate(
+            prompt,
+            max_tokens=BATCH_TOKENS_PER_ITEM * len(numbered) + 32,
+            timeout=30 + 5 * len(numbered),
+            stop_when=self._has_complete_json
+        )
+        if not response:
+            return results
+        
+        parsed = self._parse_batch_response(response, len(numbered))
+        for index, raw in parsed.items():
+            item_id, content = numbered[index - 1]
+            category, confidence = self._parse_classification_response(raw)
+            category = self._resolve_category(category)
+            if category is None:
+                continue
+            results[item_id] = (category, confidence)
+            self.cache.put(self.cache.fingerprint(content), self.categories.signature,
+                           category, confidence)
+        
+        return results
+    
+    def _build_batch_prompt(self, contents: List[str]) -> str:
+        """构建批量分类提示词，要求按序号返回JSON对象"""
+        categories_str = self.categories.prompt_inline()
+        blocks = []
+        for index, content in enumerate(contents, 1):
+            blocks.append(f"[{index}]\n{build_digest(content, BATCH_ITEM_TOKENS)}")
+        items_str = "\n\n".join(blocks)
+        
+        prompt = f"""请对以下 {len(contents)} 条内容分别分类。
+
+可选分类：{categories_str}
+
+待分类内容：
+{items_str}
+
+请只回复一个JSON对象，键为内容序号，值为"分类名称|置信度(0.0-1.0)"。
+如果需要新分类，值为"NEW_CATEGORY:新分类名称|置信度"。
+
+示例：
+{{"1": "代码片段|0.9", "2": "NEW_CATEGORY:学习笔记|0.8"}}
+
+请只回复JSON，不要解释："""
+        
+        return prompt
+    
+    def _parse_batch_response(self, response: str, count: int) -> Dict[int, str]:
+        """
+        解析批量分类响应，优先按JSON解析，失败时逐行按"序号. 分类|置信度"解析
+        返回: {序号: "分类|置信度"}，只包含1..count范围内的序号
+        """
+        parsed: Dict[int, str] = {}
+        
+        start, end = response.find('{'), response.rfind('}')
+        if start != -1 and end > start:
+            try:
+                data = json.loads(response[start:end + 1])
+                if isinstance(data, dict):
+                    for key, value in data.items():
+                        try:
+                            index = int(str(key).strip().strip('[]'))
+                        except ValueError:
+                            continue
+                        if isinstance(value, dict):
+                            value = f"{value.get('category', '')}|{value.get('confidence', 0.5)}"
+                        if 1 <= index <= count and isinstance(value, str) and value.strip():
+                            parsed[index] = value
+            except json.JSONDecodeError:
+                pass
+        
+        if not parsed:
+            for line in response.splitlines():
+                match = BATCH_LINE_RE.match(line.strip().lstrip('{'))
+                if not match:
+                    continue
+                index = int(match.group(1))
+                value = match.group(2).strip(' "\',{}')
+                if 1 <= index <= count and value:
+                    parsed.setdefault(index, value)
+        
+        if len(parsed) < count:
+            logger.warning(f"批量分类响应缺少 {count - len(parsed)} 条结果")
+        return parsed
+    
+    def _build_classification_prompt(self, content: str) -> str:
         """构建分类提示词"""
-        # 限制内容长度，避免token超限
-        if len(content) > 500:
-            content = content[:500] + "..."
+        # 长内容转为token预算内的摘要（结构特征 + 首尾片段）
+        content = build_digest(content, CLASSIFY_TOKEN_BUDGET)
         
-        categories_str = "\n".join([f"{i+1}. {cat}" for i, cat in enumerate(categories)])
+        categories_str = self.categories.prompt_list()
         
         prompt = f"""请对以下内容进行分类。
 
@@ -96,7 +280,7 @@ NEW_CATEGORY:学习笔记|0.8
 
         return prompt
     
-    def _parse_classification_response(self, response: str, categories: List[str]) -> Tuple[str, float]:
+    def _parse_classification_response(self, response: str) -> Tuple[str, float]:
         """解析AI响应"""
         try:
             # 清理响应
@@ -117,9 +301,8 @@ NEW_CATEGORY:学习笔记|0.8
             
             # 验证分类是否存在（除非是新分类）
             if not category.startswith("NEW_CATEGORY:"):
-                if category not in categories:
-                    # 尝试模糊匹配
-                    category = self._fuzzy_match_category(category, categories)
+                # 通过注册表的索引匹配，无法匹配时归入默认分类
+                category = self.categories.match(category) or "文本内容"
             
             return category, confidence
             
@@ -127,41 +310,42 @@ NEW_CATEGORY:学习笔记|0.8
             logger.error(f"解析分类响应失败: {e}, 响应: {response}")
             return "文本内容", 0.5
     
-    def _fuzzy_match_category(self, input_category: str, categories: List[str]) -> str:
-        """模糊匹配分类"""
-        input_lower = input_category.lower()
-        
-        # 精确匹配
-        for cat in categories:
-            if cat.lower() == input_lower:
-                return cat
-        
-        # 包含匹配
-        for cat in categories:
-            if input_lower in cat.lower() or cat.lower() in input_lower:
-                return cat
-        
-        # 关键词匹配
-        keyword_mapping = {
-            "url": "网址链接",
-            "link": "网址链接", 
-            "code": "代码片段",
-            "email": "邮箱地址",
-            "mail": "邮箱地址",
-            "password": "密码凭据",
-            "pwd": "密码凭据",
-            "number": "数字信息",
-            "phone": "数字信息",
-            "file": "图片路径",
-            "path": "图片路径"
-        }
-        
-        for keyword, category in keyword_mapping.items():
-            if keyword in input_lower and category in categories:
-                return category
-        
-        return "文本内容"  # 默认分类
-    
     def get_classification_stats(self) -> Dict:
         """获取分类统计信息"""
-        return self.db.get_classification_stats()
\ No newline at end of file
+        return self.db.get_classification_stats()
+    
+    def learn_correction(self, content: str, category: str):
+        """
+        用户手动修改分类时调用：作为本地模型的训练样本，
+        并覆盖该内容的分类缓存
+        """
+        try:
+            self.local_model.learn(content, category)
+            self.cache.put(self.cache.fingerprint(content), self.categories.signature, category, 1.0)
+        except Exception as e:
+            logger.error(f"学习用户分类失败: {e}")
+    
+    def add_category(self, name: str) -> bool:
+        """新建分类，返回是否新建；名称无效时抛出ValueError"""
+        return self.categories.add(name)
+    
+    def rename_category(self, old: str, new: str) -> bool:
+        """重命名分类，条目和本地模型样本随之迁移"""
+        if not self.categories.rename(old, new):
+            return False
+        self.local_model.rename_category(old, new)
+        self.cache.clear_memory()
+        return True
+    
+    def get_local_model_stats(self) -> Dict:
+        """获取本地分类模型统计"""
+        return self.local_model.get_stats()
+    
+    def get_cache_stats(self) -> Dict:
+        """获取分类缓存命中统计"""
+        return self.cache.get_stats()
+    
+    def get_backend_stats(self) -> Dict:
+        """获取生成后端的统计，后端未提供时返回空字典"""
+        get_stats = getattr(self.backend, 'get_stats', None)
+        return get_stats() if get_stats else {}
\ No newline at end of file
@@ -0,0 +1,33 @@
+# src/core/backend.py
+from typing import Callable, List, Optional
+
+try:
+    from typing import Protocol, runtime_checkable
+except ImportError:  # Python < 3.8
+    from typing_extensions import Protocol, runtime_checkable
+
+StopCondition = Callable[[str], bool]
+
+@runtime_checkable
+class ClassifierBackend(Protocol):
+    """
+    分类器使用的生成模型后端
+    OllamaManager 是默认实现；core.mock_backend 提供离线测试和基准测试用的替身
+    """
+
+    def generate(self, prompt: str, max_tokens: int = 100, timeout: float = 30,
+                 stop_when: Optional[StopCondition] = None) -> Optional[str]:
+        """
+        生成一次响应，失败返回None
+        stop_when 对已生成的文本返回True时可以提前结束生成
+        """
+        ...
+
+    def generate_batch(self, prompts: List[str], max_tokens: int = 100, timeout: float = 30,
+                       stop_when: Optional[StopCondition] = None) -> List[Optional[str]]:
+        """并发生成多条响应，结果与 prompts 顺序一致"""
+        ...
+
+    def health(self) -> bool:
+        """后端是否可用"""
+        ...
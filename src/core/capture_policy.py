@@ -0,0 +1,133 @@
+# src/core/capture_policy.py
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .content_signature import HASH_CHUNK_CHARS, hash_text, quick_signature
+
+logger = logging.getLogger(__name__)
+
+# 超限内容的处理方式
+OVERSIZE_POLICIES = ("truncate", "spill", "skip")
+
+# 溢出到磁盘时数据库中保留的预览长度（字符）
+SPILL_PREVIEW_CHARS = 2000
+
+MARKER_PREFIX = "[XenonClip"
+
+# UTF-8中每个字符最多4字节
+MAX_UTF8_BYTES_PER_CHAR = 4
+
+def utf8_size(text: str) -> int:
+    """按块计算文本的UTF-8编码长度，不生成完整的字节副本"""
+    return sum(len(text[start:start + HASH_CHUNK_CHARS].encode('utf-8', 'surrogatepass'))
+               for start in range(0, len(text), HASH_CHUNK_CHARS))
+
+def utf8_prefix(text: str, max_bytes: int) -> str:
+    """UTF-8编码不超过max_bytes的最长前缀，不会截断在多字节字符中间"""
+    # 每个字符至少1字节，只需编码前max_bytes个字符
+    data = text[:max_bytes].encode('utf-8', 'surrogatepass')[:max_bytes]
+    return data.decode('utf-8', 'ignore')
+
+@dataclass
+class CaptureResult:
+    """实际写入历史的内容及其哈希；oversize_action 为空表示未超限，original_size 只在超限时计算"""
+    content: str
+    content_hash: str
+    original_size: Optional[int] = None
+    oversize_action: Optional[str] = None
+    spill_path: Optional[str] = None
+
+class CapturePolicy:
+    """
+    剪贴板内容的捕获大小上限
+    超过上限的内容按策略截断、溢出到磁盘或跳过，并在保存的内容中留下标记。
+    文本和二进制数据统一按UTF-8字节数计算；字符数乘以4仍不超过上限的文本无需编码即可放行
+    """
+
+    def __init__(self, max_capture_mb: int = 8, policy: str = "truncate",
+                 spill_dir: Optional[str] = None):
+        self.max_bytes = 0
+        self.policy = "truncate"
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.set_max_capture_mb(max_capture_mb)
+        self.set_policy(policy)
+        self.oversize_count = 0
+        self.last_oversize: Optional[dict] = None
+
+    def set_max_capture_mb(self, max_capture_mb: int):
+        """设置捕获上限（MB），0表示不限制"""
+        self.max_bytes = max(0, int(max_capture_mb)) * 1024 * 1024
+
+    def set_policy(self, policy: str):
+        if policy not in OVERSIZE_POLICIES:
+            logger.warning(f"未知的超限处理方式 {policy}，改用 truncate")
+            policy = "truncate"
+        if policy == "spill" and self.spill_dir is None:
+            logger.warning("未配置溢出目录，超限内容改为截断")
+            policy = "truncate"
+        self.policy = policy
+
+    def apply(self, content: str) -> CaptureResult:
+        """按上限处理内容，返回要保存的内容和哈希"""
+        if not self.max_bytes or len(content) * MAX_UTF8_BYTES_PER_CHAR <= self.max_bytes:
+            return CaptureResult(content, hash_text(content))
+        size = utf8_size(content)
+        if size <= self.max_bytes:
+            return CaptureResult(content, hash_text(content))
+
+        action = self.policy
+        spill_path = None
+        if action == "spill":
+            spill_path = self._spill(content)
+            if spill_path is None:
+                action = "truncate"
+
+        if action == "spill":
+            stored = (content[:SPILL_PREVIEW_CHARS] +
+                      f"\n{MARKER_PREFIX}: 内容过大（{size} 字节），完整内容已保存到 {spill_path}]")
+        elif action == "skip":
+            # 只保存标记，用取样签名区分不同的超大内容
+            _, crc = quick_signature(content)
+            stored = f"{MARKER_PREFIX}: 已跳过过大的剪贴板内容（{size} 字节，签名 {crc:08x}）]"
+        else:
+            stored = (utf8_prefix(content, self.max_bytes) +
+                      f"\n{MARKER_PREFIX}: 内容过大，已截断（原始 {size} 字节）]")
+
+        self.oversize_count += 1
+        self.last_oversize = {'action': action, 'size': size, 'spill_path': spill_path}
+        logger.warning(f"剪贴板内容超过捕获上限（{size} > {self.max_bytes} 字节），处理方式: {action}")
+        return CaptureResult(stored, hash_text(stored), size, action, spill_path)
+
+    def allows_bytes(self, size: int) -> bool:
+        """二进制内容（图片、HTML）是否在上限内，超限时只计数，由调用方丢弃数据并保留标记"""
+        if not self.max_bytes or size <= self.max_bytes:
+            return True
+        self.oversize_count += 1
+        self.last_oversize = {'action': 'skip', 'size': size, 'spill_path': None}
+        logger.warning(f"剪贴板二进制内容超过捕获上限（{size} > {self.max_bytes} 字节），不保存数据")
+        return False
+
+    def _spill(self, content: str) -> Optional[str]:
+        """把完整内容写入溢出目录，文件名为内容哈希，失败时返回None"""
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spill_dir / f"{hash_text(content)}.txt"
+            if not path.exists():
+                tmp_path = path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+                tmp_path.replace(path)
+            return str(path)
+        except Exception as e:
+            logger.error(f"写入溢出文件失败: {e}")
+            return None
+
+    def get_stats(self) -> dict:
+        return {
+            'max_capture_bytes': self.max_bytes,
+            'oversize_policy': self.policy,
+            'oversize_count': self.oversize_count,
+            'last_oversize': self.last_oversize,
+        }
@@ -0,0 +1,152 @@
+# src/core/category_registry.py
+import hashlib
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+MAX_CATEGORY_LENGTH = 20
+WORD_RE = re.compile(r'[a-z]+')
+
+# 模型常用的英文或简写分类名 -> 分类
+DEFAULT_ALIASES = {
+    "text": "文本内容",
+    "note": "文本内容",
+    "url": "网址链接",
+    "link": "网址链接",
+    "website": "网址链接",
+    "code": "代码片段",
+    "snippet": "代码片段",
+    "number": "数字信息",
+    "phone": "数字信息",
+    "email": "邮箱地址",
+    "mail": "邮箱地址",
+    "password": "密码凭据",
+    "pwd": "密码凭据",
+    "credential": "密码凭据",
+    "token": "密码凭据",
+    "file": "图片路径",
+    "path": "图片路径",
+    "image": "图片路径",
+    "document": "办公文档",
+    "office": "办公文档",
+    "shopping": "购物信息",
+    "product": "购物信息",
+    "schedule": "日程安排",
+    "calendar": "日程安排",
+    "date": "日程安排",
+}
+
+class CategoryRegistry:
+    """
+    分类的内存注册表
+    启动时从数据库加载一次，新建和重命名时同步更新；维护小写名和别名索引用于匹配模型输出，
+    缓存提示词中的分类列表。分类集合每次变化时 version 加一，signature 为分类集合的哈希，
+    可作为持久化缓存键的一部分
+    """
+
+    def __init__(self, db_manager: DatabaseManager, aliases: Optional[Dict[str, str]] = None):
+        self.db = db_manager
+        self._lock = threading.Lock()
+        self._aliases = {k.lower(): v for k, v in (aliases or DEFAULT_ALIASES).items()}
+        self.version = 0
+        self._rebuild(self.db.get_category_names())
+
+    def _rebuild(self, names: List[str]):
+        # 调用方持有 self._lock 或处于初始化阶段
+        self._names: Tuple[str, ...] = tuple(sorted(set(names)))
+        self._name_set = frozenset(self._names)
+        self._lower = {name.lower(): name for name in self._names}
+        self._alias_index = {alias: name for alias, name in self._aliases.items() if name in self._name_set}
+        self.signature = hashlib.sha1("\n".join(self._names).encode('utf-8')).hexdigest()[:12]
+        self._prompt_list = "\n".join(f"{i + 1}. {name}" for i, name in enumerate(self._names))
+        self._prompt_inline = "、".join(self._names)
+        self.version += 1
+
+    def names(self) -> Tuple[str, ...]:
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._name_set
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def prompt_list(self) -> str:
+        """编号的分类列表，每行一个"""
+        return self._prompt_list
+
+    def prompt_inline(self) -> str:
+        """以顿号分隔的分类列表"""
+        return self._prompt_inline
+
+    def match(self, raw: str) -> Optional[str]:
+        """
+        把模型输出的分类名匹配到已有分类
+        依次尝试：原名、忽略大小写、别名、包含关系；都不匹配时返回None
+        """
+        name = raw.strip().strip('"\'「」【】[]').strip()
+        if name in self._name_set:
+            return name
+        lowered = name.lower()
+        found = self._lower.get(lowered) or self._alias_index.get(lowered)
+        if found:
+            return found
+        for word in WORD_RE.findall(lowered):
+            found = self._alias_index.get(word)
+            if found:
+                return found
+        if lowered:
+            for candidate_lower, candidate in self._lower.items():
+                if lowered in candidate_lower or candidate_lower in lowered:
+                    return candidate
+        return None
+
+    def add(self, name: str) -> bool:
+        """
+        新建分类
+        返回: 是否新建（已存在时返回False）；名称为空或过长时抛出ValueError
+        """
+        name = name.strip()
+        if not name or len(name) > MAX_CATEGORY_LENGTH:
+            raise ValueError(f"分类名称无效: {name!r}")
+        with self._lock:
+            if name in self._name_set:
+                return False
+            self.db.add_category_if_not_exists(name)
+            self._rebuild(list(self._names) + [name])
+        logger.info(f"创建新分类: {name}")
+        return True
+
+    def rename(self, old: str, new: str) -> bool:
+        """
+        重命名分类，条目随之迁移；新名称已存在时两个分类合并
+        返回: 是否成功；名称无效时抛出ValueError
+        """
+        new = new.strip()
+        if not new or len(new) > MAX_CATEGORY_LENGTH:
+            raise ValueError(f"分类名称无效: {new!r}")
+        with self._lock:
+            if old not in self._name_set:
+                return False
+            if old == new:
+                return True
+            if not self.db.rename_category(old, new):
+                return False
+            # 别名跟随分类迁移
+            self._aliases = {alias: (new if name == old else name) for alias, name in self._aliases.items()}
+            self._rebuild([name for name in self._names if name != old] + [new])
+        logger.info(f"分类已重命名: {old} -> {new}")
+        return True
+
+    def reload(self):
+        """从数据库重新加载"""
+        with self._lock:
+            self._rebuild(self.db.get_category_names())
@@ -0,0 +1,102 @@
+# src/core/classification_cache.py
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+class ClassificationCache:
+    """
+    分类结果缓存
+    内存LRU在前，SQLite表持久化在后；键由归一化内容指纹和分类集合版本组成，
+    分类集合变化后旧结果自然失效
+    """
+
+    def __init__(self, db_manager: DatabaseManager, memory_capacity: int = 1024,
+                 max_entries: int = 20000, ttl_days: int = 30, evict_every: int = 200):
+        self.db = db_manager
+        self.memory_capacity = memory_capacity
+        self.max_entries = max_entries          # 持久化缓存最大条数
+        self.ttl_days = ttl_days                # 超过该天数未使用的缓存被清除
+        self.evict_every = evict_every          # 每写入多少次执行一次淘汰
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(content: str) -> str:
+        """归一化后的内容指纹：去除首尾空白、合并连续空白、忽略大小写"""
+        normalized = WHITESPACE_RE.sub(' ', content.strip()).lower()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_key(fingerprint: str, version: str) -> str:
+        return f"{fingerprint}:{version}"
+
+    def get(self, fingerprint: str, version: str) -> Optional[Tuple[str, float]]:
+        key = self.make_key(fingerprint, version)
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return result
+
+        result = self.db.get_cached_classification(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, fingerprint: str, version: str, category: str, confidence: float):
+        key = self.make_key(fingerprint, version)
+        with self._lock:
+            self._remember(key, (category, confidence))
+            self._puts_since_evict += 1
+            evict = self._puts_since_evict >= self.evict_every
+            if evict:
+                self._puts_since_evict = 0
+
+        self.db.put_cached_classification(key, category, confidence)
+        if evict:
+            removed = self.db.evict_classification_cache(self.max_entries, self.ttl_days)
+            if removed:
+                logger.info(f"分类缓存淘汰 {removed} 条")
+
+    def _remember(self, key: str, result: Tuple[str, float]):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_capacity:
+            self._memory.popitem(last=False)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
+        stats['persistent_entries'] = self.db.count_cached_classifications()
+        return stats
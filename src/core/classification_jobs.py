@@ -0,0 +1,201 @@
+# src/core/classification_jobs.py
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .database import DatabaseManager
+from .ai_classifier import AIClassifier
+from .classification_queue import UNCLASSIFIED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_JOB_LIMIT = 1000
+MAX_JOB_LIMIT = 100000
+MAX_JOB_BATCH_SIZE = 64
+MAX_ATTEMPTS = 3
+JOB_HISTORY = 20
+
+class ClassificationJob:
+    """一次批量补分类任务的进度记录"""
+
+    def __init__(self, item_ids: List[int], batch_size: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.item_ids = item_ids
+        self.batch_size = batch_size
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.classified = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retried = 0
+        self.model_calls = 0
+        self.categories: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = len(self.item_ids)
+        processed = self.classified + self.failed + self.skipped
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'total': total,
+            'processed': processed,
+            'classified': self.classified,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'retried': self.retried,
+            'progress': round(processed / total, 3) if total else 1.0,
+            'batch_size': self.batch_size,
+            'model_calls': self.model_calls,
+            'items_per_call': round(self.classified / self.model_calls, 2) if self.model_calls else 0.0,
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+            'categories': dict(self.categories),
+            'created_at': self.created_at,
+        }
+
+class ClassificationJobManager:
+    """
+    批量补分类任务
+    把多条未分类条目打包进一个提示词，模型按序号返回分类；
+    未得到有效结果的条目放回待处理列表，在后续批次中重试，超过次数后记为失败。
+    任务在单个后台线程中依次执行，避免与实时分类队列争抢模型
+    """
+
+    def __init__(self, db_manager: DatabaseManager, ai_classifier: AIClassifier,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS):
+        self.db = db_manager
+        self.ai_classifier = ai_classifier
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+        self._jobs: "OrderedDict[str, ClassificationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[ClassificationJob]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._cancelled = set()
+
+    def submit(self, limit: Optional[int] = None, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """创建补分类任务，返回任务状态"""
+        limit = max(1, min(MAX_JOB_LIMIT, int(limit or DEFAULT_JOB_LIMIT)))
+        batch_size = max(1, min(MAX_JOB_BATCH_SIZE, int(batch_size or self.batch_size)))
+        item_ids = self.db.get_item_ids_by_category(UNCLASSIFIED, limit)
+
+        job = ClassificationJob(item_ids, batch_size)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > JOB_HISTORY:
+                oldest = next(iter(self._jobs))
+                if self._jobs[oldest].status in ('queued', 'running'):
+                    break
+                del self._jobs[oldest]
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run_loop, daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        logger.info(f"创建补分类任务 {job.id}: {len(item_ids)} 条，每批 {batch_size} 条")
+        return job.to_dict()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.status not in ('queued', 'running'):
+                return False
+            self._cancelled.add(job_id)
+            return True
+
+    def stop(self):
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            except Exception as e:
+                logger.error(f"补分类任务 {job.id} 失败: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+                job.finished_at = time.time()
+
+    def _run_job(self, job: ClassificationJob):
+        job.status = 'running'
+        job.started_at = time.time()
+
+        pending: List[int] = list(job.item_ids)
+        attempts: Dict[int, int] = {}
+
+        while pending:
+            if job.id in self._cancelled:
+                job.status = 'cancelled'
+                break
+
+            batch_ids, pending = pending[:job.batch_size], pending[job.batch_size:]
+            items = {
+                item['id']: item for item in self.db.get_items(batch_ids)
+                if item['category'] == UNCLASSIFIED
+            }
+            job.skipped += len(batch_ids) - len(items)
+            if not items:
+                continue
+
+            calls = {'model_calls': 0}
+            try:
+                results = self.ai_classifier.classify_batch(
+                    {item_id: item['content'] for item_id, item in items.items()}, stats=calls
+                )
+            except Exception as e:
+                logger.error(f"批量分类调用失败: {e}")
+                results = {}
+            job.model_calls += calls['model_calls']
+
+            for item_id, item in items.items():
+                result = results.get(item_id)
+                if result:
+                    category, confidence = result
+                    if self.db.update_category_by_hash(item['content_hash'], category, confidence,
+                                                       only_if=UNCLASSIFIED):
+                        job.classified += 1
+                        job.categories[category] = job.categories.get(category, 0) + 1
+                    else:
+                        job.skipped += 1
+                    continue
+
+                # 只重试失败的条目，放回队尾与其他失败条目重新组批
+                attempts[item_id] = attempts.get(item_id, 0) + 1
+                if attempts[item_id] < self.max_attempts:
+                    job.retried += 1
+                    pending.append(item_id)
+                else:
+                    job.failed += 1
+
+        if job.status == 'running':
+            job.status = 'completed'
+        job.finished_at = time.time()
+        self._cancelled.discard(job.id)
+        summary = job.to_dict()
+        logger.info(f"补分类任务 {job.id} {job.status}: 成功 {job.classified}，失败 {job.failed}，"
+                    f"模型调用 {job.model_calls} 次，{summary['items_per_second']} 条/秒")
@@ -0,0 +1,165 @@
+# src/core/classification_queue.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .database import DatabaseManager
+from .ai_classifier import AIClassifier
+from .settings import SettingsStore
+
+logger = logging.getLogger(__name__)
+
+UNCLASSIFIED = "未分类"
+
+class ClassificationQueue:
+    """
+    异步分类队列
+    剪贴板条目先以"未分类"保存，再放入本队列由后台工作线程调用模型分类并回写结果。
+    队列有界，最新复制的内容优先处理；队列满时丢弃最旧的待分类条目（保持未分类，可稍后补分类）
+    """
+
+    def __init__(self, db_manager: DatabaseManager, ai_classifier: AIClassifier,
+                 settings: Optional[SettingsStore] = None, workers: int = 2, max_size: int = 1000):
+        self.db = db_manager
+        self.ai_classifier = ai_classifier
+        self.max_size = max_size
+        self.on_classified: Optional[Callable[[Dict[str, Any]], None]] = None
+
+        # content_hash -> 待分类内容；末尾为最新入队，出队从末尾取
+        self._pending: "OrderedDict[str, str]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._target_workers = max(1, int(workers))
+        self._in_flight = 0
+        self.running = False
+
+        self._stats = {'enqueued': 0, 'classified': 0, 'failed': 0, 'dropped': 0, 'busy_seconds': 0.0}
+
+        if settings:
+            settings.subscribe('classify_workers', self.set_workers)
+
+    def start(self):
+        """启动工作线程"""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._spawn_workers()
+        logger.info(f"分类队列已启动，工作线程 {self._target_workers} 个")
+
+    def stop(self, timeout: float = 5):
+        """停止工作线程，未处理的条目保持未分类"""
+        with self._cond:
+            self.running = False
+            threads = list(self._threads)
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        logger.info("分类队列已停止")
+
+    def set_workers(self, count: int):
+        """调整并发数，多余的工作线程处理完当前条目后退出"""
+        with self._cond:
+            self._target_workers = max(1, int(count))
+            if self.running:
+                self._spawn_workers()
+            self._cond.notify_all()
+
+    def _spawn_workers(self):
+        # 调用方持有 self._cond
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self._target_workers:
+            thread = threading.Thread(target=self._worker_loop, daemon=True,
+                                      name=f"classifier-{len(self._threads)}")
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, content_hash: str, content: str) -> bool:
+        """
+        放入待分类条目，不阻塞调用方
+        返回: 是否入队（重复的条目会被提到最前）
+        """
+        with self._cond:
+            if content_hash in self._pending:
+                self._pending.move_to_end(content_hash)
+                return True
+            self._pending[content_hash] = content
+            self._stats['enqueued'] += 1
+            while len(self._pending) > self.max_size:
+                dropped, _ = self._pending.popitem(last=False)
+                self._stats['dropped'] += 1
+                logger.warning(f"分类队列已满，丢弃最旧条目: {dropped[:12]}")
+            self._cond.notify()
+        return True
+
+    def _should_exit(self) -> bool:
+        # 调用方持有 self._cond
+        if not self.running:
+            return True
+        alive = [t for t in self._threads if t.is_alive()]
+        if len(alive) > self._target_workers:
+            self._threads.remove(threading.current_thread())
+            return True
+        return False
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._should_exit():
+                    self._cond.wait()
+                if self._should_exit():
+                    return
+                content_hash, content = self._pending.popitem(last=True)
+                self._in_flight += 1
+
+            started = time.monotonic()
+            try:
+                self._classify(content_hash, content)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._stats['busy_seconds'] += time.monotonic() - started
+
+    def _classify(self, content_hash: str, content: str):
+        try:
+            category, confidence = self.ai_classifier.classify_content(content)
+        except Exception as e:
+            logger.error(f"AI分类失败: {e}")
+            with self._cond:
+                self._stats['failed'] += 1
+            return
+
+        updated = self.db.update_category_by_hash(content_hash, category, confidence,
+                                                  only_if=UNCLASSIFIED)
+        with self._cond:
+            self._stats['classified'] += 1
+        logger.info(f"后台分类完成: {category} (置信度: {confidence:.2f})")
+
+        if updated and self.on_classified:
+            try:
+                self.on_classified({'content_hash': content_hash, 'category': category,
+                                    'confidence': confidence})
+            except Exception as e:
+                logger.error(f"分类回调失败: {e}")
+
+    def depth(self) -> int:
+        """当前排队等待的条目数"""
+        with self._cond:
+            return len(self._pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            done = self._stats['classified'] + self._stats['failed']
+            return {
+                **self._stats,
+                'busy_seconds': round(self._stats['busy_seconds'], 3),
+                'avg_seconds': round(self._stats['busy_seconds'] / done, 3) if done else 0.0,
+                'depth': len(self._pending),
+                'in_flight': self._in_flight,
+                'workers': self._target_workers,
+                'max_size': self.max_size,
+                'running': self.running,
+            }
@@ -0,0 +1,268 @@
+# src/core/clipboard_formats.py
+import io
+import logging
+import os
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+# 文本之外可捕获的格式
+RICH_FORMATS = ("files", "image", "html")
+
+# 各格式在Linux剪贴板中的MIME类型
+_FILE_TARGETS = ("text/uri-list", "x-special/gnome-copied-files")
+_HTML_TARGET = "text/html"
+
+_TOOL_TIMEOUT = 2.0
+
+@dataclass
+class ClipboardPayload:
+    """
+    一次富格式剪贴板内容
+    text 写入条目的content（图片描述、HTML的纯文本、文件路径列表），
+    data 为需要按内容哈希单独存放的二进制数据。
+    content_type 为 text 时条目仍是文本，data 是随文本一起复制的图片
+    """
+    content_type: str
+    text: str
+    data: Optional[bytes] = None
+    mime: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+class _TextExtractor(HTMLParser):
+    """提取HTML中的可见文本，块级元素之间换行"""
+
+    _BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "table"}
+    _SKIP_TAGS = {"script", "style", "head", "title"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip += 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(html: str) -> str:
+    """把HTML片段转换为纯文本"""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"解析HTML失败: {e}")
+    lines = [" ".join(line.split()) for line in "".join(parser.parts).splitlines()]
+    return "\n".join(line for line in lines if line)
+
+def describe_image(width: int, height: int, size: int) -> str:
+    """图片条目的文本描述，用于列表、检索和导出"""
+    return f"[图片] {width}×{height} PNG, {size // 1024} KB"
+
+def _linux_tool() -> Optional[str]:
+    if os.environ.get("WAYLAND_DISPLAY") and shutil.which("wl-paste"):
+        return "wl-paste"
+    if os.environ.get("DISPLAY") and shutil.which("xclip"):
+        return "xclip"
+    return None
+
+def _linux_read(target: Optional[str]) -> Optional[bytes]:
+    """用wl-paste或xclip读取指定类型的内容，target为None时列出可用类型"""
+    tool = _linux_tool()
+    if tool is None:
+        return None
+    if tool == "wl-paste":
+        args = ["wl-paste", "--no-newline"] + (["--type", target] if target else ["--list-types"])
+    else:
+        args = ["xclip", "-selection", "clipboard", "-o", "-t", target or "TARGETS"]
+    try:
+        result = subprocess.run(args, capture_output=True, timeout=_TOOL_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"读取剪贴板类型 {target} 失败: {e}")
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+def _windows_html_format() -> int:
+    import win32clipboard
+    return win32clipboard.RegisterClipboardFormat("HTML Format")
+
+def available_formats() -> Set[str]:
+    """当前剪贴板中可捕获的富格式，读取失败时返回空集合"""
+    formats: Set[str] = set()
+    try:
+        if sys.platform == "win32":
+            import win32clipboard
+            import win32con
+            win32clipboard.OpenClipboard()
+            try:
+                if win32clipboard.IsClipboardFormatAvailable(win32con.CF_HDROP):
+                    formats.add("files")
+                if win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
+                    formats.add("image")
+                if win32clipboard.IsClipboardFormatAvailable(_windows_html_format()):
+                    formats.add("html")
+            finally:
+                win32clipboard.CloseClipboard()
+        elif sys.platform.startswith("linux"):
+            listing = _linux_read(None)
+            if listing:
+                targets = set(listing.decode("utf-8", "replace").split())
+                if targets.intersection(_FILE_TARGETS):
+                    formats.add("files")
+                if any(t.startswith("image/") for t in targets):
+                    formats.add("image")
+                if _HTML_TARGET in targets:
+                    formats.add("html")
+    except Exception as e:
+        logger.debug(f"获取剪贴板格式失败: {e}")
+    return formats
+
+def _read_windows_html() -> Optional[str]:
+    """读取CF_HTML格式，按头部的StartFragment/EndFragment偏移截取片段"""
+    import win32clipboard
+    win32clipboard.OpenClipboard()
+    try:
+        raw = win32clipboard.GetClipboardData(_windows_html_format())
+    finally:
+        win32clipboard.CloseClipboard()
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    header = raw[:1024].decode("ascii", "replace")
+    offsets = {}
+    for line in header.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("StartFragment", "EndFragment") and value.strip().isdigit():
+            offsets[key] = int(value)
+    if len(offsets) == 2:
+        raw = raw[offsets["StartFragment"]:offsets["EndFragment"]]
+    return raw.decode("utf-8", "replace")
+
+def _read_html(text: Optional[str]) -> Optional[ClipboardPayload]:
+    """读取HTML，条目内容优先使用剪贴板中的纯文本，没有时从HTML提取"""
+    if sys.platform == "win32":
+        html = _read_windows_html()
+    else:
+        data = _linux_read(_HTML_TARGET)
+        html = data.decode("utf-8", "replace") if data else None
+    if not html:
+        return None
+
+    text = text or html_to_text(html)
+    if not text.strip():
+        return None
+    return ClipboardPayload("html", text, html.encode("utf-8"), "text/html; charset=utf-8")
+
+def _files_payload(paths: List[str]) -> Optional[ClipboardPayload]:
+    paths = [p for p in paths if p]
+    if not paths:
+        return None
+    return ClipboardPayload("files", "\n".join(paths), meta={'count': len(paths)})
+
+def _read_linux_files() -> Optional[ClipboardPayload]:
+    for target in _FILE_TARGETS:
+        data = _linux_read(target)
+        if not data:
+            continue
+        paths = []
+        for line in data.decode("utf-8", "replace").splitlines():
+            # gnome格式首行为copy/cut
+            if line.startswith("file://"):
+                paths.append(unquote(urlparse(line).path))
+        return _files_payload(paths)
+    return None
+
+def _image_payload(image) -> ClipboardPayload:
+    """把Pillow图片编码为PNG，编码在调用方线程进行"""
+    buffer = io.BytesIO()
+    if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        image = image.convert("RGBA")
+    image.save(buffer, format="PNG", compress_level=3)
+    data = buffer.getvalue()
+    width, height = image.size
+    return ClipboardPayload("image", describe_image(width, height, len(data)), data, "image/png",
+                            {'width': width, 'height': height})
+
+def _grab() -> Any:
+    from PIL import ImageGrab
+    return ImageGrab.grabclipboard()
+
+def read_payload(formats: Set[str], text: Optional[str] = None) -> Optional[ClipboardPayload]:
+    """
+    读取富格式内容，均不可用时返回None
+    文件列表优先；有纯文本时条目以文本为主（Word、Excel、浏览器复制常同时带有位图或HTML），
+    HTML或位图作为附带数据保存；没有文本时依次尝试图片和HTML
+    """
+    has_text = bool(text and text.strip())
+    try:
+        if "files" in formats:
+            if sys.platform == "win32":
+                grabbed = _grab()
+                if isinstance(grabbed, list):
+                    return _files_payload(grabbed)
+            else:
+                payload = _read_linux_files()
+                if payload:
+                    return payload
+        if has_text and "html" in formats:
+            return _read_html(text)
+        if "image" in formats:
+            grabbed = _grab()
+            if grabbed is not None and not isinstance(grabbed, list):
+                image = _image_payload(grabbed)
+                if has_text:
+                    return ClipboardPayload("text", text, image.data, image.mime, image.meta)
+                return image
+        if not has_text and "html" in formats:
+            return _read_html(None)
+    except Exception as e:
+        logger.error(f"读取剪贴板富格式内容失败: {e}")
+    return None
+
+def copy_image(data: bytes) -> bool:
+    """把PNG图片写回剪贴板"""
+    try:
+        if sys.platform == "win32":
+            import win32clipboard
+            from PIL import Image
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="BMP")
+            win32clipboard.OpenClipboard()
+            try:
+                win32clipboard.EmptyClipboard()
+                # CF_DIB为去掉14字节文件头的BMP
+                win32clipboard.SetClipboardData(win32clipboard.CF_DIB, buffer.getvalue()[14:])
+            finally:
+                win32clipboard.CloseClipboard()
+            return True
+
+        tool = _linux_tool()
+        if tool == "wl-paste" and shutil.which("wl-copy"):
+            args = ["wl-copy", "--type", "image/png"]
+        elif tool == "xclip":
+            args = ["xclip", "-selection", "clipboard", "-t", "image/png", "-i"]
+        else:
+            return False
+        subprocess.run(args, input=data, timeout=_TOOL_TIMEOUT, check=True)
+        return True
+    except Exception as e:
+        logger.error(f"复制图片到剪贴板失败: {e}")
+        return False
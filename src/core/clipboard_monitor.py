@@ -2,36 +2,83 @@
 # src/core/clipboard_monitor.py
 import threading
 import time
-import hashlib
 import logging
 from datetime import datetime
-from typing import Optional, Callable
-import pyperclip
+from pathlib import Path
+from typing import Any, Dict, Optional, Callable
 from core.database import DatabaseManager
 from core.ai_classifier import AIClassifier
+from core.classification_queue import ClassificationQueue, UNCLASSIFIED
+from core.settings import SettingsStore
+from core.clipboard_source import ClipboardSource, create_clipboard_source
+from core.clipboard_formats import ClipboardPayload
+from core.content_signature import ChangeDetector, hash_bytes
+from core.capture_policy import CapturePolicy, MARKER_PREFIX
+from core.thumbnails import ThumbnailService
+from core.ingest_pipeline import CoalescingStage, IngestPipeline, PipelineStage
 
 logger = logging.getLogger(__name__)
 
+# 图片条目不经模型分类，直接归入该分类
+IMAGE_CATEGORY = "图片路径"
+
 class ClipboardMonitor:
-    def __init__(self, db_manager: DatabaseManager, ai_classifier: AIClassifier):
+    def __init__(self, db_manager: DatabaseManager, ai_classifier: AIClassifier,
+                 settings: Optional[SettingsStore] = None,
+                 classification_queue: Optional[ClassificationQueue] = None,
+                 source: Optional[ClipboardSource] = None,
+                 thumbnails: Optional[ThumbnailService] = None):
         self.db = db_manager
         self.ai_classifier = ai_classifier
+        # 分类在后台队列中进行，监听线程不等待模型
+        self.classification_queue = classification_queue or ClassificationQueue(
+            db_manager, ai_classifier, settings)
+        # 剪贴板来源，未指定时启动时按平台选择
+        self.source = source
+        # 图片缩略图在线程池中生成，不占用入库流水线
+        self.thumbnails = thumbnails or ThumbnailService(db_manager)
         self.running = False
         self.thread: Optional[threading.Thread] = None
-        self.last_content = ""
+        # 分级变化检测：签名相同即视为未变化，不再整段比较字符串
+        self.change_detector = ChangeDetector()
         self.last_hash = ""
+        # 超大内容按上限截断、溢出到数据库旁的spill目录或跳过
+        self.capture_policy = CapturePolicy(
+            spill_dir=str(Path(db_manager.db_path).resolve().parent / "spill"))
         self.on_new_content: Optional[Callable] = None
         
+        # 入库流水线：capture → 合并窗口 → dedup → persist → classify（分类队列）
+        # 监听线程只负责提交，去重、哈希和写入都在流水线线程中进行
+        self.pipeline = IngestPipeline(
+            CoalescingStage(window=0.3, max_delay=2.0),
+            [PipelineStage('dedup', self._dedup_stage, max_size=32, policy='block'),
+             PipelineStage('persist', self._persist_stage, max_size=256, policy='block')],
+            extra_stats={'classify': self.classification_queue.get_stats})
+        
         # 配置参数
-        self.check_interval = 0.5  # 检查间隔（秒）
+        self.check_interval = 0.5  # 轮询来源的基础检查间隔（秒），实际间隔随活动自适应
+        self.wait_timeout = 1.0    # 等待变化的超时，用于及时响应停止
         self.auto_classify = True  # 是否自动分类
+        self.capture_rich_formats = True  # 是否捕获图片、HTML和文件列表
+        
+        if settings:
+            settings.subscribe('auto_classify', self.set_auto_classify)
+            settings.subscribe('max_capture_mb', self.capture_policy.set_max_capture_mb)
+            settings.subscribe('oversize_policy', self.capture_policy.set_policy)
+            settings.subscribe('coalesce_window_ms', self.pipeline.coalescer.set_window_ms)
+            settings.subscribe('capture_rich_formats', self.set_capture_rich_formats)
         
     def start(self):
         """开始监听剪贴板"""
         if self.running:
             return
         
+        if self.source is None:
+            self.source = create_clipboard_source(interval=self.check_interval)
+        self.source.start()
         self.running = True
+        self.classification_queue.start()
+        self.pipeline.start()
         self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.thread.start()
         logger.info("剪贴板监听已启动")
@@ -39,81 +86,158 @@ class ClipboardMonitor:
     def stop(self):
         """停止监听剪贴板"""
         self.running = False
+        if self.source:
+            self.source.stop()
         if self.thread:
             self.thread.join(timeout=2)
+        # 先排空流水线，再停止分类队列和缩略图线程池
+        self.pipeline.stop()
+        self.classification_queue.stop()
+        self.thumbnails.shutdown()
         logger.info("剪贴板监听已停止")
     
     def _monitor_loop(self):
-        """监听循环"""
+        """监听循环：只在来源报告变化后读取内容"""
         while self.running:
             try:
-                current_content = pyperclip.paste()
+                if not self.source.wait_for_change(self.wait_timeout):
+                    continue
+                
+                if self.capture_rich_formats:
+                    # 格式探测（Linux上需启动子进程）、读取和图片编码都在流水线中进行，
+                    # 监听线程只记录一次变化，连续变化在合并窗口内只读取一次
+                    self.pipeline.submit({
+                        'probe': True,
+                        'sequence': self.source.change_count,
+                        'source_app': self._get_active_app(),
+                        'created_at': datetime.now()
+                    })
+                    continue
+                
+                current_content = self.source.read_text()
                 
-                if current_content and current_content != self.last_content:
-                    # 计算内容哈希
-                    content_hash = self._calculate_hash(current_content)
-                    
-                    # 避免重复记录相同内容
-                    if content_hash != self.last_hash:
-                        self._process_new_content(current_content, content_hash)
-                        self.last_content = current_content
-                        self.last_hash = content_hash
+                if current_content and self.change_detector.check(current_content,
+                                                                   self.source.change_count):
+                    # 连续改写在合并窗口内只保留最后一个值
+                    self.pipeline.submit({
+                        'content': current_content,
+                        'source_app': self._get_active_app(),
+                        'created_at': datetime.now()
+                    })
                 
             except Exception as e:
                 logger.error(f"剪贴板监听错误: {e}")
-            
-            time.sleep(self.check_interval)
+                time.sleep(self.check_interval)
     
-    def _calculate_hash(self, content: str) -> str:
-        """计算内容哈希"""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    def _dedup_stage(self, captured: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """去重阶段：按捕获上限处理并计算完整哈希，已存在的内容只更新访问记录"""
+        if captured.pop('probe', False):
+            sequence = captured.pop('sequence', None)
+            text = self.source.read_text()
+            formats = self.source.available_formats()
+            if formats:
+                payload = self.source.read_payload(formats, text)
+                if payload is not None:
+                    self.change_detector.reset()
+                    return self._dedup_payload(captured, payload)
+            # 没有可用的富格式（或读取失败），按文本处理
+            if not text or not self.change_detector.check(text, sequence):
+                return None
+            captured['content'] = text
+        
+        result = self.capture_policy.apply(captured['content'])
+        if self._is_duplicate(result.content_hash):
+            return None
+        
+        captured['content'] = result.content
+        captured['content_hash'] = result.content_hash
+        return captured
     
-    def _process_new_content(self, content: str, content_hash: str):
-        """处理新的剪贴板内容"""
-        try:
-            # 检查是否已存在
-            if self.db.content_exists(content_hash):
-                # 更新访问时间和次数
-                self.db.update_content_access(content_hash)
-                return
-            
-            # 检测敏感内容
-            is_sensitive = self._detect_sensitive_content(content)
-            
-            # AI分类
-            category = "未分类"
-            confidence = 0.0
-            
-            if self.auto_classify and not is_sensitive:
-                try:
-                    category, confidence = self.ai_classifier.classify_content(content)
-                except Exception as e:
-                    logger.error(f"AI分类失败: {e}")
-            
-            # 保存到数据库
-            item_id = self.db.add_clipboard_item({
-                'content': content,
+    def _dedup_payload(self, captured: Dict[str, Any],
+                       payload: ClipboardPayload) -> Optional[Dict[str, Any]]:
+        """富格式内容的去重：图片按数据哈希，以文本为主的条目（HTML、附带位图的文本、文件列表）按文本哈希"""
+        data = payload.data
+        text = payload.text
+        if payload.content_type == 'image':
+            content_hash = hash_bytes(data)
+        else:
+            result = self.capture_policy.apply(text)
+            text, content_hash = result.content, result.content_hash
+        if self._is_duplicate(content_hash):
+            return None
+        
+        if data is not None and not self.capture_policy.allows_bytes(len(data)):
+            text += f"\n{MARKER_PREFIX}: 数据过大（{len(data)} 字节），未保存]"
+            data = None
+        
+        captured['content'] = text
+        captured['content_hash'] = content_hash
+        captured['content_type'] = payload.content_type
+        if data is not None:
+            blob_hash = content_hash if payload.content_type == 'image' else hash_bytes(data)
+            captured['payload'] = {'blob_hash': blob_hash, 'mime': payload.mime, 'data': data}
+        return captured
+    
+    def _is_duplicate(self, content_hash: str) -> bool:
+        """与上一条相同或已存在时返回True，已存在的内容更新访问记录"""
+        # 避免重复记录相同内容
+        if content_hash == self.last_hash:
+            return True
+        self.last_hash = content_hash
+        
+        if self.db.content_exists(content_hash):
+            # 更新访问时间和次数（写缓冲中合并）
+            self.db.queue_content_access(content_hash)
+            return True
+        return False
+    
+    def _persist_stage(self, record: Dict[str, Any]) -> None:
+        """写入阶段：检测敏感内容并放入写缓冲，再交给分类队列"""
+        content = record['content']
+        content_hash = record['content_hash']
+        content_type = record.get('content_type', 'text')
+        payload = record.get('payload')
+        is_image = content_type == 'image'
+        
+        # 检测敏感内容
+        is_sensitive = self._detect_sensitive_content(content)
+        
+        # 先以未分类保存，分类结果由后台队列回写；图片没有可供模型判断的文本，直接归类
+        category, confidence = (IMAGE_CATEGORY, 1.0) if is_image else (UNCLASSIFIED, 0.0)
+        
+        # 放入写缓冲，由数据库后台线程批量提交
+        self.db.queue_clipboard_item({
+            'content': content,
+            'content_hash': content_hash,
+            'category': category,
+            'confidence': confidence,
+            'is_sensitive': is_sensitive,
+            'source_app': record['source_app'],
+            'created_at': record['created_at'],
+            'content_type': content_type,
+            'payload': payload
+        })
+        
+        if payload and (payload['mime'] or '').startswith('image/'):
+            self.thumbnails.submit(payload['blob_hash'], payload['data'])
+        
+        # 分类队列有界，满时丢弃最旧的待分类条目
+        queued = self.auto_classify and not is_sensitive and not is_image
+        if queued:
+            self.classification_queue.submit(content_hash, content)
+        
+        # 通知回调
+        if self.on_new_content:
+            self.on_new_content({
                 'content_hash': content_hash,
+                'content': content,
                 'category': category,
-                'confidence': confidence,
-                'is_sensitive': is_sensitive,
-                'source_app': self._get_active_app(),
-                'created_at': datetime.now()
+                'content_type': content_type,
+                'is_sensitive': is_sensitive
             })
-            
-            # 通知回调
-            if self.on_new_content:
-                self.on_new_content({
-                    'id': item_id,
-                    'content': content,
-                    'category': category,
-                    'is_sensitive': is_sensitive
-                })
-            
-            logger.info(f"新剪贴板内容已保存: {category} (置信度: {confidence:.2f})")
-            
-        except Exception as e:
-            logger.error(f"处理剪贴板内容失败: {e}")
+        
+        logger.info(f"新剪贴板内容已保存{'，等待分类' if queued else ''} "
+                    f"(队列长度: {self.classification_queue.depth()})")
     
     def _detect_sensitive_content(self, content: str) -> bool:
         return False
@@ -140,6 +264,19 @@ class ClipboardMonitor:
         """设置是否自动分类"""
         self.auto_classify = enabled
     
+    def set_capture_rich_formats(self, enabled: bool):
+        """设置是否捕获图片、HTML和文件列表"""
+        self.capture_rich_formats = enabled
+    
     def set_callback(self, callback: Callable):
         """设置新内容回调"""
-        self.on_new_content = callback
\ No newline at end of file
+        self.on_new_content = callback
+    
+    def get_stats(self) -> dict:
+        """获取剪贴板来源的变化和读取次数，以及变化检测、捕获上限和入库流水线各阶段的统计"""
+        stats = self.source.get_stats() if self.source else {}
+        stats['change_detection'] = self.change_detector.get_stats()
+        stats['capture'] = self.capture_policy.get_stats()
+        stats['ingest'] = self.pipeline.get_stats()
+        stats['thumbnails'] = self.thumbnails.get_stats()
+        return stats
@@ -0,0 +1,360 @@
+# src/core/clipboard_source.py
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import shutil
+import subprocess
+import sys
+import threading
+from typing import Dict, Optional, Set
+
+from . import clipboard_formats
+from .clipboard_formats import ClipboardPayload
+from .content_signature import ChangeDetector
+from .poll_scheduler import AdaptivePollScheduler, default_lock_probe
+
+logger = logging.getLogger(__name__)
+
+SOURCE_KINDS = ("auto", "windows", "x11", "wayland", "polling", "fake")
+
+class ClipboardSource:
+    """
+    剪贴板来源
+    各平台实现在剪贴板变化时调用 _notify 增加变化计数；
+    监听线程通过 wait_for_change 等待计数变化，只在变化后调用 read_text 读取内容；
+    图片、HTML、文件列表等富格式由 available_formats / read_payload 查询和读取
+    """
+
+    name = "base"
+    notify_on_start = True  # 启动时是否视为变化一次，以读取当前内容
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.change_count = 0
+        self._seen = 0
+        self.reads = 0
+        self.running = False
+
+    def start(self):
+        """开始监听"""
+        self.running = True
+        if self.notify_on_start:
+            self._notify()
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+
+    def _notify(self):
+        with self._cond:
+            self.change_count += 1
+            self._cond.notify_all()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """等待变化计数前进，返回在超时前是否发生了变化"""
+        with self._cond:
+            if self.change_count == self._seen and self.running:
+                self._cond.wait(timeout)
+            changed = self.change_count != self._seen
+            self._seen = self.change_count
+            return changed
+
+    def read_text(self) -> Optional[str]:
+        """读取当前剪贴板文本"""
+        self.reads += 1
+        import pyperclip
+        return pyperclip.paste()
+
+    def available_formats(self) -> Set[str]:
+        """当前剪贴板中可捕获的富格式（files、image、html）；Linux上需要启动子进程，应在监听线程之外调用"""
+        return clipboard_formats.available_formats()
+
+    def read_payload(self, formats: Set[str], text: Optional[str] = None) -> Optional[ClipboardPayload]:
+        """读取富格式内容，text 为同时读到的纯文本；可能较慢，应在监听线程之外调用"""
+        self.reads += 1
+        return clipboard_formats.read_payload(formats, text)
+
+    def get_stats(self) -> Dict:
+        return {'backend': self.name, 'changes': self.change_count, 'reads': self.reads}
+
+class _PollingThreadSource(ClipboardSource):
+    """在后台线程中按自适应间隔检查变化的来源"""
+
+    def __init__(self, scheduler: AdaptivePollScheduler):
+        super().__init__()
+        self.scheduler = scheduler
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop_event.clear()
+        super().start()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True, name=f"clipboard-{self.name}")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        super().stop()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _poll_loop(self):
+        while not self._stop_event.is_set():
+            changed = False
+            if self.scheduler.should_poll():
+                try:
+                    changed = self._poll()
+                except Exception as e:
+                    logger.error(f"检查剪贴板变化失败: {e}")
+                if changed:
+                    self._notify()
+            self._stop_event.wait(self.scheduler.next_interval(changed))
+
+    def get_stats(self) -> Dict:
+        return {**super().get_stats(), 'scheduler': self.scheduler.get_stats()}
+
+    def _poll(self) -> bool:
+        raise NotImplementedError
+
+class WindowsSequenceSource(_PollingThreadSource):
+    """
+    Windows剪贴板序列号
+    GetClipboardSequenceNumber 只读取一个计数器，不打开剪贴板，可以高频检查
+    """
+
+    name = "windows"
+
+    def __init__(self, scheduler: Optional[AdaptivePollScheduler] = None):
+        # 序列号检查很便宜，空闲时的上限也比内容轮询短
+        super().__init__(scheduler or AdaptivePollScheduler(
+            min_interval=0.05, base_interval=0.1, max_interval=2.0, lock_probe=default_lock_probe()))
+        self._user32 = ctypes.windll.user32
+        self._user32.GetClipboardSequenceNumber.restype = ctypes.c_uint32
+        self._last_sequence = self._user32.GetClipboardSequenceNumber()
+
+    def _poll(self) -> bool:
+        sequence = self._user32.GetClipboardSequenceNumber()
+        if sequence == self._last_sequence:
+            return False
+        self._last_sequence = sequence
+        return True
+
+class X11FixesSource(ClipboardSource):
+    """X11 XFixes 选区所有者变化通知，CLIPBOARD 被重新占有时收到事件"""
+
+    name = "x11"
+
+    def __init__(self):
+        super().__init__()
+        x11_path = ctypes.util.find_library('X11')
+        xfixes_path = ctypes.util.find_library('Xfixes')
+        if not x11_path or not xfixes_path:
+            raise OSError("未找到 libX11 或 libXfixes")
+        self._x11 = ctypes.CDLL(x11_path)
+        self._xfixes = ctypes.CDLL(xfixes_path)
+
+        self._x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self._x11.XOpenDisplay.restype = ctypes.c_void_p
+        self._x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._x11.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        self._x11.XInternAtom.restype = ctypes.c_ulong
+        self._x11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        self._x11.XPending.argtypes = [ctypes.c_void_p]
+        self._x11.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        self._x11.XFlush.argtypes = [ctypes.c_void_p]
+        self._x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._xfixes.XFixesQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                                      ctypes.POINTER(ctypes.c_int)]
+        self._xfixes.XFixesSelectSelectionInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                                            ctypes.c_ulong, ctypes.c_ulong]
+
+        self._display = self._x11.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("无法连接X11显示")
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not self._xfixes.XFixesQueryExtension(self._display, ctypes.byref(event_base),
+                                                 ctypes.byref(error_base)):
+            self._x11.XCloseDisplay(self._display)
+            raise OSError("X服务器不支持XFixes扩展")
+
+        root = self._x11.XDefaultRootWindow(self._display)
+        clipboard = self._x11.XInternAtom(self._display, b"CLIPBOARD", 0)
+        set_selection_owner_notify_mask = 1
+        self._xfixes.XFixesSelectSelectionInput(self._display, root, clipboard,
+                                                set_selection_owner_notify_mask)
+        self._x11.XFlush(self._display)
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        super().start()
+        self._thread = threading.Thread(target=self._event_loop, daemon=True, name="clipboard-x11")
+        self._thread.start()
+
+    def stop(self):
+        super().stop()
+        os.write(self._wake_write, b"\0")
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _event_loop(self):
+        fd = self._x11.XConnectionNumber(self._display)
+        event = (ctypes.c_long * 24)()  # XEvent 联合体的大小
+        try:
+            while self.running:
+                readable, _, _ = select.select([fd, self._wake_read], [], [], 1.0)
+                if self._wake_read in readable:
+                    break
+                received = False
+                while self._x11.XPending(self._display):
+                    self._x11.XNextEvent(self._display, ctypes.byref(event))
+                    received = True
+                if received:
+                    self._notify()
+        except Exception as e:
+            logger.error(f"X11剪贴板事件循环失败: {e}")
+        finally:
+            self._x11.XCloseDisplay(self._display)
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+class WaylandWatchSource(ClipboardSource):
+    """通过 wl-paste --watch 在剪贴板变化时收到通知"""
+
+    name = "wayland"
+    notify_on_start = False  # 启动时 wl-paste 会为当前内容执行一次命令
+
+    def __init__(self):
+        super().__init__()
+        if not shutil.which("wl-paste"):
+            raise OSError("未找到 wl-paste（wl-clipboard）")
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        # 每次变化时 wl-paste 运行一次命令：丢弃内容，输出一行作为通知
+        self._process = subprocess.Popen(
+            ["wl-paste", "--watch", "sh", "-c", "cat >/dev/null; echo"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        super().start()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True, name="clipboard-wayland")
+        self._thread.start()
+
+    def stop(self):
+        super().stop()
+        if self._process:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _read_loop(self):
+        for _ in self._process.stdout:
+            self._notify()
+        if self.running:
+            logger.warning("wl-paste 已退出，剪贴板变化将不再被检测")
+
+class PollingSource(_PollingThreadSource):
+    """
+    轮询后备方案：按间隔读取内容并比较
+    变化时保留读到的内容，read_text 不再重复读取；
+    只比较文本，仅包含图片或文件的变化无法被发现
+    """
+
+    name = "polling"
+    notify_on_start = False  # 首次轮询即会发现内容变化
+
+    def __init__(self, interval: float = 0.5, scheduler: Optional[AdaptivePollScheduler] = None):
+        super().__init__(scheduler or AdaptivePollScheduler(
+            min_interval=min(0.1, interval), base_interval=interval,
+            max_interval=max(5.0, interval), lock_probe=default_lock_probe()))
+        self._content: Optional[str] = None
+        self._detector = ChangeDetector()
+        self._lock = threading.Lock()
+
+    def _poll(self) -> bool:
+        content = super().read_text()
+        with self._lock:
+            if not self._detector.check(content):
+                return False
+            self._content = content
+            return True
+
+    def read_text(self) -> Optional[str]:
+        with self._lock:
+            return self._content
+
+class FakeClipboardSource(ClipboardSource):
+    """内存中的剪贴板，用于测试：set_text 模拟一次复制"""
+
+    name = "fake"
+
+    def __init__(self, text: Optional[str] = None):
+        super().__init__()
+        self._text = text
+        self._payload: Optional[ClipboardPayload] = None
+
+    def set_text(self, text: Optional[str]):
+        self._text = text
+        self._payload = None
+        self._notify()
+
+    def set_payload(self, payload: Optional[ClipboardPayload]):
+        """模拟一次富格式复制，HTML和文件列表同时带有文本内容，图片没有"""
+        self._payload = payload
+        self._text = payload.text if payload and payload.content_type != "image" else None
+        self._notify()
+
+    def read_text(self) -> Optional[str]:
+        self.reads += 1
+        return self._text
+
+    def available_formats(self) -> Set[str]:
+        return {self._payload.content_type} if self._payload else set()
+
+    def read_payload(self, formats: Set[str], text: Optional[str] = None) -> Optional[ClipboardPayload]:
+        self.reads += 1
+        payload = self._payload
+        return payload if payload and payload.content_type in formats else None
+
+def create_clipboard_source(kind: str = "auto", interval: float = 0.5) -> ClipboardSource:
+    """
+    按平台选择剪贴板来源，事件通知不可用时退回轮询
+    kind: auto、windows、x11、wayland、polling、fake
+    """
+    if kind not in SOURCE_KINDS:
+        raise ValueError(f"未知的剪贴板来源: {kind}")
+    if kind == "fake":
+        return FakeClipboardSource()
+    if kind == "polling":
+        return PollingSource(interval)
+
+    candidates = [kind] if kind != "auto" else []
+    if kind == "auto":
+        if sys.platform == "win32":
+            candidates.append("windows")
+        elif sys.platform.startswith("linux"):
+            if os.environ.get("WAYLAND_DISPLAY"):
+                candidates.append("wayland")
+            if os.environ.get("DISPLAY"):
+                candidates.append("x11")
+
+    factories = {"windows": WindowsSequenceSource, "x11": X11FixesSource, "wayland": WaylandWatchSource}
+    for candidate in candidates:
+        try:
+            source = factories[candidate]()
+            logger.info(f"剪贴板来源: {source.name}")
+            return source
+        except Exception as e:
+            logger.warning(f"剪贴板来源 {candidate} 不可用: {e}")
+
+    logger.info("剪贴板来源: 轮询")
+    return PollingSource(interval)
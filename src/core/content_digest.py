@@ -0,0 +1,123 @@
+# src/core/content_digest.py
+import re
+from typing import Dict, List
+
+# 提示词中单条内容的默认token预算
+DEFAULT_TOKEN_BUDGET = 160
+
+DIGEST_HEADER_PREFIX = "[内容摘要"
+OMISSION_MARKER = "\n……（省略{omitted}字符）……\n"
+# 结构特征只扫描这么长的文本
+SCAN_LENGTH = 20000
+
+WIDE_CHAR_RE = re.compile(r'[⺀-鿿가-힯豈-﫿＀-￯　-〿]')
+URL_RE = re.compile(r'(?:https?|ftp)://\S+|www\.[\w-]+\.\S+', re.IGNORECASE)
+PATH_RE = re.compile(r'(?:[a-z]:\\|/(?:home|usr|var|etc|users|tmp|opt)/|\.{1,2}/)[^\s"\'<>|]+', re.IGNORECASE)
+EMAIL_LOCAL_RE = re.compile(r'[\w.+-]+$')
+EMAIL_DOMAIN_RE = re.compile(r'[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}', re.IGNORECASE)
+DIGIT_RE = re.compile(r'\d')
+
+# 语言/格式提示：(名称, 正则)，按出现次数判断
+LANGUAGE_HINTS = (
+    ("python", re.compile(r'^\s*(?:def |class |import |from \S+ import |elif |except\b)|Traceback \(most recent|^\s*File ".+", line \d+', re.M)),
+    ("javascript", re.compile(r'\b(?:function\s*\(|const |let |=> |console\.log|require\()')),
+    ("java/c#", re.compile(r'\b(?:public|private|protected) (?:static )?\w+|^\s*at [\w.$]+\(', re.M)),
+    ("c/c++", re.compile(r'^\s*#include\b|\bstd::|\bprintf\(', re.M)),
+    ("sql", re.compile(r'\b(?:SELECT|INSERT INTO|UPDATE|CREATE TABLE|WHERE|JOIN)\b')),
+    ("html/xml", re.compile(r'</?[a-zA-Z][\w:-]*(?:\s[^<>]*)?>')),
+    ("json", re.compile(r'^\s*[\[{]\s*"|"\s*:\s*[\[{"\d]', re.M)),
+    ("shell", re.compile(r'^\s*(?:\$ |sudo |cd |ls |git |docker |pip |npm )', re.M)),
+    ("log", re.compile(r'^\s*\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}|\b(?:ERROR|WARN|INFO|DEBUG)\b', re.M)),
+    ("markdown", re.compile(r'^\s*(?:#{1,6} |[-*] |\d+\. |```)', re.M)),
+)
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估计token数：中日韩等宽字符约每字1个token，其余约每4个字符1个token
+    """
+    if not text:
+        return 0
+    wide = len(WIDE_CHAR_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+def _take(text: str, budget: int, from_end: bool = False) -> str:
+    """从开头（或结尾）截取不超过 budget 个估计token的文本，尽量在行边界处截断"""
+    if budget <= 0:
+        return ""
+    chars = text[::-1] if from_end else text
+    # 先按最宽的情况估计长度，再逐步放宽
+    end = min(len(chars), budget)
+    while end < len(chars) and estimate_tokens(chars[:end * 2]) <= budget:
+        end *= 2
+    low, high = end if estimate_tokens(chars[:end]) <= budget else 0, min(len(chars), end * 2)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(chars[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    piece = chars[:low]
+    # 截断点附近有换行时在换行处截断，避免半行
+    newline = piece.rfind('\n')
+    if newline > len(piece) * 0.7:
+        piece = piece[:newline]
+    return piece[::-1] if from_end else piece
+
+def _count_emails(text: str) -> int:
+    # 只在每个@附近匹配，避免在长文本上整体正则回溯
+    count = 0
+    for match in re.finditer('@', text):
+        at = match.start()
+        if EMAIL_LOCAL_RE.search(text[max(0, at - 64):at]) and EMAIL_DOMAIN_RE.match(text, at + 1, at + 256):
+            count += 1
+    return count
+
+def describe_structure(content: str) -> Dict:
+    """统计内容的结构特征"""
+    sample = content[:SCAN_LENGTH]
+    length = len(sample) or 1
+    hints: List[str] = []
+    for name, pattern in LANGUAGE_HINTS:
+        count = len(pattern.findall(sample))
+        if count >= 2:
+            hints.append((count, name))
+    hints.sort(reverse=True)
+    return {
+        'chars': len(content),
+        'lines': content.count('\n') + 1,
+        'languages': [name for _, name in hints[:2]],
+        'urls': len(URL_RE.findall(sample)),
+        'paths': len(PATH_RE.findall(sample)),
+        'emails': _count_emails(sample),
+        'digit_ratio': len(DIGIT_RE.findall(sample)) / length,
+        'wide_ratio': len(WIDE_CHAR_RE.findall(sample)) / length,
+    }
+
+def _format_header(info: Dict) -> str:
+    parts = [f"共{info['chars']}字符", f"{info['lines']}行"]
+    if info['languages']:
+        parts.append("格式:" + "/".join(info['languages']))
+    for key, label in (('urls', '链接'), ('paths', '路径'), ('emails', '邮箱')):
+        if info[key]:
+            parts.append(f"{label}{info[key]}个")
+    if info['digit_ratio'] >= 0.1:
+        parts.append(f"数字占{info['digit_ratio']:.0%}")
+    return f"{DIGEST_HEADER_PREFIX}：{'，'.join(parts)}]"
+
+def build_digest(content: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    在token预算内表示内容
+    预算内的内容原样返回；超出时返回结构特征 + 开头片段 + 结尾片段，
+    结尾常包含文件扩展名、异常信息、闭合标签等关键特征
+    """
+    content = content.strip()
+    if estimate_tokens(content) <= token_budget:
+        return content
+
+    header = _format_header(describe_structure(content))
+    remaining = max(0, token_budget - estimate_tokens(header) - estimate_tokens(OMISSION_MARKER) - 4)
+    # 开头分配略多，结尾至少保留三分之一
+    head = _take(content, remaining - remaining // 3)
+    tail = _take(content[len(head):], remaining // 3, from_end=True)
+    omitted = len(content) - len(head) - len(tail)
+    return header + "\n" + head.rstrip() + OMISSION_MARKER.format(omitted=omitted) + tail.lstrip()
@@ -0,0 +1,124 @@
+# src/core/content_signature.py
+import hashlib
+import logging
+import zlib
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 快速签名的取样：首尾各取一段，中间均匀取若干小段
+SAMPLE_EDGE_CHARS = 4096
+SAMPLE_INNER_CHARS = 256
+SAMPLE_INNER_COUNT = 8
+
+# 不超过此长度的内容签名相同时再做一次完整比较；更长的内容在变化序号未前进时以签名为准
+EXACT_COMPARE_LIMIT = 64 * 1024
+
+# 完整哈希时每次编码和送入哈希的块大小（字符数）
+HASH_CHUNK_CHARS = 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+Signature = Tuple[int, int]
+
+def quick_signature(text: str) -> Signature:
+    """
+    计算内容的快速签名：长度 + 取样片段的CRC32
+    只读取固定数量的字符，代价与内容大小无关
+    """
+    length = len(text)
+    if length <= 2 * SAMPLE_EDGE_CHARS + SAMPLE_INNER_COUNT * SAMPLE_INNER_CHARS:
+        return length, zlib.crc32(text.encode('utf-8', 'surrogatepass'))
+
+    crc = zlib.crc32(text[:SAMPLE_EDGE_CHARS].encode('utf-8', 'surrogatepass'))
+    inner_start = SAMPLE_EDGE_CHARS
+    inner_span = length - 2 * SAMPLE_EDGE_CHARS - SAMPLE_INNER_CHARS
+    for i in range(SAMPLE_INNER_COUNT):
+        offset = inner_start + inner_span * (i + 1) // (SAMPLE_INNER_COUNT + 1)
+        chunk = text[offset:offset + SAMPLE_INNER_CHARS]
+        crc = zlib.crc32(chunk.encode('utf-8', 'surrogatepass'), crc)
+    crc = zlib.crc32(text[-SAMPLE_EDGE_CHARS:].encode('utf-8', 'surrogatepass'), crc)
+    return length, crc
+
+def hash_bytes(data: bytes) -> str:
+    """分块计算字节内容的SHA-256，通过memoryview切片避免复制"""
+    hasher = hashlib.sha256()
+    view = memoryview(data)
+    for start in range(0, len(view), HASH_CHUNK_BYTES):
+        hasher.update(view[start:start + HASH_CHUNK_BYTES])
+    return hasher.hexdigest()
+
+def hash_text(text: str) -> str:
+    """
+    计算文本UTF-8编码的SHA-256，结果与一次性编码后哈希相同
+    逐块编码，避免为大文本额外生成一份完整的字节副本
+    """
+    if len(text) <= HASH_CHUNK_CHARS:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    hasher = hashlib.sha256()
+    for start in range(0, len(text), HASH_CHUNK_CHARS):
+        hasher.update(memoryview(text[start:start + HASH_CHUNK_CHARS].encode('utf-8')))
+    return hasher.hexdigest()
+
+class ChangeDetector:
+    """
+    分级判断内容是否变化
+    先比较长度和取样签名，小内容签名相同时再完整比较；
+    只有确认变化后调用方才需要计算完整哈希。
+    大内容只改动了取样之外的部分时签名相同，若剪贴板来源报告了新的变化序号，
+    视为可能变化，交给调用方按完整哈希去重确认；没有序号的来源（轮询）以签名为准
+    """
+
+    def __init__(self, exact_compare_limit: int = EXACT_COMPARE_LIMIT):
+        self.exact_compare_limit = exact_compare_limit
+        self._signature: Optional[Signature] = None
+        self._content: Optional[str] = None
+        self._sequence: Optional[int] = None
+        self.checks = 0
+        self.signature_hits = 0
+        self.exact_compares = 0
+        self.sequence_rechecks = 0
+        self.changes = 0
+
+    def check(self, content: Optional[str], sequence: Optional[int] = None) -> bool:
+        """
+        内容与上次不同时返回True并记住新内容
+        sequence 为剪贴板来源的变化序号，每次复制都会前进
+        """
+        self.checks += 1
+        signature = quick_signature(content) if content is not None else None
+        previous_sequence, self._sequence = self._sequence, sequence
+        if signature == self._signature:
+            if content is None:
+                self.signature_hits += 1
+                return False
+            if len(content) > self.exact_compare_limit:
+                if sequence is None or sequence == previous_sequence:
+                    self.signature_hits += 1
+                    return False
+                # 签名相同但发生过新的复制，不能排除取样之外的改动
+                self.sequence_rechecks += 1
+                return True
+            self.exact_compares += 1
+            if content == self._content:
+                return False
+
+        self._signature = signature
+        # 只保留小内容用于完整比较，大内容不额外持有引用
+        self._content = content if content is None or len(content) <= self.exact_compare_limit else None
+        self.changes += 1
+        return True
+
+    def reset(self):
+        self._signature = None
+        self._content = None
+        self._sequence = None
+
+    def get_stats(self) -> dict:
+        return {
+            'checks': self.checks,
+            'signature_hits': self.signature_hits,
+            'exact_compares': self.exact_compares,
+            'sequence_rechecks': self.sequence_rechecks,
+            'changes': self.changes,
+        }
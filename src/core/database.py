@@ -1,24 +1,336 @@
 # src/core/database.py
 import sqlite3
+import base64
+import hashlib
 import json
 import logging
+import queue
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 import threading
+import time
+import zlib
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# 连接调优参数
+CACHE_SIZE_KB = 16384           # 每个连接的页缓存（KB）
+MMAP_SIZE = 64 * 1024 * 1024    # 内存映射读取大小
+BUSY_TIMEOUT_MS = 5000          # 锁等待超时
+
+# 全文检索高亮标记（控制字符，前端转义后再替换为<mark>）
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+TRIGRAM_MIN_LENGTH = 3          # trigram分词器能命中索引的最短查询长度
+
+ITEM_CACHE_SIZE = 512           # 热点条目缓存容量
+IN_QUERY_CHUNK = 500            # IN (...) 查询每批最多的参数个数
+
+WRITE_BATCH_SIZE = 256          # 写缓冲达到该条数时立即刷盘
+WRITE_FLUSH_INTERVAL = 0.5      # 写缓冲最长停留时间（秒）
+CACHE_TOUCH_INTERVAL = 600      # 分类缓存命中后刷新last_used的最短间隔（秒）
+
+SCHEMA_VERSION = 5              # PRAGMA user_version
+BULK_IMPORT_THRESHOLD = 1000    # 超过该条数的导入批次改用批量维护索引
+BLOB_THRESHOLD = 4096           # 超过该字节数的内容压缩后单独存入content_blobs
+PREVIEW_LENGTH = 200            # 列表视图使用的预览字符数
+MAX_PAGE_SIZE = 500             # /api/items 每页最多的条数，由路由参数校验
+
+DELETE_BATCH_SIZE = 500         # 批量删除时每个事务最多删除的条数
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "xenon_clip.db"):
+    def __init__(self, db_path: str = "xenon_clip.db", reader_count: int = 4):
         self.db_path = db_path
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # 写连接锁，所有写操作串行执行
+        self.reader_count = reader_count if db_path != ":memory:" else 0
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        # 最近访问条目的LRU缓存，写操作提交后失效
+        self._item_cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+        # 写缓冲：新条目按content_hash合并，访问计数按hash累加，批量提交
+        self._pending_lock = threading.Lock()
+        self._pending_inserts: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending_access: Dict[str, List] = {}
+        self._pending_cache_touches: set = set()
+        self._flush_event = threading.Event()
+        self._closing = threading.Event()
+        self._writer = self._connect_writer()
         self._initialize_database()
-    
-    def _initialize_database(self):
-        """初始化数据库"""
+        self._open_readers()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+
+    def _connect_writer(self) -> sqlite3.Connection:
+        """创建唯一的写连接（WAL模式）"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        # 只对新建数据库生效，旧库在初始化时迁移
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL模式下NORMAL足以保证一致性，只在检查点时fsync
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        self._register_functions(conn)
+        return conn
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        """创建只读连接，可与写连接并发执行"""
+        uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only=ON')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        self._register_functions(conn)
+        return conn
+
+    @classmethod
+    def _register_functions(cls, conn: sqlite3.Connection):
+        """注册检索视图和全文索引触发器使用的SQL函数，所有连接都需要注册"""
+        conn.create_function('xc_blob_text', 2,
+                             lambda codec, data: None if data is None else cls._decode_blob(codec, data),
+                             deterministic=True)
+
+    def _open_readers(self):
+        """初始化读连接池"""
+        for _ in range(self.reader_count):
+            self._readers.put(self._connect_reader())
+
+    @contextmanager
+    def _read(self):
+        """从连接池借出一个读连接"""
+        if self.reader_count == 0:
+            # 内存数据库无法共享，退回到写连接
+            with self.lock:
+                yield self._writer
+            return
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def _write(self):
+        """在写连接上执行一个事务"""
+        with self.lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def _cache_get(self, item_id: int) -> Optional[Dict]:
+        with self._cache_lock:
+            item = self._item_cache.get(item_id)
+            if item is None:
+                return None
+            self._item_cache.move_to_end(item_id)
+            return dict(item)
+
+    def _cache_put(self, item: Dict, generation: int):
+        """写入缓存；读取期间若发生过失效则放弃，避免缓存旧数据"""
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                return
+            self._item_cache[item['id']] = dict(item)
+            self._item_cache.move_to_end(item['id'])
+            while len(self._item_cache) > ITEM_CACHE_SIZE:
+                self._item_cache.popitem(last=False)
+
+    def _invalidate_items(self, item_ids: Optional[List[int]] = None,
+                          content_hash: Optional[str] = None):
+        """使缓存条目失效，不传参数时清空整个缓存"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if item_ids is None and content_hash is None:
+                self._item_cache.clear()
+                return
+            for item_id in item_ids or []:
+                self._item_cache.pop(item_id, None)
+            if content_hash is not None:
+                stale = [k for k, v in self._item_cache.items() if v['content_hash'] == content_hash]
+                for item_id in stale:
+                    del self._item_cache[item_id]
+
+    @staticmethod
+    def _utc_now() -> str:
+        """与SQLite CURRENT_TIMESTAMP 相同格式的UTC时间"""
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+    def queue_clipboard_item(self, item: Dict[str, Any]):
+        """
+        将新条目放入写缓冲，由后台线程批量写入
+        富格式条目带有 content_type 和 payload（blob_hash、mime、data），
+        二进制数据按blob_hash存入content_blobs，不内联在clipboard_items中
+        """
+        now = self._utc_now()
+        # 压缩在调用方线程完成，不占用写锁
+        fields, blob = self._prepare_content(item['content'])
+        payload = self._prepare_payload(item.get('payload'))
+        if payload and item.get('content_type') == 'image':
+            fields['content_size'] = payload['size']
+        with self._pending_lock:
+            pending = self._pending_inserts.get(item['content_hash'])
+            if pending:
+                pending['access_count'] += 1
+                pending['last_accessed'] = now
+            else:
+                self._pending_inserts[item['content_hash']] = {
+                    **fields,
+                    'blob': blob,
+                    'content_hash': item['content_hash'],
+                    'category': item['category'],
+                    'confidence': item['confidence'],
+                    'is_sensitive': item['is_sensitive'],
+                    'source_app': item['source_app'],
+                    'created_at': now,
+                    'last_accessed': now,
+                    'access_count': 1,
+                    'content_type': item.get('content_type', 'text'),
+                    'blob_hash': payload['blob_hash'] if payload else None,
+                    'payload': payload,
+                }
+            backlog = len(self._pending_inserts) + len(self._pending_access)
+        if backlog >= WRITE_BATCH_SIZE:
+            self._flush_event.set()
+
+    def queue_content_access(self, content_hash: str):
+        """将一次访问计数放入写缓冲，同一hash的多次访问合并为一次UPDATE"""
+        now = self._utc_now()
+        with self._pending_lock:
+            pending = self._pending_inserts.get(content_hash)
+            if pending:
+                pending['access_count'] += 1
+                pending['last_accessed'] = now
+            else:
+                entry = self._pending_access.setdefault(content_hash, [0, now])
+                entry[0] += 1
+                entry[1] = now
+            backlog = len(self._pending_inserts) + len(self._pending_access)
+        if backlog >= WRITE_BATCH_SIZE:
+            self._flush_event.set()
+
+    def flush(self):
+        """将写缓冲在一个事务内提交"""
+        with self.lock:
+            with self._pending_lock:
+                if not self._pending_inserts and not self._pending_access and \
+                        not self._pending_cache_touches:
+                    return
+                inserts = list(self._pending_inserts.values())
+                access = self._pending_access
+                touches = self._pending_cache_touches
+                self._pending_inserts = OrderedDict()
+                self._pending_access = {}
+                self._pending_cache_touches = set()
+
+            try:
+                self._writer.executemany('''
+                    INSERT OR IGNORE INTO content_blobs (content_hash, codec, size, data)
+                    VALUES (?, ?, ?, ?)
+                ''', [(item['content_hash'], item['blob']['codec'], item['blob']['size'],
+                       item['blob']['data']) for item in inserts if item['blob']])
+                self._writer.executemany('''
+                    INSERT OR IGNORE INTO content_blobs (content_hash, codec, size, data, mime)
+                    VALUES (:blob_hash, :codec, :size, :data, :mime)
+                ''', [item['payload'] for item in inserts if item['payload']])
+                self._writer.executemany('''
+                    INSERT INTO clipboard_items
+                    (content, content_hash, category, confidence, is_sensitive, source_app,
+                     created_at, last_accessed, access_count, preview, content_size, is_external,
+                     content_type, blob_hash)
+                    VALUES (:content, :content_hash, :category, :confidence, :is_sensitive,
+                            :source_app, :created_at, :last_accessed, :access_count,
+                            :preview, :content_size, :is_external, :content_type, :blob_hash)
+                    ON CONFLICT(content_hash) DO UPDATE SET
+                        access_count = access_count + excluded.access_count,
+                        last_accessed = excluded.last_accessed
+                ''', inserts)
+                self._writer.executemany('''
+                    UPDATE clipboard_items
+                    SET access_count = access_count + ?,
+                        last_accessed = ?
+                    WHERE content_hash = ?
+                ''', [(count, last, content_hash) for content_hash, (count, last) in access.items()])
+                self._writer.executemany(
+                    'UPDATE classification_cache SET last_used = CURRENT_TIMESTAMP WHERE cache_key = ?',
+                    [(cache_key,) for cache_key in touches]
+                )
+                self._writer.commit()
+            except Exception as e:
+                self._writer.rollback()
+                logger.error(f"批量写入失败，稍后重试: {e}")
+                self._requeue(inserts, access, touches)
+                return
+
+        if access:
+            self._invalidate_items()
+        logger.debug(f"批量写入完成: 新增 {len(inserts)} 条, 访问更新 {len(access)} 条")
+
+    def _requeue(self, inserts: List[Dict], access: Dict[str, List], touches: Iterable[str] = ()):
+        """刷盘失败时把数据放回写缓冲"""
+        with self._pending_lock:
+            self._pending_cache_touches.update(touches)
+            for item in inserts:
+                pending = self._pending_inserts.get(item['content_hash'])
+                if pending:
+                    pending['access_count'] += item['access_count']
+                else:
+                    self._pending_inserts[item['content_hash']] = item
+            for content_hash, (count, last) in access.items():
+                entry = self._pending_access.setdefault(content_hash, [0, last])
+                entry[0] += count
+
+    def _flush_loop(self):
+        """后台刷盘线程：达到条数阈值或超时后提交"""
+        while not self._closing.is_set():
+            self._flush_event.wait(WRITE_FLUSH_INTERVAL)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"后台刷盘失败: {e}")
+
+    def close(self):
+        """刷出写缓冲并关闭所有连接"""
+        self._closing.set()
+        self._flush_event.set()
+        self._flush_thread.join(timeout=5)
+        self.flush()
+
+        while self.reader_count and not self._readers.empty():
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
             try:
+                # 退出前把WAL合并回主库，保证数据落盘
+                self._writer.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                self._writer.execute('PRAGMA optimize')
+            except Exception as e:
+                logger.error(f"数据库优化失败: {e}")
+            self._writer.close()
+        logger.info("数据库连接已关闭")
+
+    def _initialize_database(self):
+        """初始化数据库"""
+        try:
+            with self._write() as conn:
                 # 剪贴板条目表
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS clipboard_items (
@@ -33,10 +345,38 @@ class DatabaseManager:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         access_count INTEGER DEFAULT 1,
-                        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        preview TEXT,
+                        content_size INTEGER DEFAULT 0,
+                        is_external BOOLEAN DEFAULT FALSE,
+                        content_type VARCHAR(10) DEFAULT 'text',
+                        blob_hash VARCHAR(64)
+                    )
+                ''')
+
+                # 大内容存储表，以content_hash寻址，数据压缩存放
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS content_blobs (
+                        content_hash VARCHAR(64) PRIMARY KEY,
+                        codec VARCHAR(10) NOT NULL,
+                        size INTEGER NOT NULL,
+                        data BLOB NOT NULL,
+                        mime VARCHAR(100)
+                    )
+                ''')
+
+                # 图片缩略图，以原图的blob_hash寻址
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS thumbnails (
+                        blob_hash VARCHAR(64) PRIMARY KEY,
+                        mime VARCHAR(100) NOT NULL,
+                        width INTEGER NOT NULL,
+                        height INTEGER NOT NULL,
+                        data BLOB NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
-                
+
                 # 分类表
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS categories (
@@ -46,7 +386,7 @@ class DatabaseManager:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
-                
+
                 # 设置表
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS settings (
@@ -55,135 +395,798 @@ class DatabaseManager:
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
-                
+
+                # 分类结果缓存，键为内容指纹 + 分类集合版本
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS classification_cache (
+                        cache_key VARCHAR(96) PRIMARY KEY,
+                        category VARCHAR(50) NOT NULL,
+                        confidence REAL NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_classification_cache_last_used ON classification_cache(last_used)')
+
+                # 本地分类模型的质心（各分类样本特征之和）
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS classifier_centroids (
+                        category VARCHAR(50) PRIMARY KEY,
+                        examples INTEGER NOT NULL,
+                        weights BLOB NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                # 分类统计汇总表，由触发器增量维护
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS category_stats (
+                        category VARCHAR(50) PRIMARY KEY,
+                        item_count INTEGER NOT NULL DEFAULT 0,
+                        confidence_sum REAL NOT NULL DEFAULT 0
+                    )
+                ''')
+
                 # 创建索引
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_content_hash ON clipboard_items(content_hash)')
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_category ON clipboard_items(category)')
                 conn.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON clipboard_items(created_at)')
-                
-                conn.commit()
-                logger.info("数据库初始化完成")
-                
+                # 游标分页索引，与 ORDER BY last_accessed DESC, id DESC 对应
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_last_accessed_id ON clipboard_items(last_accessed DESC, id DESC)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_category_last_accessed_id ON clipboard_items(category, last_accessed DESC, id DESC)')
+
+                self._migrate_schema(conn)
+
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_blob_hash ON clipboard_items(blob_hash) WHERE blob_hash IS NOT NULL')
+
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS clipboard_blob_ad AFTER DELETE ON clipboard_items
+                    WHEN old.is_external BEGIN
+                        DELETE FROM content_blobs WHERE content_hash = old.content_hash
+                            AND NOT EXISTS (SELECT 1 FROM clipboard_items WHERE blob_hash = old.content_hash);
+                    END
+                ''')
+                # 图片、HTML等二进制数据可能被多个条目引用，最后一个引用删除时才清理
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS clipboard_payload_ad AFTER DELETE ON clipboard_items
+                    WHEN old.blob_hash IS NOT NULL
+                        AND NOT EXISTS (SELECT 1 FROM clipboard_items WHERE blob_hash = old.blob_hash)
+                    BEGIN
+                        DELETE FROM content_blobs WHERE content_hash = old.blob_hash
+                            AND NOT EXISTS (SELECT 1 FROM clipboard_items
+                                            WHERE content_hash = old.blob_hash AND is_external);
+                        DELETE FROM thumbnails WHERE blob_hash = old.blob_hash;
+                    END
+                ''')
+
+                self._initialize_category_stats_triggers(conn)
+
+                self.fts_enabled = self._initialize_search_index(conn)
+
+            logger.info("数据库初始化完成")
+
+        except Exception as e:
+            logger.error(f"数据库初始化失败: {e}")
+
+    def incremental_vacuum_enabled(self) -> bool:
+        """数据库是否处于增量回收模式；读连接会缓存文件头中的模式，以写连接为准"""
+        with self.lock:
+            return self._writer.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        把旧数据库切换为增量回收模式，需要一次完整VACUUM，期间持有写锁、阻塞所有写入
+        只由用户主动触发（vacuum 命令或维护接口），后台任务不会调用；已切换时直接返回
+        返回: 是否处于增量回收模式
+        """
+        if self.incremental_vacuum_enabled():
+            return True
+        with self.lock:
+            try:
+                started = time.perf_counter()
+                logger.warning("正在将数据库切换为增量回收模式，完整VACUUM期间暂停写入...")
+                self._writer.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                self._writer.execute('VACUUM')
+                mode = self._writer.execute('PRAGMA auto_vacuum').fetchone()[0]
+                logger.info(f"增量回收模式切换完成，用时 {time.perf_counter() - started:.1f} 秒")
+                return mode == 2
             except Exception as e:
-                logger.error(f"数据库初始化失败: {e}")
-                conn.rollback()
-            finally:
-                conn.close()
-    
+                logger.error(f"切换增量回收模式失败: {e}")
+                return False
+
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """按 PRAGMA user_version 升级旧版本数据库"""
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        if version < 1:
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(clipboard_items)')}
+            for name, ddl in (
+                ('preview', 'TEXT'),
+                ('content_size', 'INTEGER DEFAULT 0'),
+                ('is_external', 'BOOLEAN DEFAULT FALSE'),
+            ):
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE clipboard_items ADD COLUMN {name} {ddl}')
+
+            # 旧全文索引直接以clipboard_items为内容表，需要改为基于检索视图重建
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_ai')
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_ad')
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_au')
+            conn.execute('DROP TABLE IF EXISTS clipboard_fts')
+
+            moved = 0
+            rows = conn.execute('''
+                SELECT id, content FROM clipboard_items WHERE preview IS NULL
+            ''').fetchall()
+            for row in rows:
+                prepared, blob = self._prepare_content(row['content'])
+                if blob:
+                    conn.execute('''
+                        INSERT OR IGNORE INTO content_blobs (content_hash, codec, size, data)
+                        SELECT content_hash, ?, ?, ? FROM clipboard_items WHERE id = ?
+                    ''', (blob['codec'], blob['size'], blob['data'], row['id']))
+                    moved += 1
+                conn.execute('''
+                    UPDATE clipboard_items
+                    SET content = ?, preview = ?, content_size = ?, is_external = ?
+                    WHERE id = ?
+                ''', (prepared['content'], prepared['preview'], prepared['content_size'],
+                      prepared['is_external'], row['id']))
+            if moved:
+                logger.info(f"已将 {moved} 条大内容迁移到压缩存储")
+
+        if version < 2:
+            self._rebuild_category_stats(conn)
+            logger.info("分类统计表已回填")
+
+        if version < 3:
+            # 与 UNIQUE(content_hash) 的自动索引和分类复合索引重复，只增加写入开销
+            conn.execute('DROP INDEX IF EXISTS idx_content_hash')
+            conn.execute('DROP INDEX IF EXISTS idx_category')
+
+        if version < 4:
+            # 富格式条目：类型列和二进制数据的引用，blob记录MIME类型
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(clipboard_items)')}
+            for name, ddl in (
+                ('content_type', "VARCHAR(10) DEFAULT 'text'"),
+                ('blob_hash', 'VARCHAR(64)'),
+            ):
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE clipboard_items ADD COLUMN {name} {ddl}')
+            blob_columns = {row[1] for row in conn.execute('PRAGMA table_info(content_blobs)')}
+            if 'mime' not in blob_columns:
+                conn.execute('ALTER TABLE content_blobs ADD COLUMN mime VARCHAR(100)')
+            # 删除触发器需要考虑blob_hash引用，之后按新定义重建
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_blob_ad')
+
+        if version < 5:
+            # 外部存储的大内容此前只索引预览，改为索引解压后的完整内容并重建
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_ai')
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_ad')
+            conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_au')
+            conn.execute('DROP TABLE IF EXISTS clipboard_fts')
+            conn.execute('DROP VIEW IF EXISTS clipboard_search')
+
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _initialize_category_stats_triggers(self, conn: sqlite3.Connection):
+        """插入、删除和修改分类/置信度时同步更新category_stats"""
+        add_new = '''
+            INSERT INTO category_stats (category, item_count, confidence_sum)
+            VALUES (new.category, 1, COALESCE(new.confidence, 0))
+            ON CONFLICT(category) DO UPDATE SET
+                item_count = item_count + 1,
+                confidence_sum = confidence_sum + excluded.confidence_sum;
+        '''
+        remove_old = '''
+            UPDATE category_stats
+            SET item_count = item_count - 1,
+                confidence_sum = confidence_sum - COALESCE(old.confidence, 0)
+            WHERE category = old.category;
+        '''
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS category_stats_ai AFTER INSERT ON clipboard_items BEGIN
+                {add_new}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS category_stats_ad AFTER DELETE ON clipboard_items BEGIN
+                {remove_old}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS category_stats_au
+            AFTER UPDATE OF category, confidence ON clipboard_items BEGIN
+                {remove_old}
+                {add_new}
+            END
+        ''')
+
+    def _rebuild_category_stats(self, conn: sqlite3.Connection):
+        conn.execute('DELETE FROM category_stats')
+        conn.execute('''
+            INSERT INTO category_stats (category, item_count, confidence_sum)
+            SELECT category, COUNT(*), COALESCE(SUM(confidence), 0)
+            FROM clipboard_items
+            GROUP BY category
+        ''')
+
+    def rebuild_category_stats(self):
+        """从clipboard_items全量重算分类统计"""
+        try:
+            with self._write() as conn:
+                self._rebuild_category_stats(conn)
+            logger.info("分类统计已重建")
+        except Exception as e:
+            logger.error(f"重建分类统计失败: {e}")
+
+    def check_category_stats(self) -> List[Dict]:
+        """
+        对比汇总表与实际数据
+        返回: 不一致的分类列表，为空表示一致
+        """
+        with self._read() as conn:
+            actual = {
+                row[0]: (row[1], row[2] or 0.0) for row in conn.execute('''
+                    SELECT category, COUNT(*), SUM(confidence)
+                    FROM clipboard_items
+                    GROUP BY category
+                ''')
+            }
+            stored = {
+                row[0]: (row[1], row[2]) for row in conn.execute('''
+                    SELECT category, item_count, confidence_sum
+                    FROM category_stats
+                ''')
+            }
+
+        mismatches = []
+        for category in set(actual) | set(stored):
+            expected_count, expected_sum = actual.get(category, (0, 0.0))
+            count, confidence_sum = stored.get(category, (0, 0.0))
+            if count != expected_count or abs(confidence_sum - expected_sum) > 1e-6:
+                mismatches.append({
+                    'category': category,
+                    'expected_count': expected_count,
+                    'stored_count': count,
+                    'expected_confidence_sum': expected_sum,
+                    'stored_confidence_sum': confidence_sum,
+                })
+        return mismatches
+
+    @staticmethod
+    def _prepare_content(content: str) -> tuple:
+        """
+        计算内容的存储形式
+        返回: (写入clipboard_items的字段, 需要写入content_blobs的数据或None)
+        """
+        data = content.encode('utf-8')
+        fields = {
+            'content': content,
+            'preview': content[:PREVIEW_LENGTH],
+            'content_size': len(data),
+            'is_external': False,
+        }
+        if len(data) <= BLOB_THRESHOLD:
+            return fields, None
+
+        fields['content'] = ''
+        fields['is_external'] = True
+        blob = {'codec': 'zlib', 'size': len(data), 'data': zlib.compress(data, 6)}
+        return fields, blob
+
+    @staticmethod
+    def _prepare_payload(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        计算富格式二进制数据的存储形式
+        图片等已压缩的格式原样保存，文本类格式（如HTML）压缩保存
+        """
+        if not payload or payload.get('data') is None:
+            return None
+        data = payload['data']
+        mime = payload.get('mime') or 'application/octet-stream'
+        compressible = mime.startswith('text/')
+        return {
+            'blob_hash': payload['blob_hash'],
+            'codec': 'zlib' if compressible else 'raw',
+            'size': len(data),
+            'data': zlib.compress(data, 6) if compressible else data,
+            'mime': mime,
+        }
+
+    @staticmethod
+    def _blob_bytes(codec: str, data: bytes) -> bytes:
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        return bytes(data)
+
+    @classmethod
+    def _decode_blob(cls, codec: str, data: bytes) -> str:
+        return cls._blob_bytes(codec, data).decode('utf-8')
+
+    def _load_content(self, conn: sqlite3.Connection, content_hash: str) -> Optional[str]:
+        """读取并解压外部存储的完整内容"""
+        row = conn.execute(
+            'SELECT codec, data FROM content_blobs WHERE content_hash = ?', (content_hash,)
+        ).fetchone()
+        if not row:
+            return None
+        return self._decode_blob(row['codec'], row['data'])
+
+    @staticmethod
+    def _search_text_sql(alias: str) -> str:
+        """条目完整文本的SQL表达式，外部存储的内容从content_blobs解压"""
+        return (f'CASE WHEN {alias}.is_external THEN '
+                f'(SELECT xc_blob_text(b.codec, b.data) FROM content_blobs b '
+                f'WHERE b.content_hash = {alias}.content_hash) '
+                f'ELSE {alias}.content END')
+
+    def _initialize_search_index(self, conn: sqlite3.Connection) -> bool:
+        """
+        创建FTS5全文索引及同步触发器，首次创建时回填已有数据
+        外部存储的大内容按解压后的完整文本索引，写入条目前须先写入content_blobs
+        """
+        conn.execute(f'''
+            CREATE VIEW IF NOT EXISTS clipboard_search AS
+            SELECT id, {self._search_text_sql('clipboard_items')} AS content, category
+            FROM clipboard_items
+        ''')
+
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clipboard_fts'"
+        ).fetchone() is not None
+
+        try:
+            # trigram分词按字符三元组切分，中文子串同样可以命中
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS clipboard_fts USING fts5(
+                    content, category,
+                    content='clipboard_search', content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite不支持FTS5 trigram，搜索将退回LIKE扫描: {e}")
+            return False
+
+        self._create_search_triggers(conn)
+
+        if not exists:
+            conn.execute("INSERT INTO clipboard_fts(clipboard_fts) VALUES ('rebuild')")
+            logger.info("全文索引已回填")
+
+        return True
+
+    def _create_search_triggers(self, conn: sqlite3.Connection):
+        old_text = self._search_text_sql('old')
+        new_text = self._search_text_sql('new')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS clipboard_fts_ai AFTER INSERT ON clipboard_items BEGIN
+                INSERT INTO clipboard_fts(rowid, content, category)
+                VALUES (new.id, {new_text}, new.category);
+            END
+        ''')
+        # 删除前执行：外部内容的blob会在删除后由clipboard_blob_ad清理
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS clipboard_fts_ad BEFORE DELETE ON clipboard_items BEGIN
+                INSERT INTO clipboard_fts(clipboard_fts, rowid, content, category)
+                VALUES ('delete', old.id, {old_text}, old.category);
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS clipboard_fts_au
+            AFTER UPDATE OF content, preview, is_external, category ON clipboard_items BEGIN
+                INSERT INTO clipboard_fts(clipboard_fts, rowid, content, category)
+                VALUES ('delete', old.id, {old_text}, old.category);
+                INSERT INTO clipboard_fts(rowid, content, category)
+                VALUES (new.id, {new_text}, new.category);
+            END
+        ''')
+
+    def _build_search_filter(self, search: str) -> tuple:
+        """
+        将搜索词拆分为FTS匹配表达式和LIKE条件
+        返回: (MATCH表达式或None, 额外WHERE子句列表, 参数列表)
+        """
+        match_terms = []
+        clauses = []
+        params = []
+
+        for term in search.split():
+            if self.fts_enabled and len(term) >= TRIGRAM_MIN_LENGTH:
+                # 作为短语匹配，避免用户输入被解析成FTS语法
+                match_terms.append('"' + term.replace('"', '""') + '"')
+            else:
+                clauses.append(f"({self._search_text_sql('ci')} LIKE ? OR ci.category LIKE ?)")
+                params.extend([f'%{term}%', f'%{term}%'])
+
+        match_expr = ' AND '.join(match_terms) if match_terms else None
+        return match_expr, clauses, params
+
     def add_clipboard_item(self, item: Dict[str, Any]) -> int:
         """添加剪贴板条目"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            fields, blob = self._prepare_content(item['content'])
+            with self._write() as conn:
+                if blob:
+                    conn.execute('''
+                        INSERT OR IGNORE INTO content_blobs (content_hash, codec, size, data)
+                        VALUES (?, ?, ?, ?)
+                    ''', (item['content_hash'], blob['codec'], blob['size'], blob['data']))
                 cursor = conn.execute('''
-                    INSERT INTO clipboard_items 
-                    (content, content_hash, category, confidence, is_sensitive, source_app)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    INSERT INTO clipboard_items
+                    (content, content_hash, category, confidence, is_sensitive, source_app,
+                     preview, content_size, is_external)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    item['content'],
+                    fields['content'],
                     item['content_hash'],
                     item['category'],
                     item['confidence'],
                     item['is_sensitive'],
-                    item['source_app']
+                    item['source_app'],
+                    fields['preview'],
+                    fields['content_size'],
+                    fields['is_external']
                 ))
-                
-                conn.commit()
                 return cursor.lastrowid
-                
-            except Exception as e:
-                logger.error(f"添加剪贴板条目失败: {e}")
-                conn.rollback()
-                return 0
-            finally:
-                conn.close()
-    
+
+        except Exception as e:
+            logger.error(f"添加剪贴板条目失败: {e}")
+            return 0
+
     def content_exists(self, content_hash: str) -> bool:
-        """检查内容是否已存在"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.execute(
-                    'SELECT 1 FROM clipboard_items WHERE content_hash = ?',
-                    (content_hash,)
-                )
-                return cursor.fetchone() is not None
-            finally:
-                conn.close()
-    
+        """检查内容是否已存在（包括尚未刷盘的条目）"""
+        with self._pending_lock:
+            if content_hash in self._pending_inserts:
+                return True
+        with self._read() as conn:
+            cursor = conn.execute(
+                'SELECT 1 FROM clipboard_items WHERE content_hash = ?',
+                (content_hash,)
+            )
+            return cursor.fetchone() is not None
+
     def update_content_access(self, content_hash: str):
         """更新内容访问信息"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._write() as conn:
                 conn.execute('''
-                    UPDATE clipboard_items 
+                    UPDATE clipboard_items
                     SET access_count = access_count + 1,
                         last_accessed = CURRENT_TIMESTAMP
                     WHERE content_hash = ?
                 ''', (content_hash,))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"更新访问信息失败: {e}")
-            finally:
-                conn.close()
-    
-    def get_clipboard_items(self, limit: int = 100, category: str = None, 
+            self._invalidate_items(content_hash=content_hash)
+        except Exception as e:
+            logger.error(f"更新访问信息失败: {e}")
+
+    def get_item(self, item_id: int, with_content: bool = True) -> Optional[Dict]:
+        """
+        按主键获取单个条目（含content_hash），优先命中缓存
+        with_content为True时解压外部存储的完整内容
+        """
+        item = self._cache_get(item_id)
+
+        try:
+            if item is None:
+                generation = self._cache_generation
+                with self._read() as conn:
+                    row = conn.execute(
+                        'SELECT * FROM clipboard_items WHERE id = ?', (item_id,)
+                    ).fetchone()
+                if not row:
+                    return None
+                item = dict(row)
+                # 缓存中只保存行本身，大内容每次按需解压
+                self._cache_put(item, generation)
+
+            if with_content and item['is_external']:
+                with self._read() as conn:
+                    content = self._load_content(conn, item['content_hash'])
+                if content is None:
+                    logger.error(f"条目 {item_id} 的外部内容缺失")
+                    content = item['preview'] or ''
+                item['content'] = content
+            return item
+        except Exception as e:
+            logger.error(f"获取条目失败: {e}")
+            return None
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        """按content_hash获取完整内容"""
+        try:
+            with self._read() as conn:
+                row = conn.execute(
+                    'SELECT content, is_external FROM clipboard_items WHERE content_hash = ?',
+                    (content_hash,)
+                ).fetchone()
+                if not row:
+                    return None
+                if row['is_external']:
+                    return self._load_content(conn, content_hash)
+                return row['content']
+        except Exception as e:
+            logger.error(f"获取内容失败: {e}")
+            return None
+
+    def get_blob(self, blob_hash: str) -> Optional[tuple]:
+        """
+        按blob_hash获取富格式条目的二进制数据（包括尚未刷盘的条目）
+        返回: (data, mime) 或 None
+        """
+        with self._pending_lock:
+            for pending in self._pending_inserts.values():
+                payload = pending.get('payload')
+                if payload and payload['blob_hash'] == blob_hash:
+                    return self._blob_bytes(payload['codec'], payload['data']), payload['mime']
+        try:
+            with self._read() as conn:
+                row = conn.execute(
+                    'SELECT codec, data, mime FROM content_blobs WHERE content_hash = ?', (blob_hash,)
+                ).fetchone()
+            if not row:
+                return None
+            return self._blob_bytes(row['codec'], row['data']), row['mime'] or 'application/octet-stream'
+        except Exception as e:
+            logger.error(f"获取二进制内容失败: {e}")
+            return None
+
+    def blob_referenced(self, blob_hash: str) -> bool:
+        """是否仍有条目引用该blob，用于丢弃已删除条目的缩略图任务"""
+        with self._pending_lock:
+            if any(p.get('blob_hash') == blob_hash for p in self._pending_inserts.values()):
+                return True
+        with self._read() as conn:
+            return conn.execute(
+                'SELECT 1 FROM clipboard_items WHERE blob_hash = ?', (blob_hash,)
+            ).fetchone() is not None
+
+    def get_thumbnail(self, blob_hash: str) -> Optional[tuple]:
+        """返回: (data, mime) 或 None"""
+        try:
+            with self._read() as conn:
+                row = conn.execute(
+                    'SELECT data, mime FROM thumbnails WHERE blob_hash = ?', (blob_hash,)
+                ).fetchone()
+            return (bytes(row['data']), row['mime']) if row else None
+        except Exception as e:
+            logger.error(f"获取缩略图失败: {e}")
+            return None
+
+    def save_thumbnail(self, blob_hash: str, mime: str, width: int, height: int, data: bytes):
+        """保存缩略图"""
+        try:
+            with self._write() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO thumbnails (blob_hash, mime, width, height, data)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (blob_hash, mime, width, height, data))
+        except Exception as e:
+            logger.error(f"保存缩略图失败: {e}")
+
+    def get_items(self, item_ids: List[int], with_content: bool = True) -> List[Dict]:
+        """按主键批量获取条目，按传入顺序返回，不存在的id会被跳过"""
+        found = {}
+        missing = []
+        for item_id in dict.fromkeys(item_ids):
+            cached = self._cache_get(item_id)
+            if cached is not None:
+                found[item_id] = cached
+            else:
+                missing.append(item_id)
+
+        try:
+            generation = self._cache_generation
+            with self._read() as conn:
+                for start in range(0, len(missing), IN_QUERY_CHUNK):
+                    chunk = missing[start:start + IN_QUERY_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor = conn.execute(
+                        f'SELECT * FROM clipboard_items WHERE id IN ({placeholders})', chunk
+                    )
+                    for row in cursor.fetchall():
+                        found[row['id']] = dict(row)
+            for item_id in missing:
+                if item_id in found:
+                    self._cache_put(found[item_id], generation)
+
+            external = [item for item in found.values() if item['is_external']]
+            if with_content and external:
+                hashes = list({item['content_hash'] for item in external})
+                contents = {}
+                with self._read() as conn:
+                    for start in range(0, len(hashes), IN_QUERY_CHUNK):
+                        chunk = hashes[start:start + IN_QUERY_CHUNK]
+                        placeholders = ','.join('?' * len(chunk))
+                        cursor = conn.execute(f'''
+                            SELECT content_hash, codec, data FROM content_blobs
+                            WHERE content_hash IN ({placeholders})
+                        ''', chunk)
+                        for row in cursor.fetchall():
+                            contents[row['content_hash']] = self._decode_blob(row['codec'], row['data'])
+                for item in external:
+                    item['content'] = contents.get(item['content_hash'], item['preview'] or '')
+        except Exception as e:
+            logger.error(f"批量获取条目失败: {e}")
+
+        return [found[item_id] for item_id in dict.fromkeys(item_ids) if item_id in found]
+
+    @staticmethod
+    def encode_cursor(kind: str, key: Any, item_id: int) -> str:
+        """编码分页游标，对客户端不透明"""
+        raw = json.dumps([kind, key, item_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """解码分页游标，格式非法时抛出ValueError"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            kind, key, item_id = json.loads(base64.urlsafe_b64decode(padded))
+            if kind not in ('t', 'r') or not isinstance(item_id, int):
+                raise ValueError
+            return kind, key, item_id
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+
+    def get_clipboard_items(self, limit: int = 100, category: str = None,
                           search: str = None) -> List[Dict]:
         """获取剪贴板条目"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            try:
-                query = '''
-                    SELECT id, content, category, confidence, is_sensitive, 
-                           is_favorite, source_app, created_at, access_count, last_accessed
-                    FROM clipboard_items
+        return self.get_clipboard_items_page(limit, category, search)['items']
+
+    def get_clipboard_items_page(self, limit: int = 100, category: str = None,
+                                 search: str = None, cursor: str = None) -> Dict:
+        """
+        按游标分页获取剪贴板条目
+        无搜索词时按 (last_accessed, id) 倒序，带搜索词时按bm25相关度排序并附带高亮片段
+        limit 按调用方给定的值查询，不做上限收紧；对外接口的上限 MAX_PAGE_SIZE 在路由中校验
+        返回: {'items': [...], 'next_cursor': str或None}
+        """
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"每页条数必须大于0: {limit}")
+        after = self.decode_cursor(cursor) if cursor else None
+
+        try:
+            columns = '''
+                ci.id, ci.preview, ci.content_size, ci.category, ci.confidence, ci.is_sensitive,
+                ci.is_favorite, ci.source_app, ci.created_at, ci.access_count, ci.last_accessed,
+                ci.content_type, ci.blob_hash,
+                (SELECT mime FROM content_blobs WHERE content_hash = ci.blob_hash) AS blob_mime,
+                (ci.is_external OR length(ci.content) > length(ci.preview)) AS preview_truncated
+            '''
+            match_expr, clauses, params = (None, [], [])
+            if search and search.strip():
+                match_expr, clauses, params = self._build_search_filter(search)
+
+            if match_expr:
+                query = f'''
+                    SELECT {columns}, clipboard_fts.rank AS rank,
+                           snippet(clipboard_fts, 0, ?, ?, '…', 48) AS snippet
+                    FROM clipboard_fts
+                    JOIN clipboard_items ci ON ci.id = clipboard_fts.rowid
+                    WHERE clipboard_fts MATCH ?
+                '''
+                params = [SNIPPET_START, SNIPPET_END, match_expr] + params
+            else:
+                query = f'''
+                    SELECT {columns}
+                    FROM clipboard_items ci
                     WHERE 1=1
                 '''
-                params = []
-                
-                if category:
-                    query += ' AND category = ?'
-                    params.append(category)
-                
-                if search:
-                    query += ' AND (content LIKE ? OR category LIKE ?)'
-                    search_param = f'%{search}%'
-                    params.extend([search_param, search_param])
-                
-                query += ' ORDER BY last_accessed DESC LIMIT ?'
-                params.append(limit)
-                
-                cursor = conn.execute(query, params)
-                return [dict(row) for row in cursor.fetchall()]
-                
-            except Exception as e:
-                logger.error(f"获取剪贴板条目失败: {e}")
-                return []
-            finally:
-                conn.close()
-    
+
+            for clause in clauses:
+                query += f' AND {clause}'
+
+            if category:
+                query += ' AND ci.category = ?'
+                params.append(category)
+
+            if after:
+                kind, key, item_id = after
+                if match_expr and kind == 'r':
+                    query += ' AND (clipboard_fts.rank, ci.id) > (?, ?)'
+                elif not match_expr and kind == 't':
+                    query += ' AND (ci.last_accessed, ci.id) < (?, ?)'
+                else:
+                    raise ValueError(f"分页游标与查询条件不匹配: {cursor}")
+                params.extend([key, item_id])
+
+            if match_expr:
+                query += ' ORDER BY clipboard_fts.rank, ci.id LIMIT ?'
+            else:
+                query += ' ORDER BY ci.last_accessed DESC, ci.id DESC LIMIT ?'
+            # 多取一行用于判断是否还有下一页
+            params.append(limit + 1)
+
+            with self._read() as conn:
+                cursor_ = conn.execute(query, params)
+                rows = [dict(row) for row in cursor_.fetchall()]
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                if match_expr:
+                    next_cursor = self.encode_cursor('r', last['rank'], last['id'])
+                else:
+                    next_cursor = self.encode_cursor('t', last['last_accessed'], last['id'])
+
+            for row in rows:
+                row.pop('rank', None)
+                # 预览是否截断按字符判断，前端不能用字节数content_size与预览长度比较
+                row['preview_truncated'] = bool(row['preview_truncated'])
+
+            return {'items': rows, 'next_cursor': next_cursor}
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"获取剪贴板条目失败: {e}")
+            return {'items': [], 'next_cursor': None}
+
     def update_item_category(self, item_id: int, category: str):
         """更新条目分类"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._write() as conn:
                 conn.execute(
                     'UPDATE clipboard_items SET category = ? WHERE id = ?',
                     (category, item_id)
                 )
-                conn.commit()
-            except Exception as e:
-                logger.error(f"更新条目分类失败: {e}")
-            finally:
-                conn.close()
-    
+            self._invalidate_items([item_id])
+        except Exception as e:
+            logger.error(f"更新条目分类失败: {e}")
+
+    def get_item_ids_by_category(self, category: str, limit: int = 1000,
+                                 include_sensitive: bool = False) -> List[int]:
+        """按id顺序获取某分类下的条目id，用于批量补分类"""
+        try:
+            sql = 'SELECT id FROM clipboard_items WHERE category = ?'
+            if not include_sensitive:
+                sql += ' AND is_sensitive = 0'
+            sql += ' ORDER BY id LIMIT ?'
+            with self._read() as conn:
+                return [row[0] for row in conn.execute(sql, (category, limit)).fetchall()]
+        except Exception as e:
+            logger.error(f"获取分类条目失败: {e}")
+            return []
+
+    def update_category_by_hash(self, content_hash: str, category: str, confidence: float,
+                                only_if: Optional[str] = None) -> bool:
+        """
+        按内容hash回写分类结果，条目仍在写缓冲中时直接修改缓冲
+        only_if: 仅当当前分类等于该值时更新，避免覆盖用户手动修改的分类
+        返回: 是否有条目被更新
+        """
+        with self._pending_lock:
+            pending = self._pending_inserts.get(content_hash)
+            if pending:
+                if only_if is not None and pending['category'] != only_if:
+                    return False
+                pending['category'] = category
+                pending['confidence'] = confidence
+                return True
+
+        try:
+            sql = 'UPDATE clipboard_items SET category = ?, confidence = ? WHERE content_hash = ?'
+            params = [category, confidence, content_hash]
+            if only_if is not None:
+                sql += ' AND category = ?'
+                params.append(only_if)
+            with self._write() as conn:
+                updated = conn.execute(sql, params).rowcount
+            if updated:
+                self._invalidate_items(content_hash=content_hash)
+            return bool(updated)
+        except Exception as e:
+            logger.error(f"回写分类结果失败: {e}")
+            return False
+
     def toggle_favorite(self, item_id: int) -> bool:
         """切换收藏状态"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._write() as conn:
                 # 获取当前状态
                 cursor = conn.execute(
                     'SELECT is_favorite FROM clipboard_items WHERE id = ?',
@@ -192,138 +1195,535 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 if not row:
                     return False
-                
+
                 new_status = not bool(row[0])
                 conn.execute(
                     'UPDATE clipboard_items SET is_favorite = ? WHERE id = ?',
                     (new_status, item_id)
                 )
-                conn.commit()
-                return new_status
-            except Exception as e:
-                logger.error(f"切换收藏状态失败: {e}")
-                return False
-            finally:
-                conn.close()
-    
+            self._invalidate_items([item_id])
+            return new_status
+        except Exception as e:
+            logger.error(f"切换收藏状态失败: {e}")
+            return False
+
     def delete_item(self, item_id: int):
         """删除条目"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._write() as conn:
                 conn.execute('DELETE FROM clipboard_items WHERE id = ?', (item_id,))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"删除条目失败: {e}")
-            finally:
-                conn.close()
-    
-    def cleanup_old_items(self, days: int = 30):
+            self._invalidate_items([item_id])
+        except Exception as e:
+            logger.error(f"删除条目失败: {e}")
+
+    def cleanup_old_items(self, days: int = 30) -> int:
         """清理旧条目"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cutoff_date = datetime.now() - timedelta(days=days)
+        # created_at 由 CURRENT_TIMESTAMP 写入，为UTC时间
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        return self.delete_expired_items(cutoff)
+
+    def delete_expired_items(self, cutoff: str, batch_size: int = DELETE_BATCH_SIZE,
+                             pause: float = 0.0) -> int:
+        """
+        按id区间分批删除created_at早于cutoff的非收藏条目
+        每批一个短事务，批次之间释放写锁
+        返回: 删除的条数
+        """
+        deleted = 0
+        last_id = 0
+        try:
+            while True:
+                with self._write() as conn:
+                    ids = [row[0] for row in conn.execute('''
+                        SELECT id FROM clipboard_items
+                        WHERE id > ? AND created_at < ? AND is_favorite = FALSE
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (last_id, cutoff, batch_size))]
+                    if not ids:
+                        break
+                    conn.execute(
+                        'DELETE FROM clipboard_items WHERE id BETWEEN ? AND ? '
+                        'AND created_at < ? AND is_favorite = FALSE',
+                        (ids[0], ids[-1], cutoff)
+                    )
+                deleted += len(ids)
+                last_id = ids[-1]
+                self._invalidate_items(ids)
+                if pause:
+                    time.sleep(pause)
+        except Exception as e:
+            logger.error(f"清理旧条目失败: {e}")
+        return deleted
+
+    def delete_least_recent_items(self, count: int, batch_size: int = DELETE_BATCH_SIZE,
+                                  pause: float = 0.0) -> int:
+        """
+        分批删除最久未访问的非收藏条目，用于容量配额
+        返回: 删除的条数
+        """
+        deleted = 0
+        try:
+            while deleted < count:
+                with self._write() as conn:
+                    ids = [row[0] for row in conn.execute('''
+                        SELECT id FROM clipboard_items
+                        WHERE is_favorite = FALSE
+                        ORDER BY last_accessed, id
+                        LIMIT ?
+                    ''', (min(batch_size, count - deleted),))]
+                    if not ids:
+                        break
+                    placeholders = ','.join('?' * len(ids))
+                    conn.execute(f'DELETE FROM clipboard_items WHERE id IN ({placeholders})', ids)
+                deleted += len(ids)
+                self._invalidate_items(ids)
+                if pause:
+                    time.sleep(pause)
+        except Exception as e:
+            logger.error(f"按配额清理条目失败: {e}")
+        return deleted
+
+    def count_items(self, include_favorites: bool = True) -> int:
+        """统计条目数"""
+        query = 'SELECT COUNT(*) FROM clipboard_items'
+        if not include_favorites:
+            query += ' WHERE is_favorite = FALSE'
+        with self._read() as conn:
+            return conn.execute(query).fetchone()[0]
+
+    def get_storage_info(self) -> Dict[str, int]:
+        """数据库文件占用信息（字节）"""
+        with self._read() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        wal_size = 0
+        if self.db_path != ':memory:':
+            wal_path = Path(self.db_path + '-wal')
+            if wal_path.exists():
+                wal_size = wal_path.stat().st_size
+        return {
+            'db_bytes': page_size * page_count,
+            'free_bytes': page_size * freelist,
+            'wal_bytes': wal_size,
+        }
+
+    def optimize_search_index(self):
+        """合并全文索引段，使已删除条目占用的索引空间真正释放"""
+        if not self.fts_enabled:
+            return
+        try:
+            with self._write() as conn:
+                conn.execute("INSERT INTO clipboard_fts(clipboard_fts) VALUES ('optimize')")
+        except Exception as e:
+            logger.error(f"优化全文索引失败: {e}")
+
+    def incremental_vacuum(self, pages: int = 0) -> int:
+        """
+        回收空闲页，pages为0时回收全部
+        返回: 回收的字节数
+        """
+        try:
+            with self.lock:
+                page_size = self._writer.execute('PRAGMA page_size').fetchone()[0]
+                before = self._writer.execute('PRAGMA freelist_count').fetchone()[0]
+                # incremental_vacuum每次step只释放一页，execute只会step一次，
+                # executescript会执行到结束
+                self._writer.commit()
+                self._writer.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+                after = self._writer.execute('PRAGMA freelist_count').fetchone()[0]
+                # 把回收结果写回主库文件，文件尺寸才会真正变小
+                self._writer.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+            return (before - after) * page_size
+        except Exception as e:
+            logger.error(f"增量回收失败: {e}")
+            return 0
+
+    def iter_export_rows(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        按id顺序流式导出全部条目（含完整内容）
+        使用独立的只读连接逐批读取，内存占用与总条数无关
+        """
+        if self.reader_count == 0:
+            with self._read() as conn:
+                yield from self._iter_export(conn, batch_size)
+            return
+
+        conn = self._connect_reader()
+        try:
+            yield from self._iter_export(conn, batch_size)
+        finally:
+            conn.close()
+
+    def _iter_export(self, conn: sqlite3.Connection, batch_size: int) -> Iterator[Dict]:
+        cursor = conn.execute('''
+            SELECT ci.content, ci.content_hash, ci.category, ci.confidence,
+                   ci.is_sensitive, ci.is_favorite, ci.source_app, ci.created_at,
+                   ci.updated_at, ci.access_count, ci.last_accessed, ci.is_external,
+                   ci.content_type, ci.blob_hash,
+                   b.codec, b.data,
+                   p.codec AS payload_codec, p.data AS payload_data, p.mime AS payload_mime
+            FROM clipboard_items ci
+            LEFT JOIN content_blobs b
+                ON ci.is_external AND b.content_hash = ci.content_hash
+            LEFT JOIN content_blobs p
+                ON ci.blob_hash IS NOT NULL AND p.content_hash = ci.blob_hash
+            ORDER BY ci.id
+        ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                item = dict(row)
+                codec = item.pop('codec')
+                data = item.pop('data')
+                if item.pop('is_external') and data is not None:
+                    item['content'] = self._decode_blob(codec, data)
+                # 富格式的二进制数据以base64随条目导出
+                payload_codec = item.pop('payload_codec')
+                payload_data = item.pop('payload_data')
+                payload_mime = item.pop('payload_mime')
+                if payload_data is not None:
+                    item['blob'] = {
+                        'mime': payload_mime,
+                        'data': base64.b64encode(self._blob_bytes(payload_codec, payload_data)).decode('ascii'),
+                    }
+                elif not item['blob_hash']:
+                    item.pop('blob_hash')
+                item['is_sensitive'] = bool(item['is_sensitive'])
+                item['is_favorite'] = bool(item['is_favorite'])
+                yield item
+
+    def import_items(self, items: Iterable[Dict]) -> Dict[str, int]:
+        """
+        在一个事务内批量导入条目，content_hash已存在的条目跳过
+        富格式条目的blob为导出时的 {'mime', 'data'(base64)}，哈希不符的数据丢弃
+        返回: {'imported': 新增条数, 'skipped': 重复条数}
+        """
+        rows = []
+        blobs = []
+        categories = set()
+        for item in items:
+            fields, blob = self._prepare_content(item['content'])
+            content_hash = item['content_hash']
+            if blob:
+                blobs.append((content_hash, blob['codec'], blob['size'], blob['data'], None))
+            content_type = item.get('content_type') or 'text'
+            payload = self._import_payload(item)
+            if payload:
+                blobs.append((payload['blob_hash'], payload['codec'], payload['size'],
+                              payload['data'], payload['mime']))
+                if content_type == 'image':
+                    fields['content_size'] = payload['size']
+            category = item.get('category') or '未分类'
+            categories.add(category)
+            rows.append((
+                fields['content'], content_hash, category,
+                item.get('confidence', 0.0), bool(item.get('is_sensitive', False)),
+                bool(item.get('is_favorite', False)), item.get('source_app'),
+                item.get('created_at'), item.get('updated_at'),
+                item.get('access_count', 1), item.get('last_accessed'),
+                fields['preview'], fields['content_size'], fields['is_external'],
+                content_type, payload['blob_hash'] if payload else None,
+            ))
+
+        bulk = len(rows) >= BULK_IMPORT_THRESHOLD
+        with self._write() as conn:
+            # 全文索引从content_blobs读取外部内容，blob须先于条目写入
+            conn.executemany('''
+                INSERT OR IGNORE INTO content_blobs (content_hash, codec, size, data, mime)
+                VALUES (?, ?, ?, ?, ?)
+            ''', blobs)
+            if bulk:
+                # 大批量导入时暂停逐行触发器，插入后按id区间一次性补齐全文索引和分类统计；
+                # DDL与插入在同一事务内，其他写入无法穿插
+                max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM clipboard_items').fetchone()[0]
+                conn.execute('DROP TRIGGER IF EXISTS clipboard_fts_ai')
+                conn.execute('DROP TRIGGER IF EXISTS category_stats_ai')
+
+            cursor = conn.executemany('''
+                INSERT INTO clipboard_items
+                (content, content_hash, category, confidence, is_sensitive, is_favorite,
+                 source_app, created_at, updated_at, access_count, last_accessed,
+                 preview, content_size, is_external, content_type, blob_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?,
+                        COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP),
+                        ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO NOTHING
+            ''', rows)
+            # rowcount只统计语句本身插入的行，不含触发器的修改
+            imported = cursor.rowcount
+
+            if bulk:
+                if self.fts_enabled:
+                    conn.execute('''
+                        INSERT INTO clipboard_fts(rowid, content, category)
+                        SELECT id, content, category FROM clipboard_search WHERE id > ?
+                    ''', (max_id,))
+                    self._create_search_triggers(conn)
                 conn.execute('''
-                    DELETE FROM clipboard_items 
-                    WHERE created_at < ? AND is_favorite = FALSE
-                ''', (cutoff_date,))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"清理旧条目失败: {e}")
-            finally:
-                conn.close()
-    
+                    INSERT INTO category_stats (category, item_count, confidence_sum)
+                    SELECT category, COUNT(*), COALESCE(SUM(confidence), 0)
+                    FROM clipboard_items
+                    WHERE id > ?
+                    GROUP BY category
+                    ON CONFLICT(category) DO UPDATE SET
+                        item_count = item_count + excluded.item_count,
+                        confidence_sum = confidence_sum + excluded.confidence_sum
+                ''', (max_id,))
+                self._initialize_category_stats_triggers(conn)
+            conn.executemany('INSERT OR IGNORE INTO categories (name) VALUES (?)',
+                             [(c,) for c in categories])
+
+        return {'imported': imported, 'skipped': len(rows) - imported}
+
+    def _import_payload(self, item: Dict) -> Optional[Dict[str, Any]]:
+        """解码导入条目中的富格式数据，缺失、无法解码或与blob_hash不符时返回None"""
+        blob = item.get('blob')
+        blob_hash = item.get('blob_hash')
+        if not isinstance(blob, dict) or not blob_hash:
+            return None
+        try:
+            data = base64.b64decode(blob['data'], validate=True)
+        except Exception:
+            logger.warning(f"条目 {item['content_hash'][:12]} 的二进制数据无法解码，已忽略")
+            return None
+        if hashlib.sha256(data).hexdigest() != blob_hash:
+            logger.warning(f"条目 {item['content_hash'][:12]} 的二进制数据与哈希不符，已忽略")
+            return None
+        return self._prepare_payload({'blob_hash': blob_hash, 'mime': blob.get('mime'), 'data': data})
+
     def add_category_if_not_exists(self, category_name: str):
         """添加分类（如果不存在）"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._write() as conn:
                 conn.execute('''
                     INSERT OR IGNORE INTO categories (name) VALUES (?)
                 ''', (category_name,))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"添加分类失败: {e}")
-            finally:
-                conn.close()
-    
+        except Exception as e:
+            logger.error(f"添加分类失败: {e}")
+
+    def get_category_names(self) -> List[str]:
+        """获取所有分类名称，不含统计"""
+        try:
+            with self._read() as conn:
+                return [row[0] for row in conn.execute('SELECT name FROM categories ORDER BY name')]
+        except Exception as e:
+            logger.error(f"获取分类失败: {e}")
+            return []
+
+    def rename_category(self, old_name: str, new_name: str) -> bool:
+        """
+        重命名分类并迁移条目，新名称已存在时合并到已有分类
+        分类统计由触发器随条目更新
+        """
+        self.flush()
+        try:
+            with self._write() as conn:
+                exists = conn.execute('SELECT 1 FROM categories WHERE name = ?', (new_name,)).fetchone()
+                if exists:
+                    conn.execute('DELETE FROM categories WHERE name = ?', (old_name,))
+                else:
+                    conn.execute('UPDATE categories SET name = ? WHERE name = ?', (new_name, old_name))
+                conn.execute('UPDATE clipboard_items SET category = ? WHERE category = ?',
+                             (new_name, old_name))
+            self._invalidate_items()
+            return True
+        except Exception as e:
+            logger.error(f"重命名分类失败: {e}")
+            return False
+
+    def delete_centroid(self, category: str):
+        """删除一个分类的本地模型质心"""
+        try:
+            with self._write() as conn:
+                conn.execute('DELETE FROM classifier_centroids WHERE category = ?', (category,))
+        except Exception as e:
+            logger.error(f"删除分类模型失败: {e}")
+
     def get_all_categories(self) -> List[Dict]:
         """获取所有分类"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            try:
+        try:
+            with self._read() as conn:
                 cursor = conn.execute('''
-                    SELECT c.*, COUNT(ci.id) as item_count
+                    SELECT c.*, COALESCE(s.item_count, 0) as item_count
                     FROM categories c
-                    LEFT JOIN clipboard_items ci ON c.name = ci.category
-                    GROUP BY c.id, c.name
+                    LEFT JOIN category_stats s ON s.category = c.name
                     ORDER BY c.name
                 ''')
                 return [dict(row) for row in cursor.fetchall()]
-            except Exception as e:
-                logger.error(f"获取分类失败: {e}")
-                return []
-            finally:
-                conn.close()
-    
+        except Exception as e:
+            logger.error(f"获取分类失败: {e}")
+            return []
+
     def get_classification_stats(self) -> Dict:
         """获取分类统计"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._read() as conn:
                 cursor = conn.execute('''
-                    SELECT category, COUNT(*) as count, AVG(confidence) as avg_confidence
-                    FROM clipboard_items
-                    GROUP BY category
+                    SELECT category, item_count as count,
+                           confidence_sum / item_count as avg_confidence
+                    FROM category_stats
+                    WHERE item_count > 0
                     ORDER BY count DESC
                 ''')
-                
-                stats = {}
-                for row in cursor.fetchall():
-                    stats[row[0]] = {
-                        'count': row[1],
-                        'avg_confidence': round(row[2] or 0, 2)
-                    }
-                
-                return stats
-            except Exception as e:
-                logger.error(f"获取分类统计失败: {e}")
-                return {}
-            finally:
-                conn.close()
-    
+                rows = cursor.fetchall()
+
+            stats = {}
+            for row in rows:
+                stats[row[0]] = {
+                    'count': row[1],
+                    'avg_confidence': round(row[2] or 0, 2)
+                }
+
+            return stats
+        except Exception as e:
+            logger.error(f"获取分类统计失败: {e}")
+            return {}
+
     def get_setting(self, key: str, default: Any = None) -> Any:
         """获取设置"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
+        try:
+            with self._read() as conn:
                 cursor = conn.execute('SELECT value FROM settings WHERE key = ?', (key,))
                 row = cursor.fetchone()
-                if row:
-                    try:
-                        return json.loads(row[0])
-                    except:
-                        return row[0]
-                return default
-            except Exception as e:
-                logger.error(f"获取设置失败: {e}")
-                return default
-            finally:
-                conn.close()
-    
+            if row:
+                try:
+                    return json.loads(row[0])
+                except:
+                    return row[0]
+            return default
+        except Exception as e:
+            logger.error(f"获取设置失败: {e}")
+            return default
+
     def set_setting(self, key: str, value: Any):
         """设置配置"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                value_str = json.dumps(value) if not isinstance(value, str) else value
+        try:
+            value_str = json.dumps(value) if not isinstance(value, str) else value
+            with self._write() as conn:
                 conn.execute('''
                     INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
                 ''', (key, value_str))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"设置配置失败: {e}")
-            finally:
-                conn.close()
\ No newline at end of file
+        except Exception as e:
+            logger.error(f"设置配置失败: {e}")
+
+    def get_all_settings(self) -> Dict[str, Any]:
+        """一次读取全部设置"""
+        settings = {}
+        try:
+            with self._read() as conn:
+                rows = conn.execute('SELECT key, value FROM settings').fetchall()
+            for key, value in rows:
+                try:
+                    settings[key] = json.loads(value)
+                except:
+                    settings[key] = value
+        except Exception as e:
+            logger.error(f"读取设置失败: {e}")
+        return settings
+
+    def set_settings(self, values: Dict[str, Any]) -> bool:
+        """在一个事务内写入多项设置"""
+        try:
+            rows = [
+                (key, json.dumps(value) if not isinstance(value, str) else value)
+                for key, value in values.items()
+            ]
+            with self._write() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO settings (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', rows)
+            return True
+        except Exception as e:
+            logger.error(f"批量设置配置失败: {e}")
+            return False
+
+    def get_cached_classification(self, cache_key: str) -> Optional[tuple]:
+        """
+        读取分类缓存并刷新使用时间
+        last_used 只用于淘汰，距上次刷新超过 CACHE_TOUCH_INTERVAL 时才放入写缓冲随下次刷盘更新，
+        命中路径不获取写锁
+        返回: (分类名称, 置信度)，未命中返回None
+        """
+        try:
+            with self._read() as conn:
+                row = conn.execute('''
+                    SELECT category, confidence, last_used < datetime('now', ?) AS stale
+                    FROM classification_cache WHERE cache_key = ?
+                ''', (f'-{CACHE_TOUCH_INTERVAL} seconds', cache_key)).fetchone()
+            if not row:
+                return None
+            if row['stale']:
+                with self._pending_lock:
+                    self._pending_cache_touches.add(cache_key)
+            return row['category'], row['confidence']
+        except Exception as e:
+            logger.error(f"读取分类缓存失败: {e}")
+            return None
+
+    def put_cached_classification(self, cache_key: str, category: str, confidence: float):
+        """写入分类缓存"""
+        try:
+            with self._write() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO classification_cache (cache_key, category, confidence)
+                    VALUES (?, ?, ?)
+                ''', (cache_key, category, confidence))
+        except Exception as e:
+            logger.error(f"写入分类缓存失败: {e}")
+
+    def evict_classification_cache(self, max_entries: int, ttl_days: int) -> int:
+        """
+        删除超过TTL的缓存，并按最近使用时间淘汰超出容量的部分
+        返回: 删除的条数
+        """
+        try:
+            cutoff = (datetime.utcnow() - timedelta(days=ttl_days)).strftime('%Y-%m-%d %H:%M:%S')
+            with self._write() as conn:
+                removed = conn.execute(
+                    'DELETE FROM classification_cache WHERE last_used < ?', (cutoff,)
+                ).rowcount
+                removed += conn.execute('''
+                    DELETE FROM classification_cache WHERE cache_key IN (
+                        SELECT cache_key FROM classification_cache
+                        ORDER BY last_used DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                ''', (max_entries,)).rowcount
+            return removed
+        except Exception as e:
+            logger.error(f"清理分类缓存失败: {e}")
+            return 0
+
+    def count_cached_classifications(self) -> int:
+        with self._read() as conn:
+            return conn.execute('SELECT COUNT(*) FROM classification_cache').fetchone()[0]
+
+    def load_centroids(self) -> List[tuple]:
+        """读取本地分类模型的质心: [(分类名称, 样本数, 权重bytes)]"""
+        try:
+            with self._read() as conn:
+                cursor = conn.execute('SELECT category, examples, weights FROM classifier_centroids')
+                return [(row['category'], row['examples'], row['weights']) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"读取分类模型失败: {e}")
+            return []
+
+    def save_centroid(self, category: str, examples: int, weights: bytes):
+        """保存一个分类的质心"""
+        try:
+            with self._write() as conn:
+                conn.execute('''
+                    INSERT INTO classifier_centroids (category, examples, weights)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(category) DO UPDATE SET
+                        examples = excluded.examples,
+                        weights = excluded.weights,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (category, examples, weights))
+        except Exception as e:
+            logger.error(f"保存分类模型失败: {e}")
@@ -0,0 +1,277 @@
+# src/core/ingest_pipeline.py
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 阶段队列满时的处理方式
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+class _StageCounters:
+    """单个阶段的计数和耗时统计"""
+
+    def __init__(self):
+        self.received = 0
+        self.processed = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.merged = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+
+    def record(self, elapsed: float):
+        self.processed += 1
+        self.busy_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'dropped': self.dropped,
+            'merged': self.merged,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'avg_ms': round(self.busy_seconds * 1000 / self.processed, 2) if self.processed else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 2),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'max_depth': self.max_depth,
+        }
+
+class PipelineStage:
+    """
+    有界队列 + 单个工作线程的处理阶段
+    handler 返回 None 表示条目在本阶段结束，否则把返回值交给下游阶段。
+    队列满时按 policy 处理：block 让上游等待（背压），drop_oldest / drop_newest 丢弃条目
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], max_size: int = 64,
+                 policy: str = "block"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"未知的队列策略: {policy}")
+        self.name = name
+        self.handler = handler
+        self.max_size = max(1, int(max_size))
+        self.policy = policy
+        self.downstream: Optional["PipelineStage"] = None
+        self.counters = _StageCounters()
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"ingest-{self.name}")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """停止接收新条目，处理完队列中剩余的条目后退出"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def put(self, item: Any) -> bool:
+        """放入条目；block 策略下队列满时等待，返回False表示条目被丢弃"""
+        with self._cond:
+            self.counters.received += 1
+            if len(self._queue) >= self.max_size:
+                if self.policy == "drop_newest":
+                    self.counters.dropped += 1
+                    return False
+                if self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.counters.dropped += 1
+                else:
+                    # 上游在此等待，等待时间计入上游的 blocked_seconds
+                    while len(self._queue) >= self.max_size and self.running:
+                        self._cond.wait(timeout=0.2)
+                    if not self.running:
+                        self.counters.dropped += 1
+                        return False
+            self._queue.append(item)
+            self.counters.max_depth = max(self.counters.max_depth, len(self._queue))
+            self._cond.notify_all()
+            return True
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and self.running:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                item = self._queue.popleft()
+                # 唤醒因队列满而等待的上游
+                self._cond.notify_all()
+
+            started = time.monotonic()
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                self.counters.errors += 1
+                logger.error(f"入库阶段 {self.name} 处理失败: {e}")
+                result = None
+            self.counters.record(time.monotonic() - started)
+
+            if result is not None and self.downstream is not None:
+                started = time.monotonic()
+                if self.downstream.put(result):
+                    self.counters.emitted += 1
+                self.counters.blocked_seconds += time.monotonic() - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.counters.as_dict()
+        stats.update({'depth': self.depth(), 'max_size': self.max_size, 'policy': self.policy})
+        return stats
+
+class CoalescingStage:
+    """
+    合并窗口：短时间内连续写入的剪贴板只保留最后一个值
+    内容静止 window 秒后才交给下游；持续改写时最迟 max_delay 秒交出一次。
+    submit 从不阻塞，下游背压期间到达的新值同样合并为最新值
+    """
+
+    name = "capture"
+
+    def __init__(self, window: float = 0.3, max_delay: float = 2.0):
+        self.window = window
+        self.max_delay = max_delay
+        self.downstream: Optional[PipelineStage] = None
+        self.counters = _StageCounters()
+        self._pending: Any = None
+        self._has_pending = False
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def set_window_ms(self, window_ms: int):
+        with self._cond:
+            self.window = max(0, int(window_ms)) / 1000
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ingest-capture")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """停止合并，尚未交出的最新值立即交给下游"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def submit(self, item: Any):
+        now = time.monotonic()
+        with self._cond:
+            self.counters.received += 1
+            if self._has_pending:
+                self.counters.merged += 1
+            else:
+                self._first_at = now
+            self._pending = item
+            self._has_pending = True
+            self._last_at = now
+            self.counters.max_depth = max(self.counters.max_depth, 1)
+            self._cond.notify_all()
+
+    def _take_when_ready(self) -> Any:
+        """等待待交出的值静止或达到最大延迟；停止且没有待交出的值时返回None"""
+        with self._cond:
+            while True:
+                if self._has_pending:
+                    now = time.monotonic()
+                    due = min(self._last_at + self.window, self._first_at + self.max_delay)
+                    if now >= due or not self.running:
+                        item = self._pending
+                        self._pending = None
+                        self._has_pending = False
+                        return item
+                    self._cond.wait(timeout=due - now)
+                elif not self.running:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            item = self._take_when_ready()
+            if item is None:
+                return
+            self.counters.record(0.0)
+            if self.downstream is not None:
+                started = time.monotonic()
+                if self.downstream.put(item):
+                    self.counters.emitted += 1
+                self.counters.blocked_seconds += time.monotonic() - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.counters.as_dict()
+        with self._cond:
+            stats.update({'depth': 1 if self._has_pending else 0, 'window_ms': int(self.window * 1000),
+                          'max_delay_ms': int(self.max_delay * 1000), 'policy': 'merge'})
+        return stats
+
+class IngestPipeline:
+    """
+    剪贴板入库流水线：capture → 合并窗口 → 各处理阶段
+    各阶段由有界队列连接、各自一个线程，停止时按上游到下游的顺序排空
+    """
+
+    def __init__(self, coalescer: CoalescingStage, stages: List[PipelineStage],
+                 extra_stats: Optional[Dict[str, Callable[[], Dict]]] = None):
+        self.coalescer = coalescer
+        self.stages = stages
+        # 流水线之外的下游（如分类队列）的统计
+        self.extra_stats = extra_stats or {}
+        upstream: Any = coalescer
+        for stage in stages:
+            upstream.downstream = stage
+            upstream = stage
+
+    def start(self):
+        for stage in reversed(self.stages):
+            stage.start()
+        self.coalescer.start()
+
+    def stop(self, timeout: float = 5):
+        self.coalescer.stop(timeout)
+        for stage in self.stages:
+            stage.stop(timeout)
+
+    def submit(self, item: Any):
+        self.coalescer.submit(item)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {self.coalescer.name: self.coalescer.get_stats()}
+        for stage in self.stages:
+            stats[stage.name] = stage.get_stats()
+        for name, getter in self.extra_stats.items():
+            try:
+                stats[name] = getter()
+            except Exception as e:
+                logger.error(f"获取 {name} 统计失败: {e}")
+        return stats
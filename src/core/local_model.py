@@ -0,0 +1,174 @@
+# src/core/local_model.py
+import logging
+import re
+import threading
+from typing import Container, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 1 << 14         # 哈希特征维数
+NGRAM_SIZES = (1, 2, 3)      # 字符n-gram长度
+MAX_CHARS = 1024             # 参与特征计算的最大字符数（首尾各一半）
+MIN_EXAMPLES = 3             # 分类至少有多少条样本才参与预测
+TEMPERATURE = 0.05           # 余弦相似度转概率时的温度
+MIN_SIMILARITY = 0.3         # 与最近质心的相似度低于该值时按比例降低置信度
+LOCAL_CONFIDENCE_THRESHOLD = 0.85
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# 64位乘法哈希的常数
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+class LocalClassifier:
+    """
+    本地增量分类模型
+    使用哈希字符n-gram特征和最近质心分类：每个分类保存样本特征之和，
+    预测时取与内容余弦相似度最高的质心。用户每次手动修改分类即为一条样本，
+    学习只需更新一个分类的质心，并持久化到数据库
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self._lock = threading.Lock()
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._labels: List[str] = []
+        self._matrix: Optional[np.ndarray] = None  # 归一化后的质心矩阵
+        self.predictions = 0
+        self.confident = 0
+        self._load()
+
+    def _load(self):
+        for category, examples, weights in self.db.load_centroids():
+            vector = np.frombuffer(weights, dtype=np.float32)
+            if vector.shape[0] != N_FEATURES:
+                logger.warning(f"忽略维数不符的质心: {category}")
+                continue
+            self._sums[category] = vector.copy()
+            self._counts[category] = examples
+        self._rebuild_matrix()
+        if self._counts:
+            logger.info(f"本地分类模型已加载: {len(self._counts)} 个分类，{sum(self._counts.values())} 条样本")
+
+    @staticmethod
+    def featurize(content: str) -> np.ndarray:
+        """内容转为L2归一化的哈希n-gram词频向量"""
+        text = WHITESPACE_RE.sub(' ', content.strip()).lower()
+        if len(text) > MAX_CHARS:
+            half = MAX_CHARS // 2
+            text = text[:half] + ' ' + text[-half:]
+
+        vector = np.zeros(N_FEATURES, dtype=np.float32)
+        if not text:
+            return vector
+
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        indices = []
+        with np.errstate(over='ignore'):
+            for size in NGRAM_SIZES:
+                if len(codes) < size:
+                    break
+                h = np.full(len(codes) - size + 1, size, dtype=np.uint64)
+                for offset in range(size):
+                    h = (h * _MULTIPLIER) ^ codes[offset:len(codes) - size + 1 + offset]
+                h = (h ^ (h >> np.uint64(31))) * _MIX
+                indices.append((h >> np.uint64(40)) % np.uint64(N_FEATURES))
+
+        counts = np.bincount(np.concatenate(indices).astype(np.intp), minlength=N_FEATURES)
+        vector = np.log1p(counts).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def _rebuild_matrix(self):
+        # 调用方持有 self._lock 或处于初始化阶段
+        labels = [c for c, n in self._counts.items() if n >= MIN_EXAMPLES]
+        if not labels:
+            self._labels, self._matrix = [], None
+            return
+        matrix = np.stack([self._sums[c] for c in labels])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._labels, self._matrix = labels, matrix / norms
+
+    def predict(self, content: str, categories: Optional[Container[str]] = None) -> Optional[Tuple[str, float]]:
+        """
+        预测分类
+        categories: 当前存在的分类，已删除分类的质心不参与预测
+        返回: (分类名称, 置信度)，样本不足时返回None
+        """
+        with self._lock:
+            labels, matrix = self._labels, self._matrix
+        if matrix is None:
+            return None
+        if categories is not None:
+            keep = [i for i, label in enumerate(labels) if label in categories]
+            if len(keep) < len(labels):
+                labels = [labels[i] for i in keep]
+                matrix = matrix[keep]
+        # 只有一个分类时无法区分，不作判断
+        if len(labels) < 2:
+            return None
+
+        scores = matrix @ self.featurize(content)
+        weights = np.exp((scores - scores.max()) / TEMPERATURE)
+        probabilities = weights / weights.sum()
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+        # 与所有分类都不相似的内容不应因微小差异得到高置信度
+        top = float(scores[best])
+        if top < MIN_SIMILARITY:
+            confidence *= max(0.0, top) / MIN_SIMILARITY
+
+        with self._lock:
+            self.predictions += 1
+            if confidence >= LOCAL_CONFIDENCE_THRESHOLD:
+                self.confident += 1
+        return labels[best], round(confidence, 3)
+
+    def learn(self, content: str, category: str):
+        """加入一条样本，只更新对应分类的质心"""
+        vector = self.featurize(content)
+        with self._lock:
+            total = self._sums.get(category)
+            if total is None:
+                total = np.zeros(N_FEATURES, dtype=np.float32)
+            total = total + vector
+            self._sums[category] = total
+            self._counts[category] = self._counts.get(category, 0) + 1
+            examples = self._counts[category]
+            self._rebuild_matrix()
+        self.db.save_centroid(category, examples, total.astype(np.float32).tobytes())
+
+    def rename_category(self, old: str, new: str):
+        """分类重命名或合并时迁移质心"""
+        with self._lock:
+            total = self._sums.pop(old, None)
+            examples = self._counts.pop(old, 0)
+            if total is None:
+                return
+            if new in self._sums:
+                total = self._sums[new] + total
+                examples += self._counts[new]
+            self._sums[new] = total
+            self._counts[new] = examples
+            self._rebuild_matrix()
+        self.db.save_centroid(new, examples, total.astype(np.float32).tobytes())
+        self.db.delete_centroid(old)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'examples': sum(self._counts.values()),
+                'categories': dict(self._counts),
+                'active_categories': len(self._labels),
+                'predictions': self.predictions,
+                'confident_predictions': self.confident,
+                'threshold': LOCAL_CONFIDENCE_THRESHOLD,
+            }
@@ -0,0 +1,320 @@
+# src/core/mock_backend.py
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .content_digest import DIGEST_HEADER_PREFIX, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+Answer = Union[str, Callable[[str], str]]
+
+BATCH_BLOCK_RE = re.compile(r'^\[(\d+)\]\n(.*?)(?=\n\n\[\d+\]\n|\n\n请只回复)', re.S | re.M)
+SINGLE_CONTENT_RE = re.compile(r'待分类内容：\n(.*?)\n\n请按以下格式回复', re.S)
+CHUNK_CHARS = 2  # 模拟流式输出时每个片段的字符数
+
+class ScriptedResponder:
+    """
+    按脚本生成模型回答
+    answers: 内容原文 -> 回答（精确匹配）
+    rules: [(正则, 回答)]，按顺序匹配内容，回答可以是字符串或 内容 -> 字符串 的函数
+    未匹配时使用 default。批量提示词按序号拆开逐条作答并组装成JSON
+    """
+
+    def __init__(self, answers: Optional[Dict[str, str]] = None,
+                 rules: Optional[Sequence[Tuple[str, Answer]]] = None,
+                 default: str = "文本内容|0.5"):
+        self.answers = dict(answers or {})
+        self.rules = [(re.compile(pattern, re.S), answer) for pattern, answer in (rules or [])]
+        self.default = default
+
+    def answer_content(self, content: str) -> str:
+        if content in self.answers:
+            return self.answers[content]
+        for pattern, answer in self.rules:
+            if pattern.search(content):
+                return answer(content) if callable(answer) else answer
+        return self.default
+
+    def __call__(self, prompt: str) -> str:
+        blocks = BATCH_BLOCK_RE.findall(prompt)
+        if blocks:
+            return json.dumps({index: self.answer_content(self._untruncate(content))
+                               for index, content in blocks}, ensure_ascii=False)
+        match = SINGLE_CONTENT_RE.search(prompt)
+        return self.answer_content(self._untruncate(match.group(1)) if match else prompt)
+
+    def _untruncate(self, content: str) -> str:
+        # 提示词中的长内容是摘要（见 core.content_digest），用开头片段找回原文
+        if content in self.answers or not content.startswith(DIGEST_HEADER_PREFIX):
+            return content
+        head = content.split('\n', 1)[-1].split('\n……', 1)[0].rstrip()
+        for original in self.answers:
+            if original.strip().startswith(head):
+                return original
+        return content
+
+class MockModel:
+    """
+    模型行为替身：延迟、故障注入和脚本化回答
+    latency: 首个片段前的延迟（秒）；token_latency: 之后每个片段的延迟
+    failure_rate: 随机故障概率；failure_mode: error（请求失败）、garbage（无法解析的输出）、
+    hang（超过调用方超时）
+    """
+
+    def __init__(self, responder: Optional[Callable[[str], str]] = None, latency: float = 0.0,
+                 token_latency: float = 0.0, failure_rate: float = 0.0,
+                 failure_mode: str = "error", seed: Optional[int] = None):
+        if failure_mode not in ("error", "garbage", "hang"):
+            raise ValueError(f"未知的故障模式: {failure_mode}")
+        self.responder = responder or ScriptedResponder()
+        self.latency = latency
+        self.token_latency = token_latency
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._forced_failures = 0
+        self.stats = {'requests': 0, 'failures': 0, 'stopped_early': 0,
+                      'prompt_tokens': 0, 'completion_tokens': 0}
+
+    def fail_next(self, count: int = 1):
+        """让接下来的 count 次请求失败"""
+        with self._lock:
+            self._forced_failures += count
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def plan(self, prompt: str) -> Optional[str]:
+        """
+        决定本次请求的结果并等待首个片段延迟
+        返回: 回答文本；请求失败时返回None，hang 模式返回后由调用方继续等待
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['prompt_tokens'] += estimate_tokens(prompt)
+            failed = self._forced_failures > 0 or (
+                self.failure_rate > 0 and self._random.random() < self.failure_rate)
+            if self._forced_failures > 0:
+                self._forced_failures -= 1
+            if failed:
+                self.stats['failures'] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if not failed:
+            return self.responder(prompt)
+        if self.failure_mode == "garbage":
+            return "抱歉，我无法完成这个请求。"
+        return None
+
+    def chunks(self, answer: str) -> List[str]:
+        return [answer[i:i + CHUNK_CHARS] for i in range(0, len(answer), CHUNK_CHARS)] or [""]
+
+    def record_completion(self, text: str, stopped_early: bool):
+        with self._lock:
+            self.stats['completion_tokens'] += estimate_tokens(text) if text else 0
+            if stopped_early:
+                self.stats['stopped_early'] += 1
+
+class MockBackend:
+    """进程内的分类后端替身，实现 core.backend.ClassifierBackend"""
+
+    def __init__(self, model: Optional[MockModel] = None, **model_options):
+        self.model = model or MockModel(**model_options)
+
+    def health(self) -> bool:
+        return True
+
+    def generate(self, prompt: str, max_tokens: int = 100, timeout: float = 30,
+                 stop_when: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        answer = self.model.plan(prompt)
+        if answer is None:
+            if self.model.failure_mode == "hang":
+                time.sleep(timeout)
+            return None
+
+        text = ""
+        stopped = False
+        for index, chunk in enumerate(self.model.chunks(answer)):
+            if index and self.model.token_latency:
+                time.sleep(self.model.token_latency)
+            text += chunk
+            if stop_when and stop_when(text):
+                stopped = True
+                break
+        self.model.record_completion(text, stopped)
+        return text.strip()
+
+    def generate_batch(self, prompts: List[str], max_tokens: int = 100, timeout: float = 30,
+                       stop_when: Optional[Callable[[str], bool]] = None) -> List[Optional[str]]:
+        return [self.generate(prompt, max_tokens, timeout, stop_when) for prompt in prompts]
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前停止读取后关闭了keep-alive连接
+            pass
+
+    def _send_json(self, status: int, data: Dict):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.server.model_name, "size": 0}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "invalid json"})
+            return
+
+        model: MockModel = self.server.model
+        prompt = payload.get("prompt", "")
+        answer = model.plan(prompt)
+        if answer is None:
+            if model.failure_mode == "hang":
+                time.sleep(self.server.hang_seconds)
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        prompt_tokens = estimate_tokens(prompt)
+        if not payload.get("stream", True):
+            model.record_completion(answer, False)
+            self._send_json(200, {"model": payload.get("model"), "response": answer, "done": True,
+                                  "prompt_eval_count": prompt_tokens,
+                                  "eval_count": estimate_tokens(answer)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        sent = ""
+        try:
+            for index, chunk in enumerate(model.chunks(answer)):
+                if index and model.token_latency:
+                    time.sleep(model.token_latency)
+                self._write_chunk({"model": payload.get("model"), "response": chunk, "done": False})
+                sent += chunk
+            self._write_chunk({"model": payload.get("model"), "response": "", "done": True,
+                               "prompt_eval_count": prompt_tokens,
+                               "eval_count": estimate_tokens(answer)})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            model.record_completion(sent, False)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前停止读取
+            model.record_completion(sent, True)
+            self.close_connection = True
+
+    def _write_chunk(self, data: Dict):
+        line = json.dumps(data, ensure_ascii=False).encode('utf-8') + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+class MockOllamaServer:
+    """
+    本地HTTP替身服务，实现 Ollama 的 /api/generate（流式与非流式）和 /api/tags，
+    可以直接替换 OllamaManager 的 ollama_url 做离线测试和基准测试
+    """
+
+    def __init__(self, model: Optional[MockModel] = None, host: str = "127.0.0.1", port: int = 0,
+                 model_name: str = "qwen3:0.6b", hang_seconds: float = 60, **model_options):
+        self.model = model or MockModel(**model_options)
+        self._server = ThreadingHTTPServer((host, port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.model = self.model
+        self._server.model_name = model_name
+        self._server.hang_seconds = hang_seconds
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """在后台线程中启动服务，返回服务地址"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Ollama替身服务已启动: {self.url}")
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XenonClip 的 Ollama 替身服务")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.0, help="首个片段前的延迟（秒）")
+    parser.add_argument('--token-latency', type=float, default=0.0, help="每个片段的延迟（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="随机故障概率")
+    parser.add_argument('--failure-mode', choices=("error", "garbage", "hang"), default="error")
+    parser.add_argument('--answers', help="JSON文件：内容原文 -> 回答")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    answers = None
+    if args.answers:
+        with open(args.answers, encoding='utf-8') as f:
+            answers = json.load(f)
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockOllamaServer(host=args.host, port=args.port,
+                              responder=ScriptedResponder(answers=answers),
+                              latency=args.latency, token_latency=args.token_latency,
+                              failure_rate=args.failure_rate, failure_mode=args.failure_mode,
+                              seed=args.seed)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
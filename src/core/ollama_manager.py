@@ -1,18 +1,35 @@
 # src/core/ollama_manager.py
 import subprocess
 import sys
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+POOL_SIZE = 8  # 连接池大小，也是批量生成的最大并发数
+
 class OllamaManager:
-    def __init__(self):
-        self.model_name = "qwen3:0.6b"  # 使用更小的模型
-        self.ollama_url = "http://localhost:11434"
+    """Ollama 环境管理，同时作为分类器的默认生成后端（见 core.backend）"""
+    
+    def __init__(self, ollama_url: str = "http://localhost:11434", model_name: str = "qwen3:0.6b"):
+        self.model_name = model_name  # 使用更小的模型
+        self.ollama_url = ollama_url.rstrip("/")
+        
+        # 复用keep-alive连接，避免每次分类重新建立TCP连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.think_supported = True  # 模型不支持 think 参数时自动关闭
+        # 流式响应的结束方式，提前结束的连接不会回到连接池
+        self._stats_lock = threading.Lock()
+        self._stream_stats = {'completed': 0, 'stopped_early': 0, 'timed_out': 0}
         
     def check_ollama_installed(self) -> bool:
         """检查Ollama是否已安装"""
@@ -66,7 +83,7 @@ class OllamaManager:
     def check_ollama_running(self) -> bool:
         """检查Ollama服务是否运行"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -92,7 +109,7 @@ class OllamaManager:
     def check_model_exists(self) -> bool:
         """检查模型是否存在"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags")
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 return any(model['name'] == self.model_name for model in models)
@@ -102,6 +119,11 @@ class OllamaManager:
     
     async def initialize(self) -> bool:
         """初始化Ollama环境"""
+        # 服务已在运行且模型已存在（包括远程或替身服务）时无需安装和启动
+        if self.check_ollama_running() and self.check_model_exists():
+            logger.info("Ollama服务已就绪")
+            return True
+        
         # 1. 检查安装
         if not self.check_ollama_installed():
             if not self.install_ollama():
@@ -119,41 +141,120 @@ class OllamaManager:
         logger.info("Ollama环境初始化完成")
         return True
     
-    def generate_response(self, prompt: str) -> Optional[str]:
-        """调用模型生成响应"""
-        try:
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,  # 降低随机性，提高分类一致性
-                    "top_p": 0.9,
-                    "max_tokens": 100
-                }
+    def health(self) -> bool:
+        """后端是否可用"""
+        return self.check_ollama_running()
+    
+    def generate(self, prompt: str, max_tokens: int = 100, timeout: float = 30,
+                 stop_when: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        调用模型生成响应
+        以流式方式读取输出，stop_when 对已生成的文本（去除思考内容后）返回True时立即停止，
+        不再等待模型生成剩余部分
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": 0.1,  # 降低随机性，提高分类一致性
+                "top_p": 0.9,
+                "num_predict": max_tokens  # 生成token上限
             }
-            
-            response = requests.post(
+        }
+        if self.think_supported:
+            payload["think"] = False
+        
+        try:
+            response = self.session.post(
                 f"{self.ollama_url}/api/generate",
                 json=payload,
-                timeout=30
+                stream=True,
+                timeout=timeout
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                raw_response = result.get('response', '')
-                
-                # 移除思考内容
-                cleaned_response = self._remove_thinking_tags(raw_response)
-                return cleaned_response.strip()
-            else:
+            # 旧版本或不支持思考模式的模型会拒绝 think 参数，去掉后重试
+            if response.status_code == 400 and "think" in payload and "think" in response.text.lower():
+                response.close()
+                self.think_supported = False
+                logger.info("模型不支持 think 参数，已关闭")
+                return self.generate(prompt, max_tokens, timeout, stop_when)
+            
+            if response.status_code != 200:
                 logger.error(f"模型调用失败: {response.status_code}")
+                response.close()
                 return None
+            
+            return self._read_stream(response, time.monotonic() + timeout, stop_when)
                 
         except Exception as e:
             logger.error(f"调用模型时发生错误: {e}")
             return None
     
+    def generate_batch(self, prompts: List[str], max_tokens: int = 100, timeout: float = 30,
+                       stop_when: Optional[Callable[[str], bool]] = None) -> List[Optional[str]]:
+        """在连接池范围内并发生成多条响应，结果与 prompts 顺序一致"""
+        if not prompts:
+            return []
+        with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(prompts))) as executor:
+            return list(executor.map(
+                lambda prompt: self.generate(prompt, max_tokens, timeout, stop_when), prompts
+            ))
+    
+    def _read_stream(self, response, deadline: float,
+                     stop_when: Optional[Callable[[str], bool]]) -> Optional[str]:
+        """
+        逐行读取流式响应，满足停止条件、生成结束或超时后返回
+        提前结束时直接关闭连接而不读完剩余内容：Ollama在客户端断开后才停止生成，
+        读完会让模型继续生成到 num_predict 上限，比重新建立一次本地连接的代价大得多。
+        因此每次提前结束都会丢弃一个keep-alive连接，次数见 get_stats
+        """
+        parts = []
+        outcome = 'completed'
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                parts.append(chunk.get('response', ''))
+                if chunk.get('done'):
+                    # 继续读到流结束，使连接可以回到连接池
+                    continue
+                
+                text = "".join(parts)
+                # 思考内容未结束前不做判断
+                if stop_when and not self._has_open_thinking(text) and \
+                        stop_when(self._remove_thinking_tags(text)):
+                    outcome = 'stopped_early'
+                    break
+                
+                if time.monotonic() > deadline:
+                    logger.warning("模型响应超时，使用已生成的部分")
+                    outcome = 'timed_out'
+                    break
+        finally:
+            # 读完的连接回到连接池；提前停止时连接被关闭，服务端随之中止生成
+            response.close()
+            with self._stats_lock:
+                self._stream_stats[outcome] += 1
+        
+        # 移除思考内容
+        cleaned_response = self._remove_thinking_tags("".join(parts))
+        return cleaned_response.strip()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """流式响应的结束方式统计，stopped_early 与 timed_out 之和即丢弃的连接数"""
+        with self._stats_lock:
+            return dict(self._stream_stats)
+    
+    @staticmethod
+    def _has_open_thinking(text: str) -> bool:
+        lowered = text.lower()
+        for tag in ('think', 'thinking', 'thought'):
+            if lowered.count(f'<{tag}>') > lowered.count(f'</{tag}>'):
+                return True
+        return False
+    
     def _remove_thinking_tags(self, text: str) -> str:
         """移除思考标签内容"""
         import re
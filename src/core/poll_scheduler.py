@@ -0,0 +1,148 @@
+# src/core/poll_scheduler.py
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOCK_CHECK_INTERVAL = 5.0   # 锁屏状态的检查间隔（秒），锁屏期间也按此间隔唤醒
+RESUME_GAP = 30.0           # 两次唤醒间隔超出预期这么多秒时视为从睡眠中恢复
+
+class AdaptivePollScheduler:
+    """
+    自适应轮询间隔
+    检测到变化后在 burst_window 秒内保持最短间隔，以免漏掉连续复制；
+    之后每次无变化时间隔乘以 backoff，直到 max_interval。
+    锁屏时暂停轮询；从睡眠恢复后回到基础间隔
+    """
+
+    def __init__(self, min_interval: float = 0.1, base_interval: float = 0.5,
+                 max_interval: float = 5.0, backoff: float = 1.5, burst_window: float = 10.0,
+                 lock_probe: Optional[Callable[[], bool]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 < min_interval <= base_interval <= max_interval:
+            raise ValueError("需要 0 < min_interval <= base_interval <= max_interval")
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.burst_window = burst_window
+        self.lock_probe = lock_probe
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.interval = base_interval
+        self._last_activity: Optional[float] = None
+        self._last_wakeup: Optional[float] = None
+        self._expected_wait = base_interval
+        self._locked = False
+        self._lock_checked: Optional[float] = None
+        self._stats = {'wakeups': 0, 'polls': 0, 'changes': 0, 'paused_wakeups': 0,
+                       'resumes': 0, 'total_wait': 0.0}
+
+    def should_poll(self) -> bool:
+        """每次唤醒时调用：返回本次是否应该检查剪贴板（锁屏时不检查）"""
+        now = self._clock()
+        with self._lock:
+            self._stats['wakeups'] += 1
+            if self._last_wakeup is not None and now - self._last_wakeup > self._expected_wait + RESUME_GAP:
+                # 唤醒间隔远超预期：系统刚从睡眠恢复
+                self._stats['resumes'] += 1
+                self.interval = self.base_interval
+                self._lock_checked = None
+            self._last_wakeup = now
+            check_lock = self.lock_probe and (
+                self._lock_checked is None or now - self._lock_checked >= LOCK_CHECK_INTERVAL)
+
+        if check_lock:
+            locked = self._probe_locked()
+            with self._lock:
+                if locked != self._locked:
+                    logger.info("检测到锁屏，暂停剪贴板轮询" if locked else "已解锁，恢复剪贴板轮询")
+                    if not locked:
+                        self.interval = self.base_interval
+                self._locked = locked
+                self._lock_checked = now
+
+        with self._lock:
+            if self._locked:
+                self._stats['paused_wakeups'] += 1
+                return False
+            self._stats['polls'] += 1
+            return True
+
+    def _probe_locked(self) -> bool:
+        try:
+            return bool(self.lock_probe())
+        except Exception as e:
+            logger.debug(f"检查锁屏状态失败: {e}")
+            return False
+
+    def next_interval(self, changed: bool = False) -> float:
+        """根据本次检查结果计算到下次唤醒的等待时间"""
+        now = self._clock()
+        with self._lock:
+            if self._locked:
+                wait = LOCK_CHECK_INTERVAL
+            else:
+                if changed:
+                    self._stats['changes'] += 1
+                    self._last_activity = now
+                    self.interval = self.min_interval
+                elif self._last_activity is not None and now - self._last_activity < self.burst_window:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.max_interval, max(self.min_interval, self.interval * self.backoff))
+                wait = self.interval
+            self._expected_wait = wait
+            self._stats['total_wait'] += wait
+            return wait
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            wakeups = self._stats['wakeups']
+            return {
+                **self._stats,
+                'total_wait': round(self._stats['total_wait'], 3),
+                'interval': round(self.interval, 3),
+                'avg_interval': round(self._stats['total_wait'] / wakeups, 3) if wakeups else 0.0,
+                'paused': self._locked,
+                'min_interval': self.min_interval,
+                'max_interval': self.max_interval,
+            }
+
+def _windows_locked() -> bool:
+    import ctypes
+    user32 = ctypes.windll.user32
+    desktop_switchdesktop = 0x0100
+    # 锁屏时输入桌面切换为安全桌面，无法打开或切换
+    desktop = user32.OpenInputDesktop(0, False, desktop_switchdesktop)
+    if not desktop:
+        return True
+    try:
+        return not user32.SwitchDesktop(desktop)
+    finally:
+        user32.CloseDesktop(desktop)
+
+def _logind_locked() -> bool:
+    session = os.environ.get("XDG_SESSION_ID")
+    args = ["loginctl", "show-session", "-p", "LockedHint", "--value"]
+    if session:
+        args.insert(2, session)
+    else:
+        args.insert(2, "self")
+    result = subprocess.run(args, capture_output=True, text=True, timeout=2)
+    return result.stdout.strip() == "yes"
+
+def default_lock_probe() -> Optional[Callable[[], bool]]:
+    """返回当前平台的锁屏检测函数，不支持时返回None"""
+    if sys.platform == "win32":
+        return _windows_locked
+    if sys.platform.startswith("linux") and shutil.which("loginctl"):
+        return _logind_locked
+    return None
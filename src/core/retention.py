@@ -0,0 +1,180 @@
+# src/core/retention.py
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from .database import DatabaseManager
+from .settings import SettingsStore
+
+logger = logging.getLogger(__name__)
+
+class RetentionManager:
+    """
+    后台数据保留任务
+    定期删除过期的非收藏条目，并按数据库大小和条目数配额淘汰最久未访问的条目，
+    删除后通过增量vacuum回收空间
+    """
+
+    def __init__(self, db_manager: DatabaseManager, settings: SettingsStore,
+                 interval: float = 3600, initial_delay: float = 60):
+        self.db = db_manager
+        self.interval = interval            # 执行间隔（秒）
+        self.initial_delay = initial_delay  # 启动后首次执行的延迟（秒）
+        self.batch_pause = 0.05             # 批次之间让出写锁的时间（秒）
+
+        self.retention_days = 30
+        self.max_db_size_mb = 0
+        self.max_items = 0
+
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._run_lock = threading.Lock()
+        self._vacuum_warned = False
+        self._last_report: Dict[str, Any] = {}
+        self._totals = {'runs': 0, 'expired_deleted': 0, 'quota_deleted': 0, 'reclaimed_bytes': 0}
+
+        # 当前值直接读取；只有之后的变更才提前唤醒任务，不打断启动时的首次延迟
+        self._set_retention_days(settings.get('retention_days', self.retention_days))
+        self._set_max_db_size(settings.get('max_db_size_mb', self.max_db_size_mb))
+        self._set_max_items(settings.get('max_items', self.max_items))
+        settings.subscribe('retention_days', self._on_retention_days, fire_immediately=False)
+        settings.subscribe('max_db_size_mb', self._on_max_db_size, fire_immediately=False)
+        settings.subscribe('max_items', self._on_max_items, fire_immediately=False)
+
+    def _set_retention_days(self, value: int):
+        self.retention_days = max(1, int(value))
+
+    def _set_max_db_size(self, value: int):
+        self.max_db_size_mb = max(0, int(value))
+
+    def _set_max_items(self, value: int):
+        self.max_items = max(0, int(value))
+
+    def _on_retention_days(self, value: int):
+        self._set_retention_days(value)
+        self._wakeup.set()
+
+    def _on_max_db_size(self, value: int):
+        self._set_max_db_size(value)
+        self._wakeup.set()
+
+    def _on_max_items(self, value: int):
+        self._set_max_items(value)
+        self._wakeup.set()
+
+    def start(self):
+        """启动后台任务"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info("数据保留任务已启动")
+
+    def stop(self):
+        """停止后台任务"""
+        self.running = False
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("数据保留任务已停止")
+
+    def _run_loop(self):
+        # 首次执行前等待，避免与启动时的其他IO抢占；设置变更会提前唤醒
+        self._wakeup.wait(self.initial_delay)
+        while self.running:
+            self._wakeup.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"数据保留任务失败: {e}")
+            self._wakeup.wait(self.interval)
+
+    def run_once(self) -> Dict[str, Any]:
+        """执行一次清理并返回本次报告"""
+        with self._run_lock:
+            started = time.perf_counter()
+            self.db.flush()
+
+            cutoff = (datetime.utcnow() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+            expired = self.db.delete_expired_items(cutoff, pause=self.batch_pause)
+
+            quota_deleted = 0
+            if self.max_items:
+                excess = self.db.count_items(include_favorites=False) - self.max_items
+                if excess > 0:
+                    quota_deleted += self.db.delete_least_recent_items(excess, pause=self.batch_pause)
+
+            if expired or quota_deleted:
+                self.db.optimize_search_index()
+            # 切换增量回收模式需要完整VACUUM并阻塞写入，后台任务只提示，由用户主动执行
+            vacuum_mode = self.db.incremental_vacuum_enabled()
+            if not vacuum_mode and not self._vacuum_warned:
+                self._vacuum_warned = True
+                logger.warning("数据库未启用增量回收模式，删除后空间无法回收；"
+                               "请在空闲时运行 `main.py vacuum` 或调用 POST /api/maintenance/vacuum（期间暂停写入）")
+            reclaimed = self.db.incremental_vacuum() if vacuum_mode else 0
+
+            if self.max_db_size_mb:
+                limit = self.max_db_size_mb * 1024 * 1024
+                quota_deleted_size, reclaimed_size = self._enforce_size_limit(limit)
+                quota_deleted += quota_deleted_size
+                reclaimed += reclaimed_size
+
+            storage = self.db.get_storage_info()
+            report = {
+                'last_run': datetime.now().isoformat(timespec='seconds'),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                'retention_days': self.retention_days,
+                'expired_deleted': expired,
+                'quota_deleted': quota_deleted,
+                'reclaimed_bytes': reclaimed,
+                'incremental_vacuum': vacuum_mode,
+                'db_bytes': storage['db_bytes'],
+                'wal_bytes': storage['wal_bytes'],
+            }
+
+            self._totals['runs'] += 1
+            self._totals['expired_deleted'] += expired
+            self._totals['quota_deleted'] += quota_deleted
+            self._totals['reclaimed_bytes'] += reclaimed
+            self._last_report = report
+
+            if expired or quota_deleted:
+                logger.info(f"数据保留: 删除过期 {expired} 条, 超配额 {quota_deleted} 条, 回收 {reclaimed} 字节")
+            return report
+
+    def _enforce_size_limit(self, limit_bytes: int) -> tuple:
+        """
+        淘汰最久未访问的条目直到数据库大小低于上限
+        返回: (删除条数, 回收字节数)
+        """
+        deleted = 0
+        reclaimed = 0
+        while True:
+            storage = self.db.get_storage_info()
+            used = storage['db_bytes'] - storage['free_bytes']
+            if used <= limit_bytes:
+                break
+
+            # 按平均行大小估算需要删除的条数，每轮最多删除十分之一
+            total = self.db.count_items(include_favorites=False)
+            if total == 0:
+                break
+            per_row = max(1, used // max(1, self.db.count_items()))
+            count = max(1, min(total // 10 or 1, (used - limit_bytes) // per_row + 1))
+
+            removed = self.db.delete_least_recent_items(count, pause=self.batch_pause)
+            if removed == 0:
+                break
+            deleted += removed
+            self.db.optimize_search_index()
+            reclaimed += self.db.incremental_vacuum()
+        return deleted, reclaimed
+
+    def get_report(self) -> Dict[str, Any]:
+        """最近一次执行的报告及累计数据"""
+        return {'last': dict(self._last_report), 'totals': dict(self._totals)}
@@ -0,0 +1,119 @@
+# src/core/rule_classifier.py
+import json
+import re
+from typing import Optional, Tuple
+
+# 规则分类结果达到该置信度时不再调用大模型
+RULE_CONFIDENCE_THRESHOLD = 0.8
+
+# 单行内容的规则只检查这么长的文本，更长的不可能是链接/邮箱/号码
+MAX_TOKEN_LENGTH = 2048
+# 代码启发式只扫描开头部分
+CODE_SCAN_LENGTH = 4000
+
+URL_RE = re.compile(r'^(?:https?|ftp)://[^\s/$.?#][^\s]*$', re.IGNORECASE)
+WWW_RE = re.compile(r'^www\.[\w-]+(?:\.[\w-]+)+(?:[/?#]\S*)?$', re.IGNORECASE)
+EMAIL_RE = re.compile(r'^[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}$', re.IGNORECASE)
+
+WINDOWS_PATH_RE = re.compile(r'^(?:[a-z]:\\|\\\\[\w.$-]+\\)[^\n<>"|?*]*$', re.IGNORECASE)
+UNIX_PATH_RE = re.compile(r'^(?:~|\.{1,2})?/[^\s]*[^\s/]$|^(?:~|\.{1,2})?/(?:[^/\s]+/)+$')
+IMAGE_EXT_RE = re.compile(r'\.(?:png|jpe?g|gif|bmp|webp|svg|ico|tiff?|heic|psd)$', re.IGNORECASE)
+
+PHONE_RE = re.compile(r'^(?:\+?86[- ]?)?1[3-9]\d(?:[- ]?\d{4}){2}$')
+LANDLINE_RE = re.compile(r'^(?:\(?0\d{2,3}\)?[- ]?)?\d{7,8}$')
+ID_CARD_RE = re.compile(r'^\d{17}[\dXx]$')
+BANK_CARD_RE = re.compile(r'^\d{4}(?:[- ]?\d{4}){3}(?:\d{1,3})?$')
+DATE_RE = re.compile(
+    r'^(?:\d{4}[-/.年]\d{1,2}[-/.月]\d{1,2}日?)?\s*(?:\d{1,2}[:：]\d{2}(?:[:：]\d{2})?)?$'
+)
+NUMERIC_RE = re.compile(r'^[+-]?[\d,. \-/:]*\d[\d,. \-/:]*$')
+
+CODE_KEYWORD_RE = re.compile(
+    r'^\s*(?:def |class |import |from \S+ import |function |const |let |var |public |private |'
+    r'#include|package |using |return\b|if\s*\(|for\s*\(|while\s*\(|SELECT\b|INSERT\b|UPDATE\b|'
+    r'CREATE\b|<\?php|<!DOCTYPE|<html|\$ |#!/)',
+    re.MULTILINE | re.IGNORECASE
+)
+CODE_SYMBOL_RE = re.compile(r'(?:[{};]\s*$|=>|->|::|\)\s*\{|==|!=|&&|\|\|)', re.MULTILINE)
+
+class RuleClassifier:
+    """
+    基于正则和启发式的快速分类器
+    只处理特征明确的内容，无法确定时返回None交给大模型
+    """
+
+    def classify(self, content: str) -> Optional[Tuple[str, float]]:
+        """
+        快速分类
+        返回: (分类名称, 置信度)，无匹配时返回None
+        """
+        text = content.strip()
+        if not text:
+            return None
+
+        if len(text) <= MAX_TOKEN_LENGTH and '\n' not in text:
+            result = self._classify_single_line(text)
+            if result:
+                return result
+
+        return self._classify_code(text)
+
+    def _classify_single_line(self, text: str) -> Optional[Tuple[str, float]]:
+        if URL_RE.match(text):
+            return "网址链接", 0.97
+        if WWW_RE.match(text):
+            return "网址链接", 0.9
+        if EMAIL_RE.match(text):
+            return "邮箱地址", 0.97
+
+        if WINDOWS_PATH_RE.match(text) or UNIX_PATH_RE.match(text):
+            if IMAGE_EXT_RE.search(text):
+                return "图片路径", 0.97
+            return "图片路径", 0.85
+
+        if any(c.isdigit() for c in text) and DATE_RE.match(text):
+            # 纯日期/时间交给日程分类，避免被当作数字
+            return "日程安排", 0.85
+
+        compact = text.replace(' ', '').replace('-', '')
+        if PHONE_RE.match(text) or ID_CARD_RE.match(text):
+            return "数字信息", 0.95
+        if BANK_CARD_RE.match(text) and len(compact) >= 16:
+            return "数字信息", 0.93
+        if LANDLINE_RE.match(text):
+            return "数字信息", 0.9
+        if NUMERIC_RE.match(text) and sum(c.isdigit() for c in text) >= 4:
+            return "数字信息", 0.85
+
+        return None
+
+    def _classify_code(self, text: str) -> Optional[Tuple[str, float]]:
+        if text[0] in '{[' and text[-1] in '}]':
+            try:
+                json.loads(text)
+                return "代码片段", 0.95
+            except ValueError:
+                pass
+
+        sample = text[:CODE_SCAN_LENGTH]
+        lines = [line for line in sample.splitlines() if line.strip()]
+        if not lines:
+            return None
+
+        keyword_lines = len(CODE_KEYWORD_RE.findall(sample))
+        symbol_lines = len(CODE_SYMBOL_RE.findall(sample))
+        indented = sum(1 for line in lines if line.startswith(('    ', '\t')))
+
+        # 按命中比例打分：关键字行和符号行权重最高，缩进作为辅助
+        score = (2 * keyword_lines + symbol_lines + 0.5 * indented) / len(lines)
+        if len(lines) == 1:
+            # 单行代码需要同时命中关键字和符号
+            if keyword_lines and symbol_lines:
+                return "代码片段", 0.85
+            return None
+
+        if score >= 1.0:
+            return "代码片段", 0.92
+        if score >= 0.6:
+            return "代码片段", 0.85
+        return None
@@ -0,0 +1,161 @@
+# src/core/settings.py
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 已知设置项及默认值，值的类型即该设置的类型
+DEFAULT_SETTINGS = {
+    "auto_classify": True,
+    "classify_schedule": "immediate",
+    "classify_time": "09:00",
+    "retention_days": 30,
+    "enable_sensitive_detection": True,
+    "max_db_size_mb": 0,         # 数据库大小上限（MB），0表示不限制，需用户主动开启
+    "max_items": 0,              # 非收藏条目数上限，0表示不限制
+    "classify_workers": 2,       # 后台分类并发数
+    "max_capture_mb": 8,         # 单条剪贴板内容的捕获上限（UTF-8字节），0表示不限制
+    "oversize_policy": "truncate",  # 超限内容的处理方式：truncate、spill、skip
+    "coalesce_window_ms": 300,   # 剪贴板连续改写的合并窗口，0表示不合并
+    "capture_rich_formats": True,  # 是否捕获图片、HTML和文件列表
+}
+
+# 只允许固定取值的设置项
+SETTING_CHOICES = {
+    "classify_schedule": ("immediate", "daily", "never"),
+    "oversize_policy": ("truncate", "spill", "skip"),
+}
+
+# 数值设置项的取值范围（含两端）
+SETTING_RANGES = {
+    "retention_days": (1, 3650),
+    "max_db_size_mb": (0, 1024 * 1024),
+    "max_items": (0, 10_000_000),
+    "classify_workers": (1, 16),
+    "max_capture_mb": (0, 1024),
+    "coalesce_window_ms": (0, 10_000),
+}
+
+CLASSIFY_TIME_RE = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+
+class SettingsStore:
+    """
+    设置的内存快照
+    启动时从settings表加载一次，读取不再访问数据库；
+    更新在一个事务内写回，成功后通知订阅者
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._load()
+
+    def _load(self):
+        """从数据库加载设置，未知或无效的值保留默认值"""
+        for key, value in self.db.get_all_settings().items():
+            try:
+                self._values[key] = self._coerce(key, value)
+            except ValueError as e:
+                logger.warning(f"忽略无效设置 {key}: {e}")
+
+    @classmethod
+    def _coerce(cls, key: str, value: Any) -> Any:
+        """转换并校验设置值，未知设置项或值无效时抛出ValueError"""
+        if key not in DEFAULT_SETTINGS:
+            raise ValueError(f"未知的设置项: {key}")
+        if key in SETTING_CHOICES and value not in SETTING_CHOICES[key]:
+            raise ValueError(f"{key} 只能是 {', '.join(SETTING_CHOICES[key])}")
+        if key == "classify_time" and not (isinstance(value, str) and CLASSIFY_TIME_RE.match(value)):
+            raise ValueError(f"{key} 需要 HH:MM 格式的时间")
+
+        value = cls._convert(key, value)
+        if key in SETTING_RANGES:
+            low, high = SETTING_RANGES[key]
+            if not low <= value <= high:
+                raise ValueError(f"{key} 需要在 {low} 到 {high} 之间")
+        return value
+
+    @staticmethod
+    def _convert(key: str, value: Any) -> Any:
+        """按默认值的类型转换设置值，无法转换时抛出ValueError"""
+        expected = type(DEFAULT_SETTINGS[key])
+        if expected is bool:
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ("true", "false", "1", "0"):
+                return value.lower() in ("true", "1")
+            if isinstance(value, int):
+                return bool(value)
+        elif expected is int:
+            if isinstance(value, bool):
+                raise ValueError(f"{key} 需要整数")
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                pass
+        elif expected is float:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                pass
+        elif isinstance(value, expected):
+            return value
+
+        raise ValueError(f"{key} 的值类型无效: {value!r}")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取全部设置的副本"""
+        with self._lock:
+            return dict(self._values)
+
+    def update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        原子更新多项设置
+        返回: 实际发生变化的设置；值无效时抛出ValueError，写库失败时抛出RuntimeError
+        """
+        coerced = {key: self._coerce(key, value) for key, value in changes.items()}
+
+        with self._lock:
+            changed = {
+                key: value for key, value in coerced.items()
+                if key not in self._values or self._values[key] != value
+            }
+            if changed:
+                if not self.db.set_settings(changed):
+                    raise RuntimeError("设置写入数据库失败")
+                self._values.update(changed)
+
+        for key, value in changed.items():
+            self._notify(key, value)
+        return changed
+
+    def subscribe(self, key: str, callback: Callable[[Any], None], fire_immediately: bool = True):
+        """订阅某项设置的变化，默认立即以当前值回调一次"""
+        with self._lock:
+            self._subscribers.setdefault(key, []).append(callback)
+            current = self._values.get(key)
+
+        if fire_immediately and current is not None:
+            self._invoke(key, callback, current)
+
+    def _notify(self, key: str, value: Any):
+        with self._lock:
+            callbacks = list(self._subscribers.get(key, []))
+        for callback in callbacks:
+            self._invoke(key, callback, value)
+
+    def _invoke(self, key: str, callback: Callable[[Any], None], value: Any):
+        try:
+            callback(value)
+        except Exception as e:
+            logger.error(f"设置 {key} 的订阅回调失败: {e}")
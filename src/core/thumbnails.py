@@ -0,0 +1,113 @@
+# src/core/thumbnails.py
+import io
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 256        # 缩略图最长边（像素）
+THUMBNAIL_QUALITY = 80      # 不透明图片以JPEG保存的质量
+
+class ThumbnailService:
+    """
+    在线程池中生成图片缩略图
+    新图片入库后立即提交生成；HTTP请求的缩略图尚未生成时提交并等待同一个任务。
+    同一blob_hash同时只有一个生成任务
+    """
+
+    def __init__(self, db_manager: DatabaseManager, workers: int = 2, size: int = THUMBNAIL_SIZE):
+        self.db = db_manager
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="thumbnail")
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'generated': 0, 'failed': 0, 'busy_seconds': 0.0}
+
+    def submit(self, blob_hash: str, data: Optional[bytes] = None) -> Future:
+        """提交缩略图生成任务，data 为空时从数据库读取原图"""
+        with self._lock:
+            future = self._in_flight.get(blob_hash)
+            if future is not None:
+                return future
+            self._stats['submitted'] += 1
+            future = self._executor.submit(self._generate, blob_hash, data)
+            self._in_flight[blob_hash] = future
+        # 任务已完成时回调会立即在当前线程执行，因此在锁外注册
+        future.add_done_callback(lambda _: self._done(blob_hash))
+        return future
+
+    def _done(self, blob_hash: str):
+        with self._lock:
+            self._in_flight.pop(blob_hash, None)
+
+    def get(self, blob_hash: str, timeout: float = 10) -> Optional[tuple]:
+        """
+        获取缩略图，尚未生成时在线程池中生成并等待
+        返回: (data, mime) 或 None
+        """
+        thumbnail = self.db.get_thumbnail(blob_hash)
+        if thumbnail:
+            return thumbnail
+        try:
+            return self.submit(blob_hash).result(timeout=timeout)
+        except Exception as e:
+            logger.error(f"生成缩略图失败: {e}")
+            return None
+
+    def _generate(self, blob_hash: str, data: Optional[bytes]) -> Optional[tuple]:
+        started = time.monotonic()
+        try:
+            if data is None:
+                blob = self.db.get_blob(blob_hash)
+                if blob is None:
+                    return None
+                data = blob[0]
+            thumbnail, mime, width, height = self.render(data, self.size)
+            # 生成期间条目可能已被删除，不再保存
+            if self.db.blob_referenced(blob_hash):
+                self.db.save_thumbnail(blob_hash, mime, width, height, thumbnail)
+            self._stats['generated'] += 1
+            return thumbnail, mime
+        except Exception as e:
+            self._stats['failed'] += 1
+            logger.error(f"生成缩略图失败 {blob_hash[:12]}: {e}")
+            return None
+        finally:
+            self._stats['busy_seconds'] += time.monotonic() - started
+
+    @staticmethod
+    def render(data: bytes, size: int = THUMBNAIL_SIZE) -> tuple:
+        """
+        把图片缩放到最长边不超过size
+        返回: (缩略图数据, mime, 宽, 高)；带透明通道的保存为PNG，其余为JPEG
+        """
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(data))
+        # JPEG可在解码时直接降采样
+        image.draft('RGB', (size, size))
+        image.thumbnail((size, size))
+
+        buffer = io.BytesIO()
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image.convert('RGBA').save(buffer, format='PNG', optimize=True)
+            mime = 'image/png'
+        else:
+            image.convert('RGB').save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY)
+            mime = 'image/jpeg'
+        return buffer.getvalue(), mime, image.width, image.height
+
+    def shutdown(self):
+        """停止接收任务，等待进行中的任务完成"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {**self._stats, 'busy_seconds': round(self._stats['busy_seconds'], 3),
+                'in_flight': in_flight}
@@ -0,0 +1,139 @@
+# src/core/transfer.py
+import hashlib
+import json
+import logging
+from typing import Dict, Iterator, List, Optional
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 5000        # 每个导入事务最多的条数
+IMPORT_BATCH_BYTES = 16 * 1024 * 1024   # 每个导入事务最多的原始数据量（字节）
+MAX_IMPORT_LINE_BYTES = 64 * 1024 * 1024  # 单行上限，超过的行计为错误并跳过
+
+def iter_export_chunks(db: DatabaseManager, lines_per_chunk: int = 500) -> Iterator[bytes]:
+    """将全部条目编码为NDJSON，按块产出，适合直接作为流式响应体"""
+    lines: List[str] = []
+    for item in db.iter_export_rows():
+        lines.append(json.dumps(item, ensure_ascii=False))
+        if len(lines) >= lines_per_chunk:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+def parse_import_line(line: str) -> Optional[Dict]:
+    """
+    解析一行NDJSON，空行返回None，格式错误时抛出ValueError
+    缺少content_hash时按内容计算
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    item = json.loads(line)
+    if not isinstance(item, dict) or not isinstance(item.get('content'), str):
+        raise ValueError("缺少content字段")
+    if not item.get('content_hash'):
+        item['content_hash'] = hashlib.sha256(item['content'].encode('utf-8')).hexdigest()
+    return item
+
+class NDJSONImporter:
+    """
+    流式NDJSON导入
+    feed() 接收任意切分的字节块，条数或数据量攒满一批后由调用方执行 flush()。
+    未结束的行按块暂存，遇到换行时才拼接一次，长行（如图片的base64数据）不会被反复复制
+    """
+
+    def __init__(self, db: DatabaseManager, batch_size: int = IMPORT_BATCH_SIZE,
+                 batch_bytes: int = IMPORT_BATCH_BYTES, max_line_bytes: int = MAX_IMPORT_LINE_BYTES):
+        self.db = db
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.max_line_bytes = max_line_bytes
+        self._partial: List[bytes] = []
+        self._partial_size = 0
+        self._discarding = False
+        self._batch: List[Dict] = []
+        self._batch_size_bytes = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = 0
+        self.line_number = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        追加一块数据
+        返回: 当前批次是否已满，需要flush
+        """
+        end = chunk.rfind(b'\n') + 1
+        if not end:
+            self._keep_partial(chunk)
+            return self._batch_full()
+
+        if self._discarding:
+            # 过长的行到此结束，丢弃其余部分
+            first = chunk.find(b'\n') + 1
+            chunk, end = chunk[first:], end - first
+            self._discarding = False
+            self._partial, self._partial_size = [], 0
+
+        data = b''.join(self._partial + [chunk[:end]]) if self._partial else chunk[:end]
+        self._partial, self._partial_size = [], 0
+        self._keep_partial(chunk[end:])
+        self._batch_size_bytes += len(data)
+        # 整块解码后再按行切分，避免逐行探测编码
+        for line in data.decode('utf-8', errors='replace').split('\n')[:-1]:
+            self._add_line(line)
+        return self._batch_full()
+
+    def _keep_partial(self, data: bytes):
+        """暂存未结束的行，超过单行上限时记为错误并丢弃到下一个换行"""
+        if not data or self._discarding:
+            return
+        self._partial.append(data)
+        self._partial_size += len(data)
+        if self._partial_size > self.max_line_bytes:
+            self.line_number += 1
+            self.errors += 1
+            logger.warning(f"第 {self.line_number} 行超过 {self.max_line_bytes} 字节，已跳过")
+            self._partial, self._partial_size = [], 0
+            self._discarding = True
+
+    def _batch_full(self) -> bool:
+        return len(self._batch) >= self.batch_size or self._batch_size_bytes >= self.batch_bytes
+
+    def _add_line(self, line: str):
+        self.line_number += 1
+        try:
+            item = parse_import_line(line)
+        except ValueError as e:
+            # json.JSONDecodeError 也是 ValueError
+            self.errors += 1
+            logger.warning(f"第 {self.line_number} 行无法导入: {e}")
+            return
+        if item is not None:
+            self._batch.append(item)
+
+    def flush(self):
+        """写入当前批次"""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self._batch_size_bytes = 0
+        result = self.db.import_items(batch)
+        self.imported += result['imported']
+        self.skipped += result['skipped']
+
+    def finish(self) -> Dict[str, int]:
+        """处理末尾不带换行的数据并写入剩余批次"""
+        if self._partial:
+            self._add_line(b''.join(self._partial).decode('utf-8', errors='replace'))
+            self._partial, self._partial_size = [], 0
+        self._discarding = False
+        self.flush()
+        return self.result()
+
+    def result(self) -> Dict[str, int]:
+        return {'imported': self.imported, 'skipped': self.skipped, 'errors': self.errors}
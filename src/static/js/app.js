@@ -5,6 +5,10 @@ class XenonClipApp {
         this.categories = [];
         this.currentCategory = '';
         this.searchText = '';
+        this.searchTimer = null;
+        this.pageSize = 50;
+        this.nextCursor = null;
+        this.loadingMore = false;
         
         this.init();
     }
@@ -20,13 +24,24 @@ class XenonClipApp {
         // 搜索框事件
         document.getElementById('searchInput').addEventListener('input', (e) => {
             this.searchText = e.target.value;
-            this.filterAndDisplayItems();
+            // 搜索交给服务端全文索引，输入停顿后再请求
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.loadItems(), 250);
         });
         
         // 分类过滤事件
         document.getElementById('categoryFilter').addEventListener('change', (e) => {
             this.currentCategory = e.target.value;
-            this.filterAndDisplayItems();
+            this.loadItems();
+        });
+        
+        // 滚动到底部附近时加载下一页
+        const scrollContainer = document.getElementById('clipboardScroll');
+        scrollContainer.addEventListener('scroll', () => {
+            const remaining = scrollContainer.scrollHeight - scrollContainer.scrollTop - scrollContainer.clientHeight;
+            if (remaining < 300) {
+                this.loadMoreItems();
+            }
         });
         
         // 设置按钮事件
@@ -63,9 +78,11 @@ class XenonClipApp {
             }
         });
         
-        // 定期刷新数据
+        // 定期刷新数据（只在列表顶部时刷新第一页，避免打断向下浏览）
         setInterval(() => {
-            this.loadItems();
+            if (scrollContainer.scrollTop < 50) {
+                this.loadItems();
+            }
         }, 5000);
         
         // 点击外部关闭下拉菜单
@@ -93,21 +110,30 @@ class XenonClipApp {
         }
     }
     
+    buildItemsQuery(cursor) {
+        const params = new URLSearchParams();
+        params.append('limit', this.pageSize);
+        if (this.currentCategory) {
+            params.append('category', this.currentCategory);
+        }
+        if (this.searchText) {
+            params.append('search', this.searchText);
+        }
+        if (cursor) {
+            params.append('cursor', cursor);
+        }
+        return params;
+    }
+    
     async loadItems() {
+        // 重新加载第一页
         try {
-            const params = new URLSearchParams();
-            if (this.currentCategory) {
-                params.append('category', this.currentCategory);
-            }
-            if (this.searchText) {
-                params.append('search', this.searchText);
-            }
-            
-            const response = await fetch(`/api/items?${params}`);
+            const response = await fetch(`/api/items?${this.buildItemsQuery()}`);
             const result = await response.json();
             
             if (result.success) {
                 this.items = result.data;
+                this.nextCursor = result.next_cursor;
                 this.displayItems(this.items);
                 this.updateItemCount(this.items.length);
             }
@@ -116,23 +142,27 @@ class XenonClipApp {
         }
     }
     
-    filterAndDisplayItems() {
-        let filtered = this.items;
-        
-        if (this.currentCategory) {
-            filtered = filtered.filter(item => item.category === this.currentCategory);
+    async loadMoreItems() {
+        if (!this.nextCursor || this.loadingMore) {
+            return;
         }
         
-        if (this.searchText) {
-            const searchLower = this.searchText.toLowerCase();
-            filtered = filtered.filter(item => 
-                item.content.toLowerCase().includes(searchLower) ||
-                item.category.toLowerCase().includes(searchLower)
-            );
+        this.loadingMore = true;
+        try {
+            const response = await fetch(`/api/items?${this.buildItemsQuery(this.nextCursor)}`);
+            const result = await response.json();
+            
+            if (result.success) {
+                this.items = this.items.concat(result.data);
+                this.nextCursor = result.next_cursor;
+                this.displayItems(this.items);
+                this.updateItemCount(this.items.length);
+            }
+        } catch (error) {
+            console.error('加载更多条目失败:', error);
+        } finally {
+            this.loadingMore = false;
         }
-        
-        this.displayItems(filtered);
-        this.updateItemCount(filtered.length);
     }
     
     displayItems(items) {
@@ -197,9 +227,22 @@ class XenonClipApp {
     }
     
     renderItem(item) {
-        const truncatedContent = item.content.length > 100 
-            ? item.content.substring(0, 100) + '...'
-            : item.content;
+        // 列表只返回预览，完整内容在复制时由服务端读取
+        const preview = item.preview || '';
+        const truncatedContent = preview.length > 100 || item.preview_truncated
+            ? preview.substring(0, 100) + '...'
+            : preview;
+        const displayContent = item.snippet
+            ? this.renderSnippet(item.snippet)
+            : this.escapeHtml(truncatedContent);
+        const typeBadge = this.renderTypeBadge(item.content_type);
+        // 缩略图按内容哈希寻址，浏览器懒加载并长期缓存
+        const thumbnail = item.blob_hash && (item.blob_mime || '').startsWith('image/')
+            ? `<a href="/api/blobs/${item.blob_hash}" target="_blank" class="block mb-2">
+                   <img src="/api/blobs/${item.blob_hash}/thumbnail" loading="lazy" decoding="async"
+                        alt="${this.escapeHtml(preview)}" class="max-h-32 rounded border">
+               </a>`
+            : '';
         
         const createdAt = new Date(item.created_at).toLocaleString();
         const favoriteClass = item.is_favorite ? 'text-yellow-500' : 'text-gray-400';
@@ -209,8 +252,9 @@ class XenonClipApp {
             <div id="item-${item.id}" class="bg-white rounded-lg p-4 shadow-sm hover:shadow-md transition-shadow cursor-pointer border">
                 <div class="flex justify-between items-start mb-3">
                     <div class="flex-1">
+                        ${thumbnail}
                         <div class="text-sm font-medium text-gray-900 mb-1">
-                            ${sensitiveIcon}${this.escapeHtml(truncatedContent)}
+                            ${sensitiveIcon}${typeBadge}${displayContent}
                         </div>
                         <div class="flex items-center space-x-2 text-xs text-gray-500">
                             <div class="relative category-dropdown-container">
@@ -228,6 +272,7 @@ class XenonClipApp {
                             </div>
                             <span>${createdAt}</span>
                             <span>使用 ${item.access_count} 次</span>
+                            ${item.content_size > 4096 ? `<span>${this.formatSize(item.content_size)}</span>` : ''}
                         </div>
                     </div>
                     <div class="flex items-center space-x-2 ml-4">
@@ -243,6 +288,17 @@ class XenonClipApp {
         `;
     }
     
+    renderTypeBadge(contentType) {
+        const badges = {
+            image: ['fa-image', '图片'],
+            html: ['fa-code', '富文本'],
+            files: ['fa-folder', '文件']
+        };
+        const badge = badges[contentType];
+        if (!badge) return '';
+        return `<span class="text-xs text-gray-500 mr-2" title="${badge[1]}"><i class="fas ${badge[0]}"></i></span>`;
+    }
+    
     renderCategoryOptions(itemId) {
         return this.categories.map(cat => 
             `<div class="py-1 px-2 hover:bg-gray-100 text-sm cursor-pointer category-option rounded" 
@@ -348,7 +404,7 @@ class XenonClipApp {
                 const category = item.dataset.category;
                 this.currentCategory = this.currentCategory === category ? '' : category;
                 document.getElementById('categoryFilter').value = this.currentCategory;
-                this.filterAndDisplayItems();
+                this.loadItems();
                 
                 // 更新选中状态
                 container.querySelectorAll('.category-item').forEach(ci => {
@@ -619,6 +675,20 @@ class XenonClipApp {
         document.getElementById('itemCount').textContent = `共 ${count} 条记录`;
     }
     
+    formatSize(bytes) {
+        if (bytes >= 1024 * 1024) {
+            return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+        }
+        return `${(bytes / 1024).toFixed(1)} KB`;
+    }
+    
+    renderSnippet(snippet) {
+        // 服务端用 \x02 / \x03 标记命中位置，转义后再替换为高亮标签
+        return this.escapeHtml(snippet)
+            .replace(/\x02/g, '<mark class="bg-yellow-200">')
+            .replace(/\x03/g, '</mark>');
+    }
+    
     escapeHtml(text) {
         const div = document.createElement('div');
         div.textContent = text;
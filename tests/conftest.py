@@ -0,0 +1,17 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+# 与 main.py 相同，以 src 为导入根目录
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.database import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "test.db"), reader_count=1)
+    yield manager
+    manager.close()
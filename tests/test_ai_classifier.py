@@ -0,0 +1,93 @@
+# tests/test_ai_classifier.py
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.ai_classifier import AIClassifier
+from core.mock_backend import MockBackend, MockModel, MockOllamaServer, ScriptedResponder
+
+MEETING = "周五下午和产品组讨论季度规划"
+RECIPE = "番茄炒蛋：先炒蛋再下番茄，最后加少许糖"
+EXPLANATION = "\n理由：" + "这段内容描述了具体的时间安排。" * 20
+
+
+def _classifier(db, answers, **model_options):
+    backend = MockBackend(responder=ScriptedResponder(answers=answers), **model_options)
+    return AIClassifier(backend, db), backend.model
+
+
+def test_single_answer_parsed_and_stream_stopped(db):
+    classifier, model = _classifier(db, {MEETING: "日程安排|0.85" + EXPLANATION})
+
+    assert classifier.classify_content(MEETING) == ("日程安排", 0.85)
+    stats = model.get_stats()
+    assert stats['requests'] == 1
+    # 结果行完整后不再读取后面的解释
+    assert stats['stopped_early'] == 1
+
+    # 相同内容第二次命中缓存
+    assert classifier.classify_content(MEETING) == ("日程安排", 0.85)
+    assert model.get_stats()['requests'] == 1
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ("schedule|1.7\n", ("日程安排", 1.0)),
+    ("「日程安排」\n", ("日程安排", 0.5)),
+    ("完全无关的回答|abc\n", ("文本内容", 0.5)),
+])
+def test_answer_normalization(db, answer, expected):
+    classifier, _ = _classifier(db, {MEETING: answer})
+    assert classifier.classify_content(MEETING) == expected
+
+
+def test_new_category_created(db):
+    classifier, _ = _classifier(db, {RECIPE: "NEW_CATEGORY:菜谱|0.8\n"})
+    assert classifier.classify_content(RECIPE) == ("菜谱", 0.8)
+    assert "菜谱" in classifier.categories
+
+
+def test_backend_failure_falls_back_to_default(db):
+    classifier, model = _classifier(db, {MEETING: "日程安排|0.9\n"})
+    model.fail_next()
+    assert classifier.classify_content(MEETING) == ("文本内容", 0.5)
+
+
+def test_batch_answers_mapped_by_index(db):
+    classifier, model = _classifier(db, {MEETING: "日程安排|0.9", RECIPE: "NEW_CATEGORY:菜谱|0.7"})
+    stats = {}
+    results = classifier.classify_batch({10: MEETING, 20: RECIPE}, stats=stats)
+
+    assert results == {10: ("日程安排", 0.9), 20: ("菜谱", 0.7)}
+    assert stats == {'model_calls': 1}
+    assert model.get_stats()['requests'] == 1
+
+
+def test_batch_line_fallback(db):
+    classifier, _ = _classifier(db, {})
+    response = "好的，结果如下：\n1. 日程安排|0.9\n2: 文本内容|0.6\n7. 代码片段|0.9"
+    assert classifier._parse_batch_response(response, 2) == {1: "日程安排|0.9", 2: "文本内容|0.6"}
+
+
+def test_http_stream_closed_once_result_line_complete(db):
+    pytest.importorskip("requests")
+    from core.ollama_manager import OllamaManager
+
+    model = MockModel(responder=ScriptedResponder(answers={MEETING: "日程安排|0.85" + EXPLANATION}),
+                      token_latency=0.01)
+    with MockOllamaServer(model) as server:
+        backend = OllamaManager(server.url)
+        classifier = AIClassifier(backend, db)
+
+        started = time.monotonic()
+        assert classifier.classify_content(MEETING) == ("日程安排", 0.85)
+        # 完整输出约300个片段，每个10毫秒
+        assert time.monotonic() - started < 1.5
+        assert backend.get_stats() == {'completed': 0, 'stopped_early': 1, 'timed_out': 0}
+
+        # 服务端在下一次写入时发现连接已关闭
+        deadline = time.monotonic() + 5
+        while model.get_stats()['stopped_early'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert model.get_stats()['stopped_early'] == 1
@@ -0,0 +1,42 @@
+# tests/test_capture_policy.py
+from core.capture_policy import MARKER_PREFIX, CapturePolicy, utf8_size
+from core.content_signature import ChangeDetector, quick_signature
+
+MB = 1024 * 1024
+
+
+def test_text_limit_is_measured_in_utf8_bytes():
+    policy = CapturePolicy(max_capture_mb=1)
+
+    ascii_text = "a" * (MB - 1)
+    assert policy.apply(ascii_text).content == ascii_text
+
+    # 40万个汉字约1.2MB，字符数未超限但字节数超限
+    cjk_text = "汉" * 400_000
+    result = policy.apply(cjk_text)
+    assert result.oversize_action == "truncate"
+    assert result.original_size == utf8_size(cjk_text) == 1_200_000
+    kept, marker = result.content.rsplit("\n", 1)
+    assert marker.startswith(MARKER_PREFIX)
+    assert set(kept) == {"汉"}
+    assert len(kept.encode("utf-8")) <= MB < len(kept.encode("utf-8")) + 3
+
+
+def test_binary_limit_uses_same_unit():
+    policy = CapturePolicy(max_capture_mb=1)
+    assert policy.allows_bytes(MB)
+    assert not policy.allows_bytes(MB + 1)
+    assert policy.get_stats()['max_capture_bytes'] == MB
+
+
+def test_large_change_outside_samples_detected_on_new_sequence():
+    original = "x" * 200_000
+    # 中间取样之外的位置改动一个字符，签名不变
+    edited = original[:5000] + "y" + original[5001:]
+    assert quick_signature(edited) == quick_signature(original)
+
+    detector = ChangeDetector()
+    assert detector.check(original, sequence=1)
+    assert not detector.check(edited, sequence=1)
+    assert detector.check(edited, sequence=2)
+    assert detector.get_stats()['sequence_rechecks'] == 1
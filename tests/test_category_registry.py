@@ -0,0 +1,24 @@
+# tests/test_category_registry.py
+from core.category_registry import CategoryRegistry
+
+
+def test_rename_into_existing_category_merges(db):
+    registry = CategoryRegistry(db)
+    registry.add("甲")
+    registry.add("乙")
+
+    assert registry.rename("甲", "乙")
+    assert registry.names().count("乙") == 1
+    assert "甲" not in registry
+    assert sorted(registry.names()) == sorted(db.get_category_names())
+
+
+def test_rename_changes_signature(db):
+    registry = CategoryRegistry(db)
+    registry.add("甲")
+    signature, version = registry.signature, registry.version
+
+    assert registry.rename("甲", "丙")
+    assert registry.signature != signature
+    assert registry.version == version + 1
+    assert registry.match("丙") == "丙"
@@ -0,0 +1,23 @@
+# tests/test_classification_cache.py
+def _last_used(db, cache_key: str) -> str:
+    with db._read() as conn:
+        return conn.execute('SELECT last_used FROM classification_cache WHERE cache_key = ?',
+                            (cache_key,)).fetchone()[0]
+
+
+def test_hit_does_not_write_until_stale(db):
+    db.put_cached_classification("k", "代码片段", 0.9)
+    assert db.get_cached_classification("k") == ("代码片段", 0.9)
+    # 刚写入的条目命中时不需要刷新
+    assert not db._pending_cache_touches
+
+    with db._write() as conn:
+        conn.execute("UPDATE classification_cache SET last_used = '2000-01-01 00:00:00'")
+    assert db.get_cached_classification("k") == ("代码片段", 0.9)
+    assert db._pending_cache_touches == {"k"}
+    assert _last_used(db, "k") == '2000-01-01 00:00:00'
+
+    # 随写缓冲一起刷盘
+    db.flush()
+    assert not db._pending_cache_touches
+    assert _last_used(db, "k") > '2000-01-01 00:00:00'
@@ -0,0 +1,54 @@
+# tests/test_classification_jobs.py
+import hashlib
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.ai_classifier import AIClassifier
+from core.classification_jobs import ClassificationJobManager
+from core.classification_queue import UNCLASSIFIED
+from core.mock_backend import MockBackend, ScriptedResponder
+
+
+def _add_unclassified(db, content: str) -> int:
+    return db.add_clipboard_item({
+        'content': content,
+        'content_hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+        'category': UNCLASSIFIED,
+        'confidence': 0.0,
+        'is_sensitive': False,
+        'source_app': "test",
+    })
+
+
+def _run_job(manager: ClassificationJobManager) -> dict:
+    job_id = manager.submit()['id']
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = manager.get_job(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("补分类任务未在超时内完成")
+
+
+def test_model_calls_count_only_real_calls(db):
+    backend = MockBackend(responder=ScriptedResponder(default="日程安排|0.8"))
+    manager = ClassificationJobManager(db, AIClassifier(backend, db))
+    try:
+        # 规则直接命中的条目不调用模型
+        _add_unclassified(db, "https://example.com/docs")
+        job = _run_job(manager)
+        assert job['classified'] == 1
+        assert job['model_calls'] == 0
+        assert backend.model.get_stats()['requests'] == 0
+
+        _add_unclassified(db, "周五下午和产品组讨论季度规划")
+        job = _run_job(manager)
+        assert job['classified'] == 1
+        assert job['model_calls'] == 1
+        assert backend.model.get_stats()['requests'] == 1
+    finally:
+        manager.stop()
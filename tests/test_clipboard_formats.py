@@ -0,0 +1,50 @@
+# tests/test_clipboard_formats.py
+import pytest
+
+from core import clipboard_formats
+from core.clipboard_formats import ClipboardPayload, html_to_text, read_payload
+
+
+@pytest.fixture
+def fake_clipboard(monkeypatch):
+    """替换平台读取函数：剪贴板同时带有位图和HTML"""
+    image = ClipboardPayload("image", "[图片]", b"png-bytes", "image/png")
+    monkeypatch.setattr(clipboard_formats, "_grab", lambda: object())
+    monkeypatch.setattr(clipboard_formats, "_image_payload", lambda grabbed: image)
+    monkeypatch.setattr(clipboard_formats, "_read_windows_html", lambda: "<p>Hello <b>world</b></p>")
+    monkeypatch.setattr(clipboard_formats, "_linux_read", lambda target: b"<p>Hello <b>world</b></p>")
+
+
+def test_text_wins_over_html_and_keeps_html_as_extra(fake_clipboard):
+    payload = read_payload({"image", "html"}, "Hello world")
+
+    assert payload.content_type == "html"
+    assert payload.text == "Hello world"
+    assert payload.data == b"<p>Hello <b>world</b></p>"
+
+
+def test_text_with_bitmap_stays_text_and_keeps_image(fake_clipboard):
+    payload = read_payload({"image"}, "A1\tB1")
+
+    assert payload.content_type == "text"
+    assert payload.text == "A1\tB1"
+    assert payload.mime == "image/png"
+
+
+def test_image_only_copy_is_an_image(fake_clipboard):
+    payload = read_payload({"image", "html"}, "")
+
+    assert payload.content_type == "image"
+
+
+def test_html_only_copy_extracts_text(fake_clipboard):
+    payload = read_payload({"html"}, None)
+
+    assert payload.content_type == "html"
+    assert payload.text == "Hello world"
+
+
+def test_html_to_text_skips_scripts_and_breaks_blocks():
+    html = "<h1>Title</h1><script>var x = 1;</script><p>a  b</p>"
+
+    assert html_to_text(html) == "Title\na b"
@@ -0,0 +1,74 @@
+# tests/test_clipboard_monitor.py
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.ai_classifier import AIClassifier
+from core.clipboard_monitor import ClipboardMonitor
+from core.clipboard_source import FakeClipboardSource
+from core.mock_backend import MockBackend
+
+
+@pytest.fixture(params=[True, False], ids=["probe", "text"])
+def monitor(request, db):
+    source = FakeClipboardSource()
+    monitor = ClipboardMonitor(db, AIClassifier(MockBackend(), db), source=source)
+    monitor.set_auto_classify(False)
+    monitor.set_capture_rich_formats(request.param)
+    monitor.pipeline.coalescer.set_window_ms(150)
+    monitor.start()
+    yield monitor
+    monitor.stop()
+
+
+def _settle(monitor: ClipboardMonitor, expected_items: int, timeout: float = 5) -> dict:
+    """等待流水线处理完并刷盘，返回 内容 -> 条目"""
+    deadline = time.monotonic() + timeout
+    while True:
+        monitor.db.flush()
+        items = {item['preview']: item for item in monitor.db.get_clipboard_items()}
+        if len(items) >= expected_items or time.monotonic() > deadline:
+            return items
+        time.sleep(0.02)
+
+
+def test_burst_of_copies_coalesced_to_last_value(monitor):
+    for text in ("草稿", "草稿一", "草稿一二"):
+        monitor.source.set_text(text)
+
+    _settle(monitor, 1)
+    # 合并窗口之后不应再有条目到达
+    time.sleep(0.3)
+    items = _settle(monitor, 1)
+    assert list(items) == ["草稿一二"]
+    assert monitor.pipeline.get_stats()['dedup']['received'] == 1
+
+
+def test_recopy_updates_existing_item(monitor):
+    monitor.source.set_text("甲")
+    _settle(monitor, 1)
+    monitor.source.set_text("乙")
+    _settle(monitor, 2)
+
+    monitor.source.set_text("甲")
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        items = _settle(monitor, 2)
+        if items["甲"]['access_count'] == 2:
+            break
+        time.sleep(0.02)
+    assert sorted(items) == ["乙", "甲"]
+    assert items["甲"]['access_count'] == 2
+
+
+def test_same_text_copied_twice_stored_once(monitor):
+    monitor.source.set_text("丙")
+    _settle(monitor, 1)
+    monitor.source.set_text("丙")
+    time.sleep(0.3)
+
+    items = _settle(monitor, 1)
+    assert list(items) == ["丙"]
+    assert items["丙"]['access_count'] == 1
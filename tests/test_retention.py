@@ -0,0 +1,53 @@
+# tests/test_retention.py
+import sqlite3
+import time
+
+from core.database import DatabaseManager
+from core.retention import RetentionManager
+from core.settings import SettingsStore
+
+
+def test_initial_delay_not_cut_short_by_subscriptions(db):
+    settings = SettingsStore(db)
+    settings.update({'retention_days': 7})
+    retention = RetentionManager(db, settings, interval=3600, initial_delay=30)
+    assert retention.retention_days == 7
+
+    retention.start()
+    try:
+        time.sleep(0.2)
+        assert retention.get_report()['totals']['runs'] == 0
+
+        # 之后的设置变更立即唤醒任务
+        settings.update({'max_items': 100})
+        deadline = time.monotonic() + 5
+        while retention.get_report()['totals']['runs'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert retention.get_report()['totals']['runs'] == 1
+        assert retention.max_items == 100
+    finally:
+        retention.stop()
+
+
+def test_legacy_database_not_switched_in_background(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE legacy (x)')
+    conn.close()
+
+    db = DatabaseManager(path, reader_count=1)
+    try:
+        # 启动时不再执行完整VACUUM
+        assert not db.incremental_vacuum_enabled()
+
+        # 后台任务只提示，不执行阻塞写入的完整VACUUM
+        retention = RetentionManager(db, SettingsStore(db), initial_delay=30)
+        report = retention.run_once()
+        assert not report['incremental_vacuum']
+        assert not db.incremental_vacuum_enabled()
+
+        # 由用户主动触发切换后，后续运行直接增量回收
+        assert db.enable_incremental_vacuum()
+        assert retention.run_once()['incremental_vacuum']
+    finally:
+        db.close()
@@ -0,0 +1,66 @@
+# tests/test_search.py
+import hashlib
+from datetime import datetime
+
+import pytest
+
+from core.database import BLOB_THRESHOLD, MAX_PAGE_SIZE, PREVIEW_LENGTH, DatabaseManager
+
+
+def _add(db: DatabaseManager, content: str) -> int:
+    return db.add_clipboard_item({
+        'content': content,
+        'content_hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+        'category': "其他",
+        'confidence': 0.5,
+        'is_sensitive': False,
+        'source_app': "test",
+        'created_at': datetime.now(),
+    })
+
+
+def _search_ids(db: DatabaseManager, search: str) -> list:
+    return [item['id'] for item in db.get_clipboard_items(search=search)]
+
+
+def test_external_content_is_searchable_beyond_preview(db):
+    content = "开头" + "填充文本 " * BLOB_THRESHOLD + "尾部独有关键词zq"
+    item_id = _add(db, content)
+
+    assert _search_ids(db, "尾部独有关键词zq") == [item_id]
+    # 少于三个字符的词走LIKE扫描，同样覆盖完整内容
+    assert _search_ids(db, "zq") == [item_id]
+
+
+def test_delete_and_recategorize_keep_index_consistent(db):
+    content = "x" * (BLOB_THRESHOLD + 10) + "待删除关键词"
+    item_id = _add(db, content)
+    db.update_item_category(item_id, "代码")
+    assert _search_ids(db, "待删除关键词") == [item_id]
+
+    db.delete_item(item_id)
+    assert _search_ids(db, "待删除关键词") == []
+    with db._write() as conn:
+        conn.execute("INSERT INTO clipboard_fts(clipboard_fts) VALUES ('integrity-check')")
+
+
+def test_preview_truncated_counts_characters(db):
+    short_cjk = "中文内容" * 10
+    long_text = "a" * (PREVIEW_LENGTH + 1)
+    short_id = _add(db, short_cjk)
+    long_id = _add(db, long_text)
+
+    flags = {item['id']: item['preview_truncated'] for item in db.get_clipboard_items()}
+    assert flags == {short_id: False, long_id: True}
+
+
+def test_page_limit_is_not_clamped(db):
+    ids = [_add(db, f"条目 {i}") for i in range(MAX_PAGE_SIZE + 1)]
+
+    with pytest.raises(ValueError):
+        db.get_clipboard_items_page(limit=0)
+
+    # 上限只在 /api/items 路由中校验，数据库层按给定条数查询
+    page = db.get_clipboard_items_page(limit=MAX_PAGE_SIZE + 1)
+    assert sorted(item['id'] for item in page['items']) == sorted(ids)
+    assert page['next_cursor'] is None
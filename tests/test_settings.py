@@ -0,0 +1,45 @@
+# tests/test_settings.py
+import pytest
+
+from core.settings import SettingsStore
+
+
+@pytest.mark.parametrize("changes", [
+    {'classify_workers': 0},
+    {'classify_workers': 10_000},
+    {'retention_days': -1},
+    {'coalesce_window_ms': 3_600_000},
+    {'classify_schedule': 'hourly'},
+    {'classify_time': '25:00'},
+    {'no_such_setting': 1},
+])
+def test_invalid_updates_rejected(db, changes):
+    settings = SettingsStore(db)
+    before = settings.snapshot()
+    with pytest.raises(ValueError):
+        settings.update(changes)
+    assert settings.snapshot() == before
+
+
+def test_update_is_atomic(db):
+    settings = SettingsStore(db)
+    with pytest.raises(ValueError):
+        settings.update({'classify_workers': 4, 'max_items': -5})
+    assert settings.get('classify_workers') == 2
+
+    assert settings.update({'classify_workers': '4', 'classify_time': '07:30'}) == {
+        'classify_workers': 4, 'classify_time': '07:30'}
+    assert SettingsStore(db).get('classify_workers') == 4
+
+
+def test_stored_invalid_values_fall_back_to_defaults(db):
+    db.set_settings({'classify_workers': 999, 'legacy_key': 'x'})
+    settings = SettingsStore(db)
+    assert settings.get('classify_workers') == 2
+    assert 'legacy_key' not in settings.snapshot()
+
+
+def test_quotas_are_opt_in(db):
+    settings = SettingsStore(db)
+    assert settings.get('max_db_size_mb') == 0
+    assert settings.get('max_items') == 0
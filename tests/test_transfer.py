@@ -0,0 +1,114 @@
+# tests/test_transfer.py
+import hashlib
+import json
+from datetime import datetime
+
+from core.database import DatabaseManager
+from core.transfer import NDJSONImporter, iter_export_chunks
+
+# 最小的合法PNG签名加任意数据即可，往返只比较字节
+IMAGE_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+
+
+def _queue_image(db: DatabaseManager) -> str:
+    blob_hash = hashlib.sha256(IMAGE_BYTES).hexdigest()
+    db.queue_clipboard_item({
+        'content': "[图片] 64×64 PNG, 16 KB",
+        'content_hash': blob_hash,
+        'category': "图片路径",
+        'confidence': 1.0,
+        'is_sensitive': False,
+        'source_app': "test",
+        'created_at': datetime.now(),
+        'content_type': 'image',
+        'payload': {'blob_hash': blob_hash, 'mime': 'image/png', 'data': IMAGE_BYTES},
+    })
+    db.flush()
+    return blob_hash
+
+
+def _round_trip(source: DatabaseManager, target: DatabaseManager) -> dict:
+    importer = NDJSONImporter(target)
+    for chunk in iter_export_chunks(source):
+        importer.feed(chunk)
+    return importer.finish()
+
+
+def test_image_item_survives_export_import(db, tmp_path):
+    blob_hash = _queue_image(db)
+    target = DatabaseManager(str(tmp_path / "imported.db"), reader_count=1)
+    try:
+        assert _round_trip(db, target)['imported'] == 1
+
+        item = target.get_clipboard_items_page(10)['items'][0]
+        assert item['content_type'] == 'image'
+        assert item['blob_hash'] == blob_hash
+        assert item['content_size'] == len(IMAGE_BYTES)
+        assert target.get_blob(blob_hash) == (IMAGE_BYTES, 'image/png')
+    finally:
+        target.close()
+
+
+def test_tampered_blob_is_dropped_on_import(db):
+    blob_hash = hashlib.sha256(IMAGE_BYTES).hexdigest()
+    result = db.import_items([{
+        'content': "[图片]",
+        'content_hash': blob_hash,
+        'content_type': 'image',
+        'blob_hash': blob_hash,
+        'blob': {'mime': 'image/png', 'data': "aGVsbG8="},
+    }])
+
+    assert result['imported'] == 1
+    assert db.get_clipboard_items_page(10)['items'][0]['blob_hash'] is None
+    assert db.get_blob(blob_hash) is None
+
+
+def test_text_items_export_without_blob_fields(db):
+    db.import_items([{'content': "hello", 'content_hash': hashlib.sha256(b"hello").hexdigest()}])
+
+    rows = list(db.iter_export_rows())
+    assert rows[0]['content_type'] == 'text'
+    assert 'blob' not in rows[0] and 'blob_hash' not in rows[0]
+
+
+def _line(content: str) -> bytes:
+    return (json.dumps({'content': content}, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def _feed_in_chunks(importer: NDJSONImporter, data: bytes, size: int):
+    for start in range(0, len(data), size):
+        if importer.feed(data[start:start + size]):
+            importer.flush()
+
+
+def test_long_line_fed_in_small_chunks(db):
+    importer = NDJSONImporter(db)
+    line = _line("长" * (1024 * 1024))
+    chunks = [line[start:start + 64 * 1024] for start in range(0, len(line), 64 * 1024)]
+
+    for chunk in chunks[:-1]:
+        importer.feed(chunk)
+    # 未结束的行按块暂存，不在每次feed时重新拼接
+    assert len(importer._partial) == len(chunks) - 1
+    importer.feed(chunks[-1] + _line("尾"))
+    assert not importer._partial
+    assert importer.finish() == {'imported': 2, 'skipped': 0, 'errors': 0}
+
+
+def test_overlong_line_skipped_without_buffering(db):
+    importer = NDJSONImporter(db, max_line_bytes=1024)
+    data = _line("前") + _line("x" * 10_000) + _line("后")
+
+    _feed_in_chunks(importer, data, 100)
+    assert importer._partial_size <= 1024 + 100
+    assert importer.finish() == {'imported': 2, 'skipped': 0, 'errors': 1}
+    assert sorted(item['preview'] for item in db.get_clipboard_items()) == ["前", "后"]
+
+
+def test_batch_flushed_by_bytes(db):
+    importer = NDJSONImporter(db, batch_bytes=4096)
+    assert not importer.feed(_line("a"))
+    assert importer.feed(_line("b" * 5000))
+    importer.flush()
+    assert importer.result()['imported'] == 2